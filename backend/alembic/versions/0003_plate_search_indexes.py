@@ -0,0 +1,57 @@
+"""plate search key and indexes
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2024-01-03 00:00:00.000000
+"""
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "0003"
+down_revision = "0002"
+branch_labels = None
+depends_on = None
+
+# Must match app.search.CONFUSABLE_FROM / CONFUSABLE_TO.
+CONFUSABLE_FROM = "OQDILZSGB"
+CONFUSABLE_TO = "000112568"
+
+
+def upgrade() -> None:
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+
+    op.add_column("plateevent", sa.Column("plate_key", sa.String(), nullable=True))
+    op.execute(
+        "UPDATE plateevent SET plate_key = translate("
+        "regexp_replace(upper(plate_text), '[^0-9A-Z]', '', 'g'), "
+        f"'{CONFUSABLE_FROM}', '{CONFUSABLE_TO}')"
+    )
+
+    # Substring (ILIKE '%...%') and fuzzy (% similarity) plate lookups.
+    op.execute(
+        "CREATE INDEX ix_plateevent_plate_text_trgm ON plateevent USING gin (plate_text gin_trgm_ops)"
+    )
+    op.execute(
+        "CREATE INDEX ix_plateevent_plate_key_trgm ON plateevent USING gin (plate_key gin_trgm_ops)"
+    )
+    # Prefix lookups on the normalized key.
+    op.execute(
+        "CREATE INDEX ix_plateevent_plate_key ON plateevent (plate_key text_pattern_ops)"
+    )
+
+    op.create_index("ix_plateevent_timestamp", "plateevent", ["timestamp"])
+    op.create_index("ix_plateevent_camera_id_timestamp", "plateevent", ["camera_id", "timestamp"])
+    op.create_index("ix_plateevent_zone_id_timestamp", "plateevent", ["zone_id", "timestamp"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_plateevent_zone_id_timestamp", table_name="plateevent")
+    op.drop_index("ix_plateevent_camera_id_timestamp", table_name="plateevent")
+    op.drop_index("ix_plateevent_timestamp", table_name="plateevent")
+    op.drop_index("ix_plateevent_plate_key", table_name="plateevent")
+    op.drop_index("ix_plateevent_plate_key_trgm", table_name="plateevent")
+    op.drop_index("ix_plateevent_plate_text_trgm", table_name="plateevent")
+    op.drop_column("plateevent", "plate_key")
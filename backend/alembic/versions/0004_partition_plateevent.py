@@ -0,0 +1,97 @@
+"""partition plateevent by timestamp
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2024-01-04 00:00:00.000000
+"""
+from __future__ import annotations
+
+from datetime import datetime
+
+from alembic import op
+
+from app.partitions import DEFAULT_PARTITION, create_partition_sql, planned_partitions
+
+# revision identifiers, used by Alembic.
+revision = "0004"
+down_revision = "0003"
+branch_labels = None
+depends_on = None
+
+COLUMNS = (
+    "id, plate_text, plate_key, confidence, camera_id, zone_id, timestamp, direction, "
+    "frame_url, crop_url, sensor_snapshot, raw_payload"
+)
+
+
+def _create_indexes() -> None:
+    op.execute("CREATE INDEX ix_plateevent_plate_text_trgm ON plateevent USING gin (plate_text gin_trgm_ops)")
+    op.execute("CREATE INDEX ix_plateevent_plate_key_trgm ON plateevent USING gin (plate_key gin_trgm_ops)")
+    op.execute("CREATE INDEX ix_plateevent_plate_key ON plateevent (plate_key text_pattern_ops)")
+    op.execute("CREATE INDEX ix_plateevent_timestamp ON plateevent (timestamp)")
+    op.execute("CREATE INDEX ix_plateevent_camera_id_timestamp ON plateevent (camera_id, timestamp)")
+    op.execute("CREATE INDEX ix_plateevent_zone_id_timestamp ON plateevent (zone_id, timestamp)")
+
+
+def _drop_legacy_indexes() -> None:
+    for name in (
+        "ix_plateevent_plate_text_trgm",
+        "ix_plateevent_plate_key_trgm",
+        "ix_plateevent_plate_key",
+        "ix_plateevent_timestamp",
+        "ix_plateevent_camera_id_timestamp",
+        "ix_plateevent_zone_id_timestamp",
+    ):
+        op.execute(f"DROP INDEX IF EXISTS {name}")
+
+
+def _column_definitions() -> str:
+    return """
+        id integer NOT NULL DEFAULT nextval('plateevent_id_seq'),
+        plate_text varchar NOT NULL,
+        plate_key varchar,
+        confidence double precision,
+        camera_id integer REFERENCES camera (id),
+        zone_id integer REFERENCES zone (id),
+        timestamp timestamp without time zone NOT NULL,
+        direction varchar,
+        frame_url varchar,
+        crop_url varchar,
+        sensor_snapshot json,
+        raw_payload json
+    """
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    op.execute("ALTER TABLE plateevent RENAME TO plateevent_legacy")
+    op.execute("ALTER INDEX plateevent_pkey RENAME TO plateevent_legacy_pkey")
+    _drop_legacy_indexes()
+    # The primary key of a partitioned table must include the partition key.
+    op.execute(
+        f"CREATE TABLE plateevent ({_column_definitions()}, PRIMARY KEY (id, timestamp)) "
+        "PARTITION BY RANGE (timestamp)"
+    )
+    _create_indexes()
+
+    oldest = bind.exec_driver_sql("SELECT min(timestamp) FROM plateevent_legacy").scalar()
+    for name, start, end in planned_partitions(datetime.utcnow(), since=oldest):
+        op.execute(create_partition_sql(name, start, end))
+    # Catches rows outside the pre-created range (e.g. edge boxes with a bad clock);
+    # app.partitions.create_partition moves them out once their range is created.
+    op.execute(f"CREATE TABLE {DEFAULT_PARTITION} PARTITION OF plateevent DEFAULT")
+
+    op.execute(f"INSERT INTO plateevent ({COLUMNS}) SELECT {COLUMNS} FROM plateevent_legacy")
+    op.execute("ALTER SEQUENCE plateevent_id_seq OWNED BY plateevent.id")
+    op.execute("DROP TABLE plateevent_legacy")
+
+
+def downgrade() -> None:
+    op.execute("ALTER TABLE plateevent RENAME TO plateevent_partitioned")
+    op.execute("ALTER INDEX plateevent_pkey RENAME TO plateevent_partitioned_pkey")
+    _drop_legacy_indexes()
+    op.execute(f"CREATE TABLE plateevent ({_column_definitions()}, PRIMARY KEY (id))")
+    op.execute(f"INSERT INTO plateevent ({COLUMNS}) SELECT {COLUMNS} FROM plateevent_partitioned")
+    op.execute("ALTER SEQUENCE plateevent_id_seq OWNED BY plateevent.id")
+    op.execute("DROP TABLE plateevent_partitioned CASCADE")
+    _create_indexes()
@@ -0,0 +1,122 @@
+"""In-process fan-out of newly ingested events to WebSocket subscribers."""
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+from collections.abc import Iterable
+
+from . import schemas
+
+logger = logging.getLogger(__name__)
+
+SUBSCRIBER_BUFFER = int(os.getenv("EVENT_STREAM_BUFFER", "256"))
+
+_CLOSED = object()
+
+
+class Subscription:
+    """One connected client: its filters and a bounded outgoing buffer.
+
+    Empty ``camera_ids``/``zone_ids`` mean "everything". When the buffer is
+    full the subscriber is treated as a slow consumer and cut off instead of
+    holding up the publisher or growing without bound; the client is expected
+    to reconnect and backfill from ``/events/search``.
+    """
+
+    def __init__(
+        self, camera_ids: Iterable[int] = (), zone_ids: Iterable[int] = (), buffer: int | None = None
+    ) -> None:
+        self.camera_ids = frozenset(camera_ids)
+        self.zone_ids = frozenset(zone_ids)
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=buffer or SUBSCRIBER_BUFFER)
+        self.lagged = False
+
+    def wants(self, camera_id: int | None, zone_id: int | None) -> bool:
+        if self.camera_ids and camera_id not in self.camera_ids:
+            return False
+        if self.zone_ids and zone_id not in self.zone_ids:
+            return False
+        return True
+
+    def offer(self, message: str) -> bool:
+        try:
+            self.queue.put_nowait(message)
+        except asyncio.QueueFull:
+            self.lagged = True
+            return False
+        return True
+
+    def close(self) -> None:
+        # Make room so the sender always sees the sentinel.
+        while not self.queue.empty():
+            self.queue.get_nowait()
+        self.queue.put_nowait(_CLOSED)
+
+    async def next(self) -> str | None:
+        """Next serialized event, or None once the subscription is closed."""
+        message = await self.queue.get()
+        return None if message is _CLOSED else message
+
+
+class EventHub:
+    """Async pub/sub for plate events within one worker process.
+
+    Each event is serialized to JSON once and the same string is queued for
+    every matching subscriber, so publishing costs one ``model_dump_json``
+    plus an O(1) queue put per client. The async ingest routes and the
+    LISTEN/NOTIFY listener publish on the event loop; a call from any other
+    thread is handed to the loop the subscribers live on.
+    """
+
+    def __init__(self) -> None:
+        self._subscribers: set[Subscription] = set()
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self.dropped_subscribers = 0
+
+    def __len__(self) -> int:
+        return len(self._subscribers)
+
+    def subscribe(self, camera_ids: Iterable[int] = (), zone_ids: Iterable[int] = ()) -> Subscription:
+        self._loop = asyncio.get_running_loop()
+        subscription = Subscription(camera_ids, zone_ids)
+        self._subscribers.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        self._subscribers.discard(subscription)
+
+    def publish(self, events: Iterable[schemas.PlateEventRead]) -> None:
+        """Queue events for delivery; safe to call from any thread."""
+        if not self._subscribers or self._loop is None:
+            return
+        self.publish_serialized([(event.model_dump_json(), event.camera_id, event.zone_id) for event in events])
+
+    def publish_serialized(self, messages: list[tuple[str, int | None, int | None]]) -> None:
+        """Queue already serialized ``(json, camera_id, zone_id)`` messages."""
+        if not messages or not self._subscribers or self._loop is None:
+            return
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is self._loop:
+            self._fan_out(messages)
+        elif not self._loop.is_closed():
+            self._loop.call_soon_threadsafe(self._fan_out, messages)
+
+    def _fan_out(self, messages: list[tuple[str, int | None, int | None]]) -> None:
+        for subscription in list(self._subscribers):
+            for message, camera_id, zone_id in messages:
+                if subscription.wants(camera_id, zone_id) and not subscription.offer(message):
+                    self._drop(subscription)
+                    break
+
+    def _drop(self, subscription: Subscription) -> None:
+        self.unsubscribe(subscription)
+        subscription.close()
+        self.dropped_subscribers += 1
+        logger.warning("Dropping slow event stream subscriber (buffer of %d full)", subscription.queue.maxsize)
+
+
+hub = EventHub()
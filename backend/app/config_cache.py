@@ -0,0 +1,183 @@
+"""Read-through cache for the ``/config`` lists with change-version invalidation.
+
+Every configuration entity (cameras, zones, ...) has a version: the
+millisecond timestamp of its last change, or of process start. Write
+handlers call ``touch`` before committing; once the transaction commits the
+entity's version moves forward and its cached responses stop matching. On
+PostgreSQL the change is also sent with ``pg_notify`` so the other workers
+(through the ``fanout`` listener) drop their copies too. Because versions
+are timestamps rather than per-process counters they can be compared across
+workers, which is what ``/config/snapshot?since_version=`` relies on.
+
+Cached bodies carry a content-hash ETag, so ``If-None-Match`` is answered
+with 304 without touching the database, whichever worker serves it. Bodies
+are keyed on the validated list parameters only, and each entity keeps at
+most ``max_entries`` of them (least recently used go first), so clients
+cannot grow the cache with extra parameters or arbitrary cursors.
+"""
+from __future__ import annotations
+
+import hashlib
+import logging
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Hashable
+
+from fastapi import Request, Response
+from sqlalchemy import event, text
+from sqlalchemy.orm import Session
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from .pagination import NEXT_CURSOR_HEADER
+
+logger = logging.getLogger(__name__)
+
+CHANNEL = "config_changed"
+ENTITIES = ("cameras", "zones", "models", "sensors", "exporters")
+_PENDING_KEY = "config_cache_pending_versions"
+
+
+def _now_ms() -> int:
+    return time.time_ns() // 1_000_000
+
+
+@dataclass(frozen=True)
+class CachedBody:
+    version: int
+    body: bytes
+    etag: str
+    next_cursor: str | None = None
+
+    def response(self, if_none_match: str | None) -> Response:
+        headers = {"ETag": self.etag, "Cache-Control": "no-cache"}
+        if self.next_cursor:
+            headers[NEXT_CURSOR_HEADER] = self.next_cursor
+        if if_none_match and self.etag in (tag.strip() for tag in if_none_match.split(",")):
+            return Response(status_code=304, headers=headers)
+        return Response(content=self.body, media_type="application/json", headers=headers)
+
+
+class ConfigCache:
+    def __init__(self, entities=ENTITIES, max_entries: int = 256) -> None:
+        started = _now_ms()
+        self.versions: dict[str, int] = {entity: started for entity in entities}
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._last = started
+        self._entries: dict[str, OrderedDict[Hashable, CachedBody]] = {entity: OrderedDict() for entity in entities}
+        self._lock = threading.Lock()
+
+    def next_version(self) -> int:
+        with self._lock:
+            self._last = max(self._last + 1, _now_ms())
+            return self._last
+
+    def bump(self, entity: str, version: int) -> None:
+        """Record a committed change and drop the entity's cached bodies.
+
+        Older or repeated versions (e.g. this worker's own notification
+        arriving after the local commit hook) are ignored.
+        """
+        with self._lock:
+            self._last = max(self._last, version)
+            if version <= self.versions.get(entity, 0):
+                return
+            self.versions[entity] = version
+            self._entries[entity] = OrderedDict()
+
+    @property
+    def version(self) -> int:
+        return max(self.versions.values())
+
+    def get(self, entity: str, key: Hashable) -> CachedBody | None:
+        with self._lock:
+            entries = self._entries[entity]
+            entry = entries.get(key)
+            if entry is None or entry.version != self.versions[entity]:
+                self.misses += 1
+                return None
+            entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def put(
+        self, entity: str, key: Hashable, version: int, body: bytes, next_cursor: str | None = None
+    ) -> CachedBody:
+        entry = CachedBody(version, body, f'"{hashlib.sha1(body).hexdigest()}"', next_cursor)
+        with self._lock:
+            # A change that committed while the rows were loading makes them stale.
+            if version == self.versions[entity]:
+                entries = self._entries[entity]
+                entries[key] = entry
+                entries.move_to_end(key)
+                while len(entries) > self.max_entries:
+                    entries.popitem(last=False)
+        return entry
+
+    async def read_through(
+        self, entity: str, key: Hashable, load: Callable[[Response], Awaitable[bytes]]
+    ) -> CachedBody:
+        entry = self.get(entity, key)
+        if entry is None:
+            version = self.versions[entity]
+            scratch = Response()
+            body = await load(scratch)
+            entry = self.put(entity, key, version, body, scratch.headers.get(NEXT_CURSOR_HEADER))
+        return entry
+
+    def invalidate_all(self) -> None:
+        version = self.next_version()
+        for entity in list(self.versions):
+            self.bump(entity, version)
+
+    def clear(self) -> None:
+        with self._lock:
+            for entity in self._entries:
+                self._entries[entity] = OrderedDict()
+
+
+cache = ConfigCache()
+
+
+async def cached_response(
+    request: Request, entity: str, key: Hashable, load: Callable[[Response], Awaitable[bytes]]
+) -> Response:
+    """Serve a list endpoint from the cache, loading it with ``load`` on a miss.
+
+    ``key`` identifies the page by the route's validated parameters, never
+    by the raw query string.
+    """
+    entry = await cache.read_through(entity, key, load)
+    return entry.response(request.headers.get("if-none-match"))
+
+
+async def touch(session: AsyncSession, entity: str) -> None:
+    """Mark ``entity`` as changed by the transaction about to commit on ``session``."""
+    version = cache.next_version()
+    session.info.setdefault(_PENDING_KEY, {})[entity] = version
+    if session.get_bind().dialect.name == "postgresql":
+        await session.execute(
+            text("SELECT pg_notify(:channel, :payload)"), {"channel": CHANNEL, "payload": f"{entity}:{version}"}
+        )
+
+
+@event.listens_for(Session, "after_commit")
+def _bump_committed(session: Session) -> None:
+    for entity, version in session.info.pop(_PENDING_KEY, {}).items():
+        cache.bump(entity, version)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_rolled_back(session: Session) -> None:
+    session.info.pop(_PENDING_KEY, None)
+
+
+def on_notify(connection, pid, channel, payload: str) -> None:
+    entity, _, version = payload.partition(":")
+    try:
+        cache.bump(entity, int(version))
+    except ValueError:
+        logger.warning("Ignoring malformed %s notification %r", CHANNEL, payload)
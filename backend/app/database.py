@@ -1,17 +1,197 @@
 from __future__ import annotations
 
 import os
+import threading
 import time
-from typing import Generator
+from typing import AsyncGenerator, Generator
 
 from sqlalchemy import create_engine
+from sqlalchemy.engine import Engine
 from sqlalchemy.exc import OperationalError
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
 from sqlmodel import Session, SQLModel
+from sqlmodel.ext.asyncio.session import AsyncSession
 
 DATABASE_URL = os.getenv("DATABASE_URL", "postgresql://anpr:anpr@db:5432/anpr")
+POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+POOL_TIMEOUT_S = float(os.getenv("DB_POOL_TIMEOUT_S", "30"))
+POOL_RECYCLE_S = int(os.getenv("DB_POOL_RECYCLE_S", "1800"))
+POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() in ("1", "true", "yes")
+STATEMENT_TIMEOUT_MS = int(os.getenv("DB_STATEMENT_TIMEOUT_MS", "30000"))
 
-def get_engine():
-    return create_engine(DATABASE_URL, echo=False)
+
+def async_url(url: str) -> str:
+    """The async driver variant of ``url`` (asyncpg for PostgreSQL, aiosqlite for SQLite)."""
+    scheme, rest = url.split("://", 1)
+    if scheme.startswith("postgresql"):
+        return f"postgresql+asyncpg://{rest}"
+    if scheme.startswith("sqlite"):
+        return f"sqlite+aiosqlite://{rest}"
+    return url
+
+
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL", async_url(DATABASE_URL))
+
+_engine: Engine | None = None
+_async_engine: AsyncEngine | None = None
+_engine_lock = threading.Lock()
+
+
+class _WaitStats:
+    """Pool mixin that records how long checkouts wait for a free connection."""
+
+    def __init__(self, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self.checkouts = 0
+        self.waited = 0
+        self.timeouts = 0
+        self.wait_total_s = 0.0
+        self.wait_max_s = 0.0
+
+    def _do_get(self):
+        # With no idle connection and no overflow left, the checkout has to
+        # wait for another request to return one; only those waits are timed.
+        saturated = self.checkedin() == 0 and self.overflow() >= self._max_overflow > -1
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        except PoolTimeoutError:
+            self.timeouts += 1
+            raise
+        finally:
+            self.checkouts += 1
+            if saturated:
+                waited = time.perf_counter() - started
+                self.waited += 1
+                self.wait_total_s += waited
+                self.wait_max_s = max(self.wait_max_s, waited)
+
+
+class InstrumentedQueuePool(_WaitStats, QueuePool):
+    pass
+
+
+class InstrumentedAsyncQueuePool(_WaitStats, AsyncAdaptedQueuePool):
+    pass
+
+
+def _pool_options() -> dict:
+    return {
+        "pool_size": POOL_SIZE,
+        "max_overflow": MAX_OVERFLOW,
+        "pool_timeout": POOL_TIMEOUT_S,
+        "pool_recycle": POOL_RECYCLE_S,
+        "pool_pre_ping": POOL_PRE_PING,
+    }
+
+
+def create_db_engine(url: str = DATABASE_URL) -> Engine:
+    if url.startswith("sqlite"):
+        return create_engine(url, echo=False, connect_args={"check_same_thread": False})
+    connect_args = {}
+    if url.startswith("postgresql") and STATEMENT_TIMEOUT_MS:
+        connect_args["options"] = f"-c statement_timeout={STATEMENT_TIMEOUT_MS}"
+    return create_engine(
+        url,
+        echo=False,
+        poolclass=InstrumentedQueuePool,
+        connect_args=connect_args,
+        **_pool_options(),
+    )
+
+
+def create_async_db_engine(url: str = ASYNC_DATABASE_URL) -> AsyncEngine:
+    if url.startswith("sqlite"):
+        return create_async_engine(url, echo=False)
+    connect_args = {}
+    if url.startswith("postgresql+asyncpg") and STATEMENT_TIMEOUT_MS:
+        connect_args["server_settings"] = {"statement_timeout": str(STATEMENT_TIMEOUT_MS)}
+    return create_async_engine(
+        url,
+        echo=False,
+        poolclass=InstrumentedAsyncQueuePool,
+        connect_args=connect_args,
+        **_pool_options(),
+    )
+
+
+def init_engine(url: str = DATABASE_URL) -> Engine:
+    """Create the process-wide engine (once); called from the app lifespan."""
+    global _engine
+    with _engine_lock:
+        if _engine is None:
+            _engine = create_db_engine(url)
+        return _engine
+
+
+def get_engine() -> Engine:
+    return _engine or init_engine()
+
+
+def init_async_engine(url: str = ASYNC_DATABASE_URL) -> AsyncEngine:
+    """Create the process-wide async engine used by the API routes."""
+    global _async_engine
+    with _engine_lock:
+        if _async_engine is None:
+            _async_engine = create_async_db_engine(url)
+        return _async_engine
+
+
+def get_async_engine() -> AsyncEngine:
+    return _async_engine or init_async_engine()
+
+
+def dispose_engine() -> None:
+    global _engine
+    with _engine_lock:
+        if _engine is not None:
+            _engine.dispose()
+            _engine = None
+
+
+async def dispose_async_engine() -> None:
+    global _async_engine
+    engine, _async_engine = _async_engine, None
+    if engine is not None:
+        await engine.dispose()
+
+
+def _pool_stats(pool) -> dict:
+    stats = {"class": type(pool).__name__}
+    if isinstance(pool, QueuePool):
+        stats.update(
+            size=pool.size(),
+            checked_in=pool.checkedin(),
+            checked_out=pool.checkedout(),
+            overflow=pool.overflow(),
+            max_overflow=pool._max_overflow,
+        )
+    if isinstance(pool, _WaitStats):
+        stats.update(
+            checkouts=pool.checkouts,
+            waited=pool.waited,
+            timeouts=pool.timeouts,
+            wait_avg_ms=round(pool.wait_total_s / pool.waited * 1000, 3) if pool.waited else 0.0,
+            wait_max_ms=round(pool.wait_max_s * 1000, 3),
+        )
+    return stats
+
+
+def pool_stats() -> dict | None:
+    """Checkout and wait statistics of the shared pools, or None before startup.
+
+    ``async`` is the pool serving API routes; ``sync`` serves background
+    maintenance and scripts.
+    """
+    stats = {}
+    if _async_engine is not None:
+        stats["async"] = _pool_stats(_async_engine.pool)
+    if _engine is not None:
+        stats["sync"] = _pool_stats(_engine.pool)
+    return stats or None
 
 
 def wait_for_db(engine, retries: int = 10, delay: float = 1.0) -> None:
@@ -30,6 +210,11 @@ def init_db(engine=None) -> None:
 
 
 def get_session() -> Generator[Session, None, None]:
-    engine = get_engine()
-    with Session(engine) as session:
+    with Session(get_engine()) as session:
+        yield session
+
+
+async def get_async_session() -> AsyncGenerator[AsyncSession, None]:
+    # Objects stay usable after commit so routes can return them without a reload.
+    async with AsyncSession(get_async_engine(), expire_on_commit=False) as session:
         yield session
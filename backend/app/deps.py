@@ -1,5 +1,5 @@
 from __future__ import annotations
 
-from .database import get_session
+from .database import get_async_session, get_session
 
-__all__ = ["get_session"]
+__all__ = ["get_async_session", "get_session"]
@@ -0,0 +1,161 @@
+"""Cross-worker delivery of ingested events to ``/events/stream`` subscribers.
+
+Ingest routes call ``publish`` before committing. On PostgreSQL the events
+are sent with ``pg_notify`` inside the same transaction, so they go out only
+if the insert commits. Every worker runs one ``listen`` task on a dedicated
+asyncpg connection and forwards what it receives to its local ``hub``,
+including events this worker ingested itself. On other databases, or with
+``EVENT_FANOUT=local``, events are handed to the local hub after commit and
+only reach clients of the same process.
+
+A NOTIFY payload is limited to 8000 bytes. Events are packed one JSON
+object per line into as few notifications as fit, and an event too large
+on its own is sent as ``{"ref": id}`` and re-read by the listener.
+"""
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import os
+import random
+from typing import Iterable
+
+from sqlalchemy import event, text
+from sqlalchemy.orm import Session
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from . import config_cache, schemas
+from .broadcast import hub
+from .database import DATABASE_URL
+
+logger = logging.getLogger(__name__)
+
+CHANNEL = "plateevent"
+FANOUT_MODE = os.getenv("EVENT_FANOUT", "auto")
+# PostgreSQL rejects payloads of 8000 bytes or more; keep a margin.
+MAX_PAYLOAD_BYTES = 7900
+_PENDING_KEY = "fanout_pending_events"
+_REF_QUERY = "SELECT row_to_json(e)::text FROM plateevent e WHERE id = ANY($1::int[])"
+
+
+def pack_payloads(events: Iterable[schemas.PlateEventRead], limit: int = MAX_PAYLOAD_BYTES) -> list[str]:
+    """Newline-joined JSON events split into payloads of at most ``limit`` bytes."""
+    payloads: list[str] = []
+    lines: list[str] = []
+    size = 0
+    for item in events:
+        line = item.model_dump_json()
+        if len(line.encode()) > limit:
+            line = json.dumps({"ref": item.id})
+        length = len(line.encode()) + 1
+        if lines and size + length > limit:
+            payloads.append("\n".join(lines))
+            lines, size = [], 0
+        lines.append(line)
+        size += length
+    if lines:
+        payloads.append("\n".join(lines))
+    return payloads
+
+
+async def publish(session: AsyncSession, events: list[schemas.PlateEventRead]) -> None:
+    """Announce events that the caller is about to commit on ``session``."""
+    if not events:
+        return
+    if session.get_bind().dialect.name == "postgresql" and FANOUT_MODE != "local":
+        for payload in pack_payloads(events):
+            await session.execute(text("SELECT pg_notify(:channel, :payload)"), {"channel": CHANNEL, "payload": payload})
+        return
+    session.info.setdefault(_PENDING_KEY, []).extend(events)
+
+
+@event.listens_for(Session, "after_commit")
+def _publish_committed(session: Session) -> None:
+    events = session.info.pop(_PENDING_KEY, None)
+    if events:
+        hub.publish(events)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_rolled_back(session: Session) -> None:
+    session.info.pop(_PENDING_KEY, None)
+
+
+def _asyncpg_dsn(url: str) -> str:
+    scheme, rest = url.split("://", 1)
+    return f"postgresql://{rest}" if scheme.startswith("postgresql") else url
+
+
+class _Listener:
+    def __init__(self, connection) -> None:
+        self.connection = connection
+        self.closed = asyncio.Event()
+        self._lock = asyncio.Lock()
+        self._tasks: set[asyncio.Task] = set()
+
+    def on_notify(self, connection, pid, channel, payload: str) -> None:
+        messages, refs = [], []
+        for line in payload.splitlines():
+            try:
+                data = json.loads(line)
+            except ValueError:
+                logger.warning("Ignoring malformed %s notification line", CHANNEL)
+                continue
+            if data.keys() == {"ref"}:
+                refs.append(data["ref"])
+            else:
+                messages.append((line, data.get("camera_id"), data.get("zone_id")))
+        hub.publish_serialized(messages)
+        if refs:
+            task = asyncio.get_running_loop().create_task(self._resolve(refs))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _resolve(self, ids: list[int]) -> None:
+        try:
+            async with self._lock:
+                rows = await self.connection.fetch(_REF_QUERY, ids)
+        except Exception as exc:  # noqa: BLE001
+            logger.error("Could not load referenced events %s: %s", ids, exc)
+            return
+        events = [schemas.PlateEventRead.model_validate_json(row[0]) for row in rows]
+        hub.publish(events)
+
+    def on_terminate(self, connection) -> None:
+        self.closed.set()
+
+
+async def listen(url: str = DATABASE_URL, backoff_initial: float = 0.5, backoff_max: float = 30.0) -> None:
+    """Keep one LISTEN connection open for this worker, reconnecting on failure.
+
+    The same connection also receives ``config_cache`` invalidations.
+    """
+    import asyncpg
+
+    backoff = backoff_initial
+    while True:
+        try:
+            connection = await asyncpg.connect(_asyncpg_dsn(url))
+        except Exception as exc:  # noqa: BLE001
+            delay = random.uniform(0, backoff)
+            logger.warning("Event listener cannot connect (%s), retrying in %.1fs", exc, delay)
+            await asyncio.sleep(delay)
+            backoff = min(backoff * 2, backoff_max)
+            continue
+        listener = _Listener(connection)
+        try:
+            connection.add_termination_listener(listener.on_terminate)
+            await connection.add_listener(CHANNEL, listener.on_notify)
+            await connection.add_listener(config_cache.CHANNEL, config_cache.on_notify)
+            # Config changes may have been missed while disconnected.
+            config_cache.cache.invalidate_all()
+            logger.info("Listening for %s and %s notifications", CHANNEL, config_cache.CHANNEL)
+            backoff = backoff_initial
+            await listener.closed.wait()
+            logger.warning("Event listener connection lost, reconnecting")
+        except Exception as exc:  # noqa: BLE001
+            logger.error("Event listener failed: %s", exc)
+        finally:
+            if not connection.is_closed():
+                await connection.close()
@@ -1,9 +1,45 @@
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
 
+from . import fanout, partitions
+from .database import DATABASE_URL, dispose_async_engine, dispose_engine, init_async_engine, init_engine
 from .routers import config, events, exporters, health
 
-app = FastAPI(title="ANPR Engine")
+logger = logging.getLogger(__name__)
+
+
+async def _partition_maintenance(engine) -> None:
+    while True:
+        try:
+            await run_in_threadpool(partitions.run_maintenance, engine)
+        except Exception as exc:  # noqa: BLE001
+            logger.error("Partition maintenance failed: %s", exc)
+        await asyncio.sleep(partitions.MAINTENANCE_INTERVAL_S)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    engine = init_engine()
+    init_async_engine()
+    tasks = [asyncio.create_task(_partition_maintenance(engine))]
+    if DATABASE_URL.startswith("postgresql"):
+        tasks.append(asyncio.create_task(fanout.listen()))
+    try:
+        yield
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        await dispose_async_engine()
+        dispose_engine()
+
+
+app = FastAPI(title="ANPR Engine", lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -11,6 +47,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],
 )
 
 app.include_router(health.router)
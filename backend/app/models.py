@@ -3,7 +3,7 @@ from __future__ import annotations
 from datetime import datetime
 from typing import Optional
 
-from sqlalchemy import Column, JSON
+from sqlalchemy import Column, Index, JSON
 from sqlmodel import Field, SQLModel
 
 
@@ -56,12 +56,18 @@ class Exporter(SQLModel, table=True):
 
 
 class PlateEvent(SQLModel, table=True):
+    __table_args__ = (
+        Index("ix_plateevent_camera_id_timestamp", "camera_id", "timestamp"),
+        Index("ix_plateevent_zone_id_timestamp", "zone_id", "timestamp"),
+    )
+
     id: Optional[int] = Field(default=None, primary_key=True)
     plate_text: str
+    plate_key: Optional[str] = Field(default=None, index=True)
     confidence: Optional[float] = None
     camera_id: Optional[int] = Field(default=None, foreign_key="camera.id")
     zone_id: Optional[int] = Field(default=None, foreign_key="zone.id")
-    timestamp: datetime = Field(default_factory=datetime.utcnow)
+    timestamp: datetime = Field(default_factory=datetime.utcnow, index=True)
     direction: Optional[str] = None
     frame_url: Optional[str] = None
     crop_url: Optional[str] = None
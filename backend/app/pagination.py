@@ -0,0 +1,69 @@
+"""Keyset (cursor) pagination helpers."""
+from __future__ import annotations
+
+import base64
+import json
+from datetime import datetime
+from typing import Any, Sequence
+
+from fastapi import HTTPException, Response
+from sqlalchemy import tuple_
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def encode_cursor(values: dict[str, Any]) -> str:
+    raw = json.dumps(values, separators=(",", ":"), default=str).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(token: str) -> dict[str, Any]:
+    try:
+        raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+        values = json.loads(raw)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail="Invalid cursor") from exc
+    if not isinstance(values, dict):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return values
+
+
+def after_id(query, model, cursor: str | None):
+    """Order by ``id`` ascending and start after the row the cursor points at."""
+    query = query.order_by(model.id)
+    if cursor:
+        values = decode_cursor(cursor)
+        try:
+            query = query.where(model.id > int(values["id"]))
+        except (KeyError, TypeError, ValueError) as exc:
+            raise HTTPException(status_code=400, detail="Invalid cursor") from exc
+    return query
+
+
+def before_timestamp_id(query, model, cursor: str | None):
+    """Order by ``(timestamp, id)`` descending and continue below the cursor row."""
+    query = query.order_by(model.timestamp.desc(), model.id.desc())
+    if cursor:
+        values = decode_cursor(cursor)
+        try:
+            timestamp = datetime.fromisoformat(values["ts"])
+            last_id = int(values["id"])
+        except (KeyError, TypeError, ValueError) as exc:
+            raise HTTPException(status_code=400, detail="Invalid cursor") from exc
+        # The plain bound on ``timestamp`` lets PostgreSQL prune partitions,
+        # which it cannot do from the row comparison alone.
+        query = query.where(
+            model.timestamp <= timestamp, tuple_(model.timestamp, model.id) < tuple_(timestamp, last_id)
+        )
+    return query
+
+
+def page(rows: Sequence[Any], limit: int, response: Response, key) -> list[Any]:
+    """Trim the ``limit + 1`` probe row and expose the cursor of the last item.
+
+    ``key`` maps the last returned row to the values encoded in the cursor.
+    """
+    items = list(rows[:limit])
+    if len(rows) > limit:
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(key(items[-1]))
+    return items
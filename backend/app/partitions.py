@@ -0,0 +1,190 @@
+"""Range partition maintenance and retention for the ``plateevent`` table.
+
+On PostgreSQL ``plateevent`` is partitioned by ``timestamp`` (see migration
+0004). This module creates partitions ahead of time and enforces retention by
+detaching and dropping whole partitions, which avoids the bloat and vacuum
+load of ``DELETE``-based expiry. On other databases it does nothing.
+
+Run once with ``python -m app.partitions`` (e.g. from cron) or let the API
+process run it periodically.
+"""
+from __future__ import annotations
+
+import logging
+import os
+import re
+from datetime import datetime, timedelta
+from typing import Iterable
+
+from sqlalchemy import text
+
+logger = logging.getLogger(__name__)
+
+PARENT_TABLE = "plateevent"
+DEFAULT_PARTITION = f"{PARENT_TABLE}_default"
+PARTITION_INTERVAL = os.getenv("EVENT_PARTITION_INTERVAL", "month")
+PARTITIONS_AHEAD = int(os.getenv("EVENT_PARTITIONS_AHEAD", "3"))
+RETENTION_DAYS = int(os.getenv("EVENT_RETENTION_DAYS", "0")) or None
+MAINTENANCE_INTERVAL_S = float(os.getenv("PARTITION_MAINTENANCE_INTERVAL_S", "3600"))
+
+_NAME = re.compile(rf"^{PARENT_TABLE}_p(\d{{4}})_(\d{{2}})(?:_(\d{{2}}))?$")
+
+
+def partition_start(at: datetime, interval: str = PARTITION_INTERVAL) -> datetime:
+    if interval == "day":
+        return datetime(at.year, at.month, at.day)
+    if interval == "month":
+        return datetime(at.year, at.month, 1)
+    raise ValueError(f"Unknown partition interval {interval!r}")
+
+
+def next_partition_start(start: datetime, interval: str = PARTITION_INTERVAL) -> datetime:
+    if interval == "day":
+        return start + timedelta(days=1)
+    return datetime(start.year + start.month // 12, start.month % 12 + 1, 1)
+
+
+def partition_name(start: datetime, interval: str = PARTITION_INTERVAL) -> str:
+    if interval == "day":
+        return f"{PARENT_TABLE}_p{start:%Y_%m_%d}"
+    return f"{PARENT_TABLE}_p{start:%Y_%m}"
+
+
+def partition_range(name: str) -> tuple[datetime, datetime] | None:
+    """Bounds of a partition from its name, or None for non-range partitions."""
+    match = _NAME.match(name)
+    if not match:
+        return None
+    year, month, day = match.groups()
+    if day:
+        start = datetime(int(year), int(month), int(day))
+        return start, next_partition_start(start, "day")
+    start = datetime(int(year), int(month), 1)
+    return start, next_partition_start(start, "month")
+
+
+def planned_partitions(
+    now: datetime, ahead: int = PARTITIONS_AHEAD, interval: str = PARTITION_INTERVAL, since: datetime | None = None
+) -> list[tuple[str, datetime, datetime]]:
+    """Partitions covering ``since`` (default: now) through ``ahead`` intervals past now."""
+    start = partition_start(since or now, interval)
+    last = partition_start(now, interval)
+    for _ in range(ahead):
+        last = next_partition_start(last, interval)
+    planned = []
+    while start <= last:
+        end = next_partition_start(start, interval)
+        planned.append((partition_name(start, interval), start, end))
+        start = end
+    return planned
+
+
+def expired_partitions(names: Iterable[str], retention_days: int, now: datetime) -> list[str]:
+    """Partitions whose whole range is older than the retention window."""
+    cutoff = now - timedelta(days=retention_days)
+    expired = []
+    for name in names:
+        bounds = partition_range(name)
+        if bounds and bounds[1] <= cutoff:
+            expired.append(name)
+    return sorted(expired)
+
+
+def create_partition_sql(name: str, start: datetime, end: datetime) -> str:
+    return (
+        f"CREATE TABLE IF NOT EXISTS {name} PARTITION OF {PARENT_TABLE} "
+        f"FOR VALUES FROM ('{start.isoformat()}') TO ('{end.isoformat()}')"
+    )
+
+
+def _attached_partitions(connection) -> list[str]:
+    rows = connection.execute(
+        text(
+            "SELECT child.relname FROM pg_inherits "
+            "JOIN pg_class parent ON parent.oid = pg_inherits.inhparent "
+            "JOIN pg_class child ON child.oid = pg_inherits.inhrelid "
+            "WHERE parent.relname = :parent"
+        ),
+        {"parent": PARENT_TABLE},
+    )
+    return [row[0] for row in rows]
+
+
+def create_partition(connection, name: str, start: datetime, end: datetime) -> int:
+    """Create and attach one partition, moving its rows out of the default partition.
+
+    PostgreSQL refuses to add a range partition while the default partition
+    holds rows in that range (e.g. from an edge box with a clock in the
+    future), so the new table is built detached, those rows are moved into
+    it, and it is attached afterwards. Returns the number of rows moved.
+    """
+    bounds = {"start": start, "end": end}
+    connection.execute(text(f"CREATE TABLE {name} (LIKE {PARENT_TABLE} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)"))
+    moved = connection.execute(
+        text(
+            f"WITH moved AS (DELETE FROM {DEFAULT_PARTITION} "
+            "WHERE timestamp >= :start AND timestamp < :end RETURNING *) "
+            f"INSERT INTO {name} SELECT * FROM moved"
+        ),
+        bounds,
+    ).rowcount
+    connection.execute(
+        text(
+            f"ALTER TABLE {PARENT_TABLE} ATTACH PARTITION {name} "
+            f"FOR VALUES FROM ('{start.isoformat()}') TO ('{end.isoformat()}')"
+        )
+    )
+    return moved
+
+
+def missing_partitions(connection, now: datetime | None = None, ahead: int = PARTITIONS_AHEAD):
+    existing = set(_attached_partitions(connection))
+    return [planned for planned in planned_partitions(now or datetime.utcnow(), ahead) if planned[0] not in existing]
+
+
+def drop_partition(connection, name: str) -> None:
+    connection.execute(text(f"ALTER TABLE {PARENT_TABLE} DETACH PARTITION {name}"))
+    connection.execute(text(f"DROP TABLE {name}"))
+
+
+def run_maintenance(engine, now: datetime | None = None) -> None:
+    """Create upcoming partitions and enforce retention.
+
+    Every partition is created or dropped in its own transaction so one
+    failure does not roll back the rest of the pass.
+    """
+    if engine.dialect.name != "postgresql":
+        return
+    now = now or datetime.utcnow()
+    with engine.connect() as connection:
+        missing = missing_partitions(connection, now)
+        attached = _attached_partitions(connection)
+    for name, start, end in missing:
+        try:
+            with engine.begin() as connection:
+                moved = create_partition(connection, name, start, end)
+            logger.info("Created partition %s (moved %d rows from %s)", name, moved, DEFAULT_PARTITION)
+        except Exception as exc:  # noqa: BLE001
+            logger.error("Could not create partition %s: %s", name, exc)
+    if not RETENTION_DAYS:
+        return
+    for name in expired_partitions(attached, RETENTION_DAYS, now):
+        try:
+            with engine.begin() as connection:
+                drop_partition(connection, name)
+            logger.info("Dropped expired partition %s", name)
+        except Exception as exc:  # noqa: BLE001
+            logger.error("Could not drop partition %s: %s", name, exc)
+    with engine.begin() as connection:
+        # Stray rows in the default partition are few; expire them row by row.
+        connection.execute(
+            text(f"DELETE FROM {DEFAULT_PARTITION} WHERE timestamp < :cutoff"),
+            {"cutoff": now - timedelta(days=RETENTION_DAYS)},
+        )
+
+
+if __name__ == "__main__":
+    from .database import get_engine
+
+    logging.basicConfig(level=logging.INFO)
+    run_maintenance(get_engine())
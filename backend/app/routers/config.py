@@ -1,258 +1,381 @@
-from fastapi import APIRouter, Depends, HTTPException, Query, status
-from sqlmodel import Session, select
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from pydantic import TypeAdapter
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
 
 from .. import models, schemas
-from ..deps import get_session
+from ..config_cache import cache, cached_response, touch
+from ..deps import get_async_session
+from ..pagination import after_id, page
 
 router = APIRouter(prefix="/config", tags=["config"])
 
+_SNAPSHOT_SOURCES = {
+    "cameras": (models.Camera, schemas.CameraRead),
+    "zones": (models.Zone, schemas.ZoneRead),
+    "models": (models.ModelConfig, schemas.ModelConfigRead),
+    "sensors": (models.Sensor, schemas.SensorRead),
+    "exporters": (models.Exporter, schemas.ExporterRead),
+}
+_LIST_ADAPTERS = {schema: TypeAdapter(list[schema]) for _, schema in _SNAPSHOT_SOURCES.values()}
 
-def _paginate(query, session: Session, offset: int, limit: int):
-    return session.exec(query.offset(offset).limit(limit)).all()
 
+async def _paginate(
+    query, model, session: AsyncSession, response: Response, offset: int, limit: int, cursor: str | None
+):
+    """Page by ``id``: pass ``cursor`` (from ``X-Next-Cursor``) for keyset paging,
+    or ``offset`` for the legacy behaviour."""
+    query = after_id(query, model, cursor)
+    rows = (await session.exec(query.offset(offset).limit(limit + 1))).all()
+    return page(rows, limit, response, lambda row: {"id": row.id})
+
+
+async def _cached_list(
+    request: Request,
+    entity: str,
+    schema,
+    query,
+    model,
+    session: AsyncSession,
+    offset: int,
+    limit: int,
+    cursor,
+    enabled: bool | None = None,
+) -> Response:
+    """Serve a list from the config cache, loading the page from the database on a miss.
+
+    The page is cached under its validated parameters, so unknown or
+    reordered query parameters share the entry.
+    """
+
+    async def load(response: Response) -> bytes:
+        rows = await _paginate(query, model, session, response, offset, limit, cursor)
+        return _LIST_ADAPTERS[schema].dump_json([schema.model_validate(row) for row in rows])
+
+    return await cached_response(request, entity, (enabled, offset, limit, cursor), load)
 
-def _create_entity(session: Session, model, payload):
-    entity = model(**payload.dict())
+
+async def _create_entity(session: AsyncSession, entity_name: str, model, payload):
+    entity = model(**payload.model_dump())
     session.add(entity)
-    session.commit()
-    session.refresh(entity)
+    await touch(session, entity_name)
+    await session.commit()
+    await session.refresh(entity)
     return entity
 
 
+@router.get("/snapshot")
+async def config_snapshot(
+    since_version: int = Query(0, ge=0), session: AsyncSession = Depends(get_async_session)
+) -> Response:
+    """Full lists of every entity changed after ``since_version``.
+
+    The response is ``{"version": V, "changed": {"cameras": [...], ...}}``;
+    pass ``V`` back as ``since_version`` next time. Entities that did not
+    change are omitted, and an entity that changed is returned whole, so
+    deletions show up as missing rows.
+    """
+    version = cache.version
+    parts = []
+    for entity, (model, schema) in _SNAPSHOT_SOURCES.items():
+        if cache.versions[entity] <= since_version:
+            continue
+
+        async def load(response: Response, model=model, schema=schema) -> bytes:
+            rows = (await session.exec(select(model).order_by(model.id))).all()
+            return _LIST_ADAPTERS[schema].dump_json([schema.model_validate(row) for row in rows])
+
+        entry = await cache.read_through(entity, "snapshot", load)
+        parts.append(b'"%s":%s' % (entity.encode(), entry.body))
+    body = b'{"version":%d,"changed":{%s}}' % (version, b",".join(parts))
+    return Response(content=body, media_type="application/json")
+
+
 # Cameras
 @router.post("/cameras", response_model=schemas.CameraRead, status_code=status.HTTP_201_CREATED)
-def create_camera(payload: schemas.CameraCreate, session: Session = Depends(get_session)):
-    return _create_entity(session, models.Camera, payload)
+async def create_camera(payload: schemas.CameraCreate, session: AsyncSession = Depends(get_async_session)):
+    return await _create_entity(session, "cameras", models.Camera, payload)
 
 
 @router.get("/cameras", response_model=list[schemas.CameraRead])
-def list_cameras(
+async def list_cameras(
     *,
-    session: Session = Depends(get_session),
+    session: AsyncSession = Depends(get_async_session),
+    request: Request,
     enabled: bool | None = None,
     offset: int = Query(0, ge=0),
     limit: int = Query(50, ge=1, le=200),
+    cursor: str | None = None,
 ):
     query = select(models.Camera)
     if enabled is not None:
         query = query.where(models.Camera.enabled == enabled)
-    return _paginate(query, session, offset, limit)
+    return await _cached_list(
+        request, "cameras", schemas.CameraRead, query, models.Camera, session, offset, limit, cursor, enabled
+    )
 
 
 @router.get("/cameras/{camera_id}", response_model=schemas.CameraRead)
-def get_camera(camera_id: int, session: Session = Depends(get_session)):
-    camera = session.get(models.Camera, camera_id)
+async def get_camera(camera_id: int, session: AsyncSession = Depends(get_async_session)):
+    camera = await session.get(models.Camera, camera_id)
     if not camera:
         raise HTTPException(status_code=404, detail="Camera not found")
     return camera
 
 
 @router.put("/cameras/{camera_id}", response_model=schemas.CameraRead)
-def update_camera(
-    camera_id: int, payload: schemas.CameraCreate, session: Session = Depends(get_session)
+async def update_camera(
+    camera_id: int, payload: schemas.CameraCreate, session: AsyncSession = Depends(get_async_session)
 ):
-    camera = session.get(models.Camera, camera_id)
+    camera = await session.get(models.Camera, camera_id)
     if not camera:
         raise HTTPException(status_code=404, detail="Camera not found")
-    for key, value in payload.dict().items():
+    for key, value in payload.model_dump().items():
         setattr(camera, key, value)
     session.add(camera)
-    session.commit()
-    session.refresh(camera)
+    await touch(session, "cameras")
+    await session.commit()
+    await session.refresh(camera)
     return camera
 
 
 @router.delete("/cameras/{camera_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_camera(camera_id: int, session: Session = Depends(get_session)):
-    camera = session.get(models.Camera, camera_id)
+async def delete_camera(camera_id: int, session: AsyncSession = Depends(get_async_session)):
+    camera = await session.get(models.Camera, camera_id)
     if not camera:
         raise HTTPException(status_code=404, detail="Camera not found")
-    session.delete(camera)
-    session.commit()
+    await session.delete(camera)
+    await touch(session, "cameras")
+    await session.commit()
 
 
 # Zones
 @router.post("/zones", response_model=schemas.ZoneRead, status_code=status.HTTP_201_CREATED)
-def create_zone(payload: schemas.ZoneCreate, session: Session = Depends(get_session)):
-    return _create_entity(session, models.Zone, payload)
+async def create_zone(payload: schemas.ZoneCreate, session: AsyncSession = Depends(get_async_session)):
+    return await _create_entity(session, "zones", models.Zone, payload)
 
 
 @router.get("/zones", response_model=list[schemas.ZoneRead])
-def list_zones(
-    *, session: Session = Depends(get_session), offset: int = Query(0, ge=0), limit: int = Query(100, ge=1, le=500)
+async def list_zones(
+    *,
+    session: AsyncSession = Depends(get_async_session),
+    request: Request,
+    offset: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=500),
+    cursor: str | None = None,
 ):
-    return _paginate(select(models.Zone), session, offset, limit)
+    return await _cached_list(
+        request, "zones", schemas.ZoneRead, select(models.Zone), models.Zone, session, offset, limit, cursor
+    )
 
 
 @router.get("/zones/{zone_id}", response_model=schemas.ZoneRead)
-def get_zone(zone_id: int, session: Session = Depends(get_session)):
-    zone = session.get(models.Zone, zone_id)
+async def get_zone(zone_id: int, session: AsyncSession = Depends(get_async_session)):
+    zone = await session.get(models.Zone, zone_id)
     if not zone:
         raise HTTPException(status_code=404, detail="Zone not found")
     return zone
 
 
 @router.put("/zones/{zone_id}", response_model=schemas.ZoneRead)
-def update_zone(
-    zone_id: int, payload: schemas.ZoneUpdate, session: Session = Depends(get_session)
+async def update_zone(
+    zone_id: int, payload: schemas.ZoneUpdate, session: AsyncSession = Depends(get_async_session)
 ):
-    zone = session.get(models.Zone, zone_id)
+    zone = await session.get(models.Zone, zone_id)
     if not zone:
         raise HTTPException(status_code=404, detail="Zone not found")
 
-    update_data = payload.dict(exclude_unset=True)
+    update_data = payload.model_dump(exclude_unset=True)
     for key, value in update_data.items():
         setattr(zone, key, value)
 
     session.add(zone)
-    session.commit()
-    session.refresh(zone)
+    await touch(session, "zones")
+    await session.commit()
+    await session.refresh(zone)
     return zone
 
 
 @router.delete("/zones/{zone_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_zone(zone_id: int, session: Session = Depends(get_session)):
-    zone = session.get(models.Zone, zone_id)
+async def delete_zone(zone_id: int, session: AsyncSession = Depends(get_async_session)):
+    zone = await session.get(models.Zone, zone_id)
     if not zone:
         raise HTTPException(status_code=404, detail="Zone not found")
 
-    session.delete(zone)
-    session.commit()
+    await session.delete(zone)
+    await touch(session, "zones")
+    await session.commit()
 
 
 # Models
 @router.post("/models", response_model=schemas.ModelConfigRead, status_code=status.HTTP_201_CREATED)
-def create_model(payload: schemas.ModelConfigCreate, session: Session = Depends(get_session)):
-    return _create_entity(session, models.ModelConfig, payload)
+async def create_model(payload: schemas.ModelConfigCreate, session: AsyncSession = Depends(get_async_session)):
+    return await _create_entity(session, "models", models.ModelConfig, payload)
 
 
 @router.get("/models", response_model=list[schemas.ModelConfigRead])
-def list_models(
-    *, session: Session = Depends(get_session), offset: int = Query(0, ge=0), limit: int = Query(100, ge=1, le=500)
+async def list_models(
+    *,
+    session: AsyncSession = Depends(get_async_session),
+    request: Request,
+    offset: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=500),
+    cursor: str | None = None,
 ):
-    return _paginate(select(models.ModelConfig), session, offset, limit)
+    return await _cached_list(
+        request,
+        "models",
+        schemas.ModelConfigRead,
+        select(models.ModelConfig),
+        models.ModelConfig,
+        session,
+        offset,
+        limit,
+        cursor,
+    )
 
 
 @router.get("/models/{model_id}", response_model=schemas.ModelConfigRead)
-def get_model(model_id: int, session: Session = Depends(get_session)):
-    model = session.get(models.ModelConfig, model_id)
+async def get_model(model_id: int, session: AsyncSession = Depends(get_async_session)):
+    model = await session.get(models.ModelConfig, model_id)
     if not model:
         raise HTTPException(status_code=404, detail="Model config not found")
     return model
 
 
 @router.put("/models/{model_id}", response_model=schemas.ModelConfigRead)
-def update_model(
-    model_id: int, payload: schemas.ModelConfigCreate, session: Session = Depends(get_session)
+async def update_model(
+    model_id: int, payload: schemas.ModelConfigCreate, session: AsyncSession = Depends(get_async_session)
 ):
-    model = session.get(models.ModelConfig, model_id)
+    model = await session.get(models.ModelConfig, model_id)
     if not model:
         raise HTTPException(status_code=404, detail="Model config not found")
-    for key, value in payload.dict().items():
+    for key, value in payload.model_dump().items():
         setattr(model, key, value)
     session.add(model)
-    session.commit()
-    session.refresh(model)
+    await touch(session, "models")
+    await session.commit()
+    await session.refresh(model)
     return model
 
 
 @router.delete("/models/{model_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_model(model_id: int, session: Session = Depends(get_session)):
-    model = session.get(models.ModelConfig, model_id)
+async def delete_model(model_id: int, session: AsyncSession = Depends(get_async_session)):
+    model = await session.get(models.ModelConfig, model_id)
     if not model:
         raise HTTPException(status_code=404, detail="Model config not found")
-    session.delete(model)
-    session.commit()
+    await session.delete(model)
+    await touch(session, "models")
+    await session.commit()
 
 
 # Sensors
 @router.post("/sensors", response_model=schemas.SensorRead, status_code=status.HTTP_201_CREATED)
-def create_sensor(payload: schemas.SensorCreate, session: Session = Depends(get_session)):
-    return _create_entity(session, models.Sensor, payload)
+async def create_sensor(payload: schemas.SensorCreate, session: AsyncSession = Depends(get_async_session)):
+    return await _create_entity(session, "sensors", models.Sensor, payload)
 
 
 @router.get("/sensors", response_model=list[schemas.SensorRead])
-def list_sensors(
-    *, session: Session = Depends(get_session), offset: int = Query(0, ge=0), limit: int = Query(100, ge=1, le=500)
+async def list_sensors(
+    *,
+    session: AsyncSession = Depends(get_async_session),
+    request: Request,
+    offset: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=500),
+    cursor: str | None = None,
 ):
-    return _paginate(select(models.Sensor), session, offset, limit)
+    return await _cached_list(
+        request, "sensors", schemas.SensorRead, select(models.Sensor), models.Sensor, session, offset, limit, cursor
+    )
 
 
 @router.get("/sensors/{sensor_id}", response_model=schemas.SensorRead)
-def get_sensor(sensor_id: int, session: Session = Depends(get_session)):
-    sensor = session.get(models.Sensor, sensor_id)
+async def get_sensor(sensor_id: int, session: AsyncSession = Depends(get_async_session)):
+    sensor = await session.get(models.Sensor, sensor_id)
     if not sensor:
         raise HTTPException(status_code=404, detail="Sensor not found")
     return sensor
 
 
 @router.put("/sensors/{sensor_id}", response_model=schemas.SensorRead)
-def update_sensor(
-    sensor_id: int, payload: schemas.SensorCreate, session: Session = Depends(get_session)
+async def update_sensor(
+    sensor_id: int, payload: schemas.SensorCreate, session: AsyncSession = Depends(get_async_session)
 ):
-    sensor = session.get(models.Sensor, sensor_id)
+    sensor = await session.get(models.Sensor, sensor_id)
     if not sensor:
         raise HTTPException(status_code=404, detail="Sensor not found")
-    for key, value in payload.dict().items():
+    for key, value in payload.model_dump().items():
         setattr(sensor, key, value)
     session.add(sensor)
-    session.commit()
-    session.refresh(sensor)
+    await touch(session, "sensors")
+    await session.commit()
+    await session.refresh(sensor)
     return sensor
 
 
 @router.delete("/sensors/{sensor_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_sensor(sensor_id: int, session: Session = Depends(get_session)):
-    sensor = session.get(models.Sensor, sensor_id)
+async def delete_sensor(sensor_id: int, session: AsyncSession = Depends(get_async_session)):
+    sensor = await session.get(models.Sensor, sensor_id)
     if not sensor:
         raise HTTPException(status_code=404, detail="Sensor not found")
-    session.delete(sensor)
-    session.commit()
+    await session.delete(sensor)
+    await touch(session, "sensors")
+    await session.commit()
 
 
 # Exporters
 @router.post("/exporters", response_model=schemas.ExporterRead, status_code=status.HTTP_201_CREATED)
-def create_exporter(payload: schemas.ExporterCreate, session: Session = Depends(get_session)):
-    return _create_entity(session, models.Exporter, payload)
+async def create_exporter(payload: schemas.ExporterCreate, session: AsyncSession = Depends(get_async_session)):
+    return await _create_entity(session, "exporters", models.Exporter, payload)
 
 
 @router.get("/exporters", response_model=list[schemas.ExporterRead])
-def list_exporters(
-    *, session: Session = Depends(get_session), enabled: bool | None = None, offset: int = Query(0, ge=0), limit: int = Query(100, ge=1, le=500)
+async def list_exporters(
+    *,
+    session: AsyncSession = Depends(get_async_session),
+    request: Request,
+    enabled: bool | None = None,
+    offset: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=500),
+    cursor: str | None = None,
 ):
     query = select(models.Exporter)
     if enabled is not None:
         query = query.where(models.Exporter.enabled == enabled)
-    return _paginate(query, session, offset, limit)
+    return await _cached_list(
+        request, "exporters", schemas.ExporterRead, query, models.Exporter, session, offset, limit, cursor, enabled
+    )
 
 
 @router.get("/exporters/{exporter_id}", response_model=schemas.ExporterRead)
-def get_exporter(exporter_id: int, session: Session = Depends(get_session)):
-    exporter = session.get(models.Exporter, exporter_id)
+async def get_exporter(exporter_id: int, session: AsyncSession = Depends(get_async_session)):
+    exporter = await session.get(models.Exporter, exporter_id)
     if not exporter:
         raise HTTPException(status_code=404, detail="Exporter not found")
     return exporter
 
 
 @router.put("/exporters/{exporter_id}", response_model=schemas.ExporterRead)
-def update_exporter(
-    exporter_id: int, payload: schemas.ExporterCreate, session: Session = Depends(get_session)
+async def update_exporter(
+    exporter_id: int, payload: schemas.ExporterCreate, session: AsyncSession = Depends(get_async_session)
 ):
-    exporter = session.get(models.Exporter, exporter_id)
+    exporter = await session.get(models.Exporter, exporter_id)
     if not exporter:
         raise HTTPException(status_code=404, detail="Exporter not found")
-    for key, value in payload.dict().items():
+    for key, value in payload.model_dump().items():
         setattr(exporter, key, value)
     session.add(exporter)
-    session.commit()
-    session.refresh(exporter)
+    await touch(session, "exporters")
+    await session.commit()
+    await session.refresh(exporter)
     return exporter
 
 
 @router.delete("/exporters/{exporter_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_exporter(exporter_id: int, session: Session = Depends(get_session)):
-    exporter = session.get(models.Exporter, exporter_id)
+async def delete_exporter(exporter_id: int, session: AsyncSession = Depends(get_async_session)):
+    exporter = await session.get(models.Exporter, exporter_id)
     if not exporter:
         raise HTTPException(status_code=404, detail="Exporter not found")
-    session.delete(exporter)
-    session.commit()
+    await session.delete(exporter)
+    await touch(session, "exporters")
+    await session.commit()
@@ -1,42 +1,172 @@
 from __future__ import annotations
 
+import asyncio
+import contextlib
+import json
+import zlib
 from datetime import datetime
-from fastapi import APIRouter, Depends, HTTPException, Query, WebSocket
-from sqlmodel import Session, select
+from typing import Any, Literal
 
-from .. import models, schemas
-from ..deps import get_session
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, WebSocket, WebSocketDisconnect
+from pydantic import ValidationError
+from sqlalchemy import insert
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from .. import fanout, models, schemas
+from ..broadcast import Subscription, hub
+from ..deps import get_async_session
+from ..pagination import before_timestamp_id, page
+from ..search import fuzzy_candidates, normalize_plate, rank_fuzzy
+from ..zones import assign_zones
 
 router = APIRouter(prefix="/events", tags=["events"])
 
+MAX_BULK_ITEMS = 10_000
+MAX_BULK_BYTES = 64 * 1024 * 1024
+NDJSON_CONTENT_TYPES = ("application/x-ndjson", "application/jsonl", "application/json-seq")
+
 
 @router.post("/ingest", response_model=schemas.PlateEventRead)
-def ingest_event(payload: schemas.PlateEventCreate, session: Session = Depends(get_session)):
+async def ingest_event(payload: schemas.PlateEventCreate, session: AsyncSession = Depends(get_async_session)):
     if not payload.plate_text.strip():
         raise HTTPException(status_code=400, detail="plate_text is required")
 
-    event = models.PlateEvent(**payload.dict())
+    row = payload.model_dump()
+    await assign_zones(session, [row])
+    event = models.PlateEvent(**row, plate_key=normalize_plate(payload.plate_text))
     session.add(event)
-    session.commit()
-    session.refresh(event)
+    await session.flush()
+    await fanout.publish(session, [schemas.PlateEventRead.model_validate(event)])
+    await session.commit()
     return event
 
 
+class _UnparsableLine:
+    def __init__(self, error: str) -> None:
+        self.error = error
+
+
+def _parse_ndjson_line(line: bytes) -> Any:
+    try:
+        return json.loads(line)
+    except ValueError as exc:
+        return _UnparsableLine(f"invalid JSON: {exc}")
+
+
+def _parse_bulk_body(body: bytes, content_type: str) -> list[Any]:
+    """Items of a JSON array or NDJSON body; unparsable NDJSON lines become ``_UnparsableLine``."""
+    if content_type.split(";")[0].strip() in NDJSON_CONTENT_TYPES:
+        return [_parse_ndjson_line(line) for line in body.splitlines() if line.strip()]
+    items = json.loads(body)
+    if not isinstance(items, list):
+        raise ValueError("expected a JSON array of events")
+    return items
+
+
+def _gunzip(body: bytes, limit: int) -> bytes:
+    """Decompress a gzip body, refusing to inflate past ``limit`` bytes."""
+    decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+    try:
+        data = decompressor.decompress(body, limit + 1)
+    except zlib.error as exc:
+        raise HTTPException(status_code=400, detail=f"Invalid gzip body: {exc}") from exc
+    if len(data) > limit:
+        raise HTTPException(status_code=413, detail=f"Decompressed body exceeds {limit} bytes")
+    if not decompressor.eof:
+        raise HTTPException(status_code=400, detail="Invalid gzip body: truncated stream")
+    return data
+
+
+async def _insert_events(session: AsyncSession, rows: list[dict]) -> list[int]:
+    """Insert all rows with one multi-row INSERT ... RETURNING in one transaction."""
+    if not rows:
+        return []
+    table = models.PlateEvent.__table__
+    statement = insert(table).returning(table.c.id, sort_by_parameter_order=True)
+    ids = list((await session.execute(statement, rows)).scalars())
+    await fanout.publish(session, [schemas.PlateEventRead(id=event_id, **row) for event_id, row in zip(ids, rows)])
+    await session.commit()
+    return ids
+
+
+@router.post("/ingest/bulk", response_model=schemas.BulkIngestResponse)
+async def ingest_events_bulk(request: Request, session: AsyncSession = Depends(get_async_session)):
+    """Ingest a JSON array or NDJSON stream of events (optionally gzip-encoded).
+
+    Every item is validated up front; valid items are inserted together and
+    invalid ones are reported per index without failing the whole request.
+    """
+    body = await request.body()
+    if request.headers.get("content-encoding", "").lower() == "gzip":
+        body = _gunzip(body, MAX_BULK_BYTES)
+    elif len(body) > MAX_BULK_BYTES:
+        raise HTTPException(status_code=413, detail=f"Body exceeds {MAX_BULK_BYTES} bytes")
+    try:
+        raw_items = _parse_bulk_body(body, request.headers.get("content-type", "application/json"))
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=f"Invalid bulk body: {exc}") from exc
+    if len(raw_items) > MAX_BULK_ITEMS:
+        raise HTTPException(status_code=413, detail=f"At most {MAX_BULK_ITEMS} events per request")
+
+    items: list[schemas.BulkIngestItem] = []
+    rows: list[dict] = []
+    for index, raw in enumerate(raw_items):
+        if isinstance(raw, _UnparsableLine):
+            items.append(schemas.BulkIngestItem(index=index, status="error", error=raw.error))
+            continue
+        try:
+            payload = schemas.PlateEventCreate.model_validate(raw)
+        except ValidationError as exc:
+            items.append(schemas.BulkIngestItem(index=index, status="error", error=str(exc)))
+            continue
+        if not payload.plate_text.strip():
+            items.append(schemas.BulkIngestItem(index=index, status="error", error="plate_text is required"))
+            continue
+        items.append(schemas.BulkIngestItem(index=index, status="created"))
+        rows.append({**payload.model_dump(), "plate_key": normalize_plate(payload.plate_text)})
+
+    await assign_zones(session, rows)
+    ids = await _insert_events(session, rows)
+    created = iter(ids)
+    for item in items:
+        if item.status == "created":
+            item.id = next(created)
+    return schemas.BulkIngestResponse(created=len(ids), failed=len(items) - len(ids), items=items)
+
+
 @router.get("/search", response_model=list[schemas.PlateEventRead])
-def search_events(
+async def search_events(
     *,
-    session: Session = Depends(get_session),
+    session: AsyncSession = Depends(get_async_session),
+    response: Response,
     plate: str | None = None,
+    match: Literal["substring", "prefix", "fuzzy"] = "substring",
+    max_distance: int = Query(1, ge=0, le=3),
     camera_id: int | None = None,
     zone_id: int | None = None,
     from_ts: datetime | None = None,
     to_ts: datetime | None = None,
     limit: int = Query(50, ge=1, le=500),
     offset: int = Query(0, ge=0),
+    cursor: str | None = None,
 ):
-    query = select(models.PlateEvent).order_by(models.PlateEvent.timestamp.desc())
-    if plate:
-        query = query.where(models.PlateEvent.plate_text.ilike(f"%{plate}%"))
+    """Search events, newest first.
+
+    ``match=substring`` (default) is served by the trigram index on
+    ``plate_text``, ``prefix`` by the btree on the normalized ``plate_key``,
+    and ``fuzzy`` returns plates within ``max_distance`` edits of ``plate``
+    after folding OCR-confusable characters (0/O, 8/B, 1/I, ...), best match
+    first.
+
+    Results are ordered by ``(timestamp, id)`` descending. When more rows
+    exist the ``X-Next-Cursor`` response header holds an opaque token; pass
+    it back as ``cursor`` for stable keyset paging while events keep
+    arriving. ``offset`` still works but gets slower on deep pages.
+    """
+    if cursor and plate and match == "fuzzy":
+        raise HTTPException(status_code=400, detail="cursor is not supported with match=fuzzy")
+    query = select(models.PlateEvent)
     if camera_id:
         query = query.where(models.PlateEvent.camera_id == camera_id)
     if zone_id:
@@ -46,10 +176,64 @@ def search_events(
     if to_ts:
         query = query.where(models.PlateEvent.timestamp <= to_ts)
 
-    return session.exec(query.offset(offset).limit(limit)).all()
+    if plate and match == "fuzzy":
+        query = query.order_by(models.PlateEvent.timestamp.desc())
+        candidates = await fuzzy_candidates(session, query, plate, max_distance, offset + limit)
+        return rank_fuzzy(candidates, plate, max_distance)[offset : offset + limit]
+    if plate and match == "prefix":
+        query = query.where(models.PlateEvent.plate_key.startswith(normalize_plate(plate)))
+    elif plate:
+        query = query.where(models.PlateEvent.plate_text.ilike(f"%{plate}%"))
+
+    query = before_timestamp_id(query, models.PlateEvent, cursor)
+    rows = (await session.exec(query.offset(offset).limit(limit + 1))).all()
+    return page(rows, limit, response, lambda row: {"ts": row.timestamp.isoformat(), "id": row.id})
+
+
+async def _receive_filters(websocket: WebSocket, subscription: Subscription) -> None:
+    """Apply ``{"camera_id": [...], "zone_id": [...]}`` messages until the client leaves."""
+    try:
+        while True:
+            try:
+                message = json.loads(await websocket.receive_text())
+                camera_ids = frozenset(int(value) for value in message.get("camera_id") or ())
+                zone_ids = frozenset(int(value) for value in message.get("zone_id") or ())
+            except (ValueError, TypeError, AttributeError):
+                continue
+            subscription.camera_ids, subscription.zone_ids = camera_ids, zone_ids
+    except WebSocketDisconnect:
+        pass
+    finally:
+        hub.unsubscribe(subscription)
+        subscription.close()
 
 
 @router.websocket("/stream")
-async def stream_events(websocket: WebSocket):
+async def stream_events(
+    websocket: WebSocket,
+    camera_id: list[int] = Query(default=[]),
+    zone_id: list[int] = Query(default=[]),
+):
+    """Push newly ingested events as JSON text frames.
+
+    Filters are given at subscribe time as repeated ``camera_id``/``zone_id``
+    query parameters and can be replaced later by sending a JSON message with
+    the same keys. A client that falls more than the buffer size behind is
+    disconnected with close code 1013 and should reconnect and backfill via
+    ``/events/search``.
+    """
     await websocket.accept()
-    await websocket.send_json({"message": "event streaming coming soon"})
+    subscription = hub.subscribe(camera_id, zone_id)
+    receiver = asyncio.create_task(_receive_filters(websocket, subscription))
+    try:
+        while (message := await subscription.next()) is not None:
+            await websocket.send_text(message)
+        if subscription.lagged:
+            await websocket.close(code=1013, reason="subscriber too slow")
+    except (WebSocketDisconnect, RuntimeError):
+        pass
+    finally:
+        hub.unsubscribe(subscription)
+        receiver.cancel()
+        with contextlib.suppress(asyncio.CancelledError, WebSocketDisconnect, RuntimeError):
+            await receiver
@@ -1,8 +1,16 @@
 from fastapi import APIRouter
 
+from ..config_cache import cache
+from ..database import pool_stats
+
 router = APIRouter()
 
 
 @router.get("/healthz")
 async def healthcheck() -> dict:
-    return {"status": "ok"}
+    health = {"status": "ok"}
+    pool = pool_stats()
+    if pool is not None:
+        health["db_pool"] = pool
+        health["config_cache"] = {"version": cache.version, "hits": cache.hits, "misses": cache.misses}
+    return health
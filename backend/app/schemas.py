@@ -1,7 +1,7 @@
 from __future__ import annotations
 
 from datetime import datetime
-from typing import Optional
+from typing import Literal, Optional
 
 from pydantic import BaseModel, Field
 
@@ -120,3 +120,16 @@ class PlateEventCreate(PlateEventBase):
 
 class PlateEventRead(PlateEventBase, ORMBase):
     id: int
+
+
+class BulkIngestItem(BaseModel):
+    index: int
+    status: Literal["created", "error"]
+    id: Optional[int] = None
+    error: Optional[str] = None
+
+
+class BulkIngestResponse(BaseModel):
+    created: int
+    failed: int
+    items: list[BulkIngestItem]
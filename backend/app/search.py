@@ -0,0 +1,112 @@
+"""Plate search helpers: OCR-confusion-aware normalization and fuzzy ranking."""
+from __future__ import annotations
+
+import re
+from typing import Sequence
+
+from sqlalchemy import func, text
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from . import models
+
+# Characters OCR engines commonly confuse are folded onto one canonical symbol
+# so "B0I8" and "8O18" share a key. Kept in sync with migration 0003.
+CONFUSABLE_FROM = "OQDILZSGB"
+CONFUSABLE_TO = "000112568"
+_CONFUSABLE = str.maketrans(CONFUSABLE_FROM, CONFUSABLE_TO)
+_NON_ALNUM = re.compile(r"[^0-9A-Z]")
+
+FUZZY_CANDIDATES_PER_RESULT = 20
+FUZZY_SCAN_LIMIT = 10_000
+
+
+def normalize_plate(text: str) -> str:
+    """Uppercase, strip separators and fold OCR-confusable characters."""
+    return _NON_ALNUM.sub("", text.upper()).translate(_CONFUSABLE)
+
+
+def edit_distance(a: str, b: str, limit: int | None = None) -> int:
+    """Levenshtein distance, returning ``limit + 1`` early once it is exceeded."""
+    if abs(len(a) - len(b)) > (limit if limit is not None else len(a) + len(b)):
+        return (limit or 0) + 1
+    previous = list(range(len(b) + 1))
+    for i, char_a in enumerate(a, start=1):
+        current = [i]
+        for j, char_b in enumerate(b, start=1):
+            current.append(
+                min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (char_a != char_b))
+            )
+        if limit is not None and min(current) > limit:
+            return limit + 1
+        previous = current
+    return previous[-1]
+
+
+def rank_fuzzy(
+    events: Sequence[models.PlateEvent], plate: str, max_distance: int
+) -> list[models.PlateEvent]:
+    """Keep events within ``max_distance`` edits of ``plate`` on the confusion-folded
+    key, best first; ties prefer the closer raw text, then the newer event."""
+    key = normalize_plate(plate)
+    raw = plate.upper()
+    scored = []
+    for event in events:
+        distance = edit_distance(key, event.plate_key or normalize_plate(event.plate_text), max_distance)
+        if distance <= max_distance:
+            scored.append((distance, edit_distance(raw, event.plate_text.upper()), event))
+    scored.sort(key=lambda item: (item[0], item[1], -item[2].timestamp.timestamp()))
+    return [event for _, _, event in scored]
+
+
+def _trigrams(key: str) -> set[str]:
+    padded = f"  {key.lower()} "
+    return {padded[i : i + 3] for i in range(len(padded) - 2)}
+
+
+def trigram_threshold(key: str, max_distance: int) -> float:
+    """Lowest ``pg_trgm`` similarity a key within ``max_distance`` edits of ``key`` can have.
+
+    ``pg_trgm`` pads a word into at most ``n + 1`` trigrams and one edit
+    changes at most three of them, so at least ``|T(key)| - 3d`` are shared
+    while the other key has at most ``n + 1 + d``. Returns 0 when no trigram
+    is guaranteed to survive and the index cannot prune at all.
+    """
+    own = len(_trigrams(key))
+    shared = own - 3 * max_distance
+    if shared <= 0:
+        return 0.0
+    return shared / (own + len(key) + 1 + max_distance - shared)
+
+
+async def fuzzy_candidates(session: AsyncSession, query, plate: str, max_distance: int, wanted: int):
+    """Narrow ``query`` to likely fuzzy matches before ranking them in Python.
+
+    On PostgreSQL this uses the ``pg_trgm`` GIN index on ``plate_key``
+    (``%`` operator) with the similarity threshold lowered, for this
+    transaction only, to the bound from ``trigram_threshold`` so no key
+    within ``max_distance`` edits is missed. When that bound is 0 (short
+    keys with many edits) and on other databases (SQLite in tests) there is
+    no usable index: the query falls back to a length window on the key and
+    scans only the newest ``FUZZY_SCAN_LIMIT`` rows, so older matches can be
+    missed there.
+    """
+    key = normalize_plate(plate)
+    column = models.PlateEvent.plate_key
+    bind = session.get_bind()
+    threshold = trigram_threshold(key, max_distance)
+    if bind.dialect.name == "postgresql" and threshold > 0:
+        await session.execute(
+            text("SELECT set_config('pg_trgm.similarity_threshold', :threshold, true)"),
+            {"threshold": f"{threshold:.4f}"},
+        )
+        query = (
+            query.where(column.op("%")(key))
+            .order_by(None)
+            .order_by(func.similarity(column, key).desc())
+            .limit(wanted * FUZZY_CANDIDATES_PER_RESULT)
+        )
+    else:
+        query = query.where(
+            func.length(column).between(len(key) - max_distance, len(key) + max_distance)
+        ).limit(FUZZY_SCAN_LIMIT)
+    return (await session.exec(query)).all()
@@ -0,0 +1,178 @@
+"""Assigning ingested events to zones by their plate position.
+
+Edge devices normally send ``zone_id`` (and ``direction``) themselves. For
+events that arrive without one but carry the plate box in
+``raw_payload.bbox``, the zone containing the box centre is looked up here.
+Zone polygons are compiled once into a per-camera grid index and rebuilt
+only for zones or cameras whose ``config_cache`` version moved.
+"""
+from __future__ import annotations
+
+import math
+from collections import defaultdict
+from dataclasses import dataclass
+
+import numpy as np
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from . import models
+from .config_cache import cache
+
+NO_ZONE = -1
+CELL_SIZE = 64.0
+
+# ``polygon_points`` and ``points_in_polygon`` mirror edge/zones.py: the
+# backend and edge images are built from separate directories and share no
+# package. Change both together; tests/test_zones.py checks they agree.
+
+
+def polygon_points(geometry: dict | None) -> np.ndarray | None:
+    """``(k, 2)`` polygon vertices, or None if there are fewer than three (see edge/zones.py)."""
+    if not geometry:
+        return None
+    raw = geometry.get("points")
+    if raw is None and geometry.get("coordinates"):
+        raw = geometry["coordinates"][0]
+    if not raw:
+        return None
+    if isinstance(raw[0], dict):
+        raw = [(point["x"], point["y"]) for point in raw]
+    points = np.asarray(raw, dtype=np.float64).reshape(-1, 2)
+    return points if len(points) >= 3 else None
+
+
+def points_in_polygon(points: np.ndarray, polygon: np.ndarray) -> np.ndarray:
+    """Even-odd inside test of ``(n, 2)`` points against one polygon (see edge/zones.py)."""
+    x = points[:, 0:1]
+    y = points[:, 1:2]
+    x1, y1 = polygon[:, 0], polygon[:, 1]
+    x2, y2 = np.roll(x1, -1), np.roll(y1, -1)
+    straddles = (y1 > y) != (y2 > y)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        crossing_x = x1 + (y - y1) * (x2 - x1) / (y2 - y1)
+    return np.count_nonzero(straddles & (x < crossing_x), axis=1) % 2 == 1
+
+
+@dataclass(frozen=True)
+class _Zone:
+    id: int
+    polygon: np.ndarray
+    area: float
+    cells: tuple[tuple[int, int], ...]
+
+
+def _compile(zone: models.Zone) -> _Zone | None:
+    polygon = polygon_points(zone.geometry)
+    if polygon is None:
+        return None
+    x, y = polygon[:, 0], polygon[:, 1]
+    area = abs(float(np.dot(x, np.roll(y, -1)) - np.dot(y, np.roll(x, -1)))) / 2
+    x1, y1 = math.floor(x.min() / CELL_SIZE), math.floor(y.min() / CELL_SIZE)
+    x2, y2 = math.floor(x.max() / CELL_SIZE), math.floor(y.max() / CELL_SIZE)
+    cells = tuple((cx, cy) for cx in range(x1, x2 + 1) for cy in range(y1, y2 + 1))
+    return _Zone(zone.id, polygon, area, cells)
+
+
+class _CameraIndex:
+    def __init__(self, zones: list[_Zone], default_zone: int | None) -> None:
+        self.default_zone = default_zone
+        # Larger zones first, so smaller (nested) zones overwrite them.
+        self.zones = sorted(zones, key=lambda zone: zone.area, reverse=True)
+        self.cells: dict[tuple[int, int], set[int]] = defaultdict(set)
+        for order, zone in enumerate(self.zones):
+            for cell in zone.cells:
+                self.cells[cell].add(order)
+
+    def locate(self, points: np.ndarray) -> np.ndarray:
+        result = np.full(len(points), NO_ZONE, dtype=np.int64)
+        candidates: dict[int, list[int]] = defaultdict(list)
+        for row, cell in enumerate(map(tuple, np.floor(points / CELL_SIZE).astype(np.int64))):
+            for order in self.cells.get(cell, ()):
+                candidates[order].append(row)
+        for order in sorted(candidates):
+            rows = np.asarray(candidates[order])
+            result[rows[points_in_polygon(points[rows], self.zones[order].polygon)]] = self.zones[order].id
+        return result
+
+
+class ZoneLocator:
+    """Per-camera zone indexes, reloaded when the zone or camera config changes.
+
+    A zone belongs to a camera when its geometry names the camera
+    (``camera_id``) or the camera's ``zone_id`` points at it; points outside
+    every polygon fall back to the camera's ``zone_id``.
+    """
+
+    def __init__(self) -> None:
+        self.indexes: dict[int, _CameraIndex] = {}
+        self._versions: tuple[int, int] | None = None
+        self._zones: dict[int, tuple[dict, _Zone | None]] = {}
+
+    def reset(self) -> None:
+        self.indexes.clear()
+        self._versions = None
+        self._zones.clear()
+
+    async def refresh(self, session: AsyncSession) -> None:
+        versions = (cache.versions["zones"], cache.versions["cameras"])
+        if versions == self._versions:
+            return
+        zones = (await session.exec(select(models.Zone))).all()
+        cameras = (await session.exec(select(models.Camera.id, models.Camera.zone_id))).all()
+        compiled = {}
+        for zone in zones:
+            known = self._zones.get(zone.id)
+            # Only zones whose geometry changed are compiled again.
+            compiled[zone.id] = known if known and known[0] == zone.geometry else (zone.geometry, _compile(zone))
+        self._zones = compiled
+        self.indexes = {
+            camera_id: _CameraIndex(
+                [
+                    entry[1]
+                    for zone_id, entry in compiled.items()
+                    if entry[1] is not None
+                    and (zone_id == default_zone or (entry[0] or {}).get("camera_id") == camera_id)
+                ],
+                default_zone,
+            )
+            for camera_id, default_zone in cameras
+        }
+        # A change committed while loading leaves the old versions, so the next call reloads.
+        self._versions = versions
+
+    def locate(self, camera_id: int, points: np.ndarray) -> list[int | None]:
+        index = self.indexes.get(camera_id)
+        if index is None:
+            return [None] * len(points)
+        located = index.locate(points)
+        return [int(zone_id) if zone_id != NO_ZONE else index.default_zone for zone_id in located]
+
+
+locator = ZoneLocator()
+
+
+def _bbox_centre(raw_payload: dict | None) -> tuple[float, float] | None:
+    bbox = (raw_payload or {}).get("bbox")
+    try:
+        x1, y1, x2, y2 = (float(value) for value in bbox)
+    except (TypeError, ValueError):
+        return None
+    return (x1 + x2) / 2, (y1 + y2) / 2
+
+
+async def assign_zones(session: AsyncSession, rows: list[dict]) -> None:
+    """Fill ``zone_id`` of event rows that have a camera and a plate box but no zone."""
+    pending: dict[int, list[tuple[dict, tuple[float, float]]]] = defaultdict(list)
+    for row in rows:
+        if row.get("zone_id") is None and row.get("camera_id") is not None:
+            centre = _bbox_centre(row.get("raw_payload"))
+            if centre is not None:
+                pending[row["camera_id"]].append((row, centre))
+    if not pending:
+        return
+    await locator.refresh(session)
+    for camera_id, items in pending.items():
+        points = np.asarray([centre for _, centre in items], dtype=np.float64)
+        for (row, _), zone_id in zip(items, locator.locate(camera_id, points)):
+            row["zone_id"] = zone_id
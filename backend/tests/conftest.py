@@ -3,31 +3,50 @@ import sys
 
 import pytest
 from fastapi.testclient import TestClient
+from sqlalchemy.ext.asyncio import create_async_engine
 from sqlmodel import SQLModel, Session, create_engine
+from sqlmodel.ext.asyncio.session import AsyncSession
 
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 
 from app.main import app
-from app.deps import get_session
+from app.config_cache import cache
+from app.zones import locator
+from app.deps import get_async_session, get_session
 from app import models  # noqa: F401 ensures tables are registered
 
+TEST_DATABASE = "./test.db"
+
 
 @pytest.fixture(name="session")
 def session_fixture():
     from app import models  # noqa: F401
 
-    engine = create_engine("sqlite:///./test.db", connect_args={"check_same_thread": False})
+    engine = create_engine(f"sqlite:///{TEST_DATABASE}", connect_args={"check_same_thread": False})
     SQLModel.metadata.create_all(engine)
     with Session(engine) as session:
         yield session
+    SQLModel.metadata.drop_all(engine)
 
 
 @pytest.fixture(name="client")
 def client_fixture(session: Session):
+    # Routes use the async layer; aiosqlite on the same file stands in for asyncpg.
+    async_engine = create_async_engine(f"sqlite+aiosqlite:///{TEST_DATABASE}")
+
     def get_session_override():
         yield session
 
+    async def get_async_session_override():
+        async with AsyncSession(async_engine, expire_on_commit=False) as async_session:
+            yield async_session
+
+    # Each test starts from empty tables, so nothing cached by an earlier test is valid.
+    cache.clear()
+    locator.reset()
     app.dependency_overrides[get_session] = get_session_override
+    app.dependency_overrides[get_async_session] = get_async_session_override
     with TestClient(app) as client:
         yield client
+        client.portal.call(async_engine.dispose)
     app.dependency_overrides.clear()
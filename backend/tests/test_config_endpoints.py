@@ -23,6 +23,18 @@ def test_create_and_list_cameras(client: TestClient):
     assert cams[0]["rtsp_url"] == create_payload["rtsp_url"]
 
 
+def test_list_zones_cursor_pagination(client: TestClient):
+    for index in range(3):
+        client.post("/config/zones", json={"name": f"Zone {index}", "geometry": {"points": []}})
+
+    first = client.get("/config/zones", params={"limit": 2})
+    assert [zone["name"] for zone in first.json()] == ["Zone 0", "Zone 1"]
+
+    second = client.get("/config/zones", params={"limit": 2, "cursor": first.headers["X-Next-Cursor"]})
+    assert [zone["name"] for zone in second.json()] == ["Zone 2"]
+    assert "X-Next-Cursor" not in second.headers
+
+
 def test_ingest_plate_event_and_search(client: TestClient):
     ingest_payload = {
         "plate_text": "ABC123",
@@ -38,3 +50,54 @@ def test_ingest_plate_event_and_search(client: TestClient):
     assert search_resp.status_code == 200
     results = search_resp.json()
     assert any(event["plate_text"] == "ABC123" for event in results)
+
+
+def test_config_lists_are_cached_with_etags_and_invalidated_on_change(client: TestClient):
+    from app.config_cache import cache
+
+    client.post("/config/models", json={"type": "detector", "name": "yolo"})
+    first = client.get("/config/models")
+    etag = first.headers["ETag"]
+
+    hits = cache.hits
+    not_modified = client.get("/config/models", headers={"If-None-Match": etag})
+    assert not_modified.status_code == 304
+    assert cache.hits == hits + 1
+
+    model_id = first.json()[0]["id"]
+    client.put(f"/config/models/{model_id}", json={"type": "detector", "name": "yolo-v2"})
+    changed = client.get("/config/models", headers={"If-None-Match": etag})
+    assert changed.status_code == 200
+    assert changed.json()[0]["name"] == "yolo-v2"
+    assert changed.headers["ETag"] != etag
+
+
+def test_config_cache_keys_on_validated_parameters_and_is_bounded(client: TestClient, monkeypatch):
+    from app.config_cache import cache
+
+    client.post("/config/cameras", json={"name": "Cam", "rtsp_url": "rtsp://cam"})
+    client.get("/config/cameras", params={"enabled": True, "limit": 10})
+    hits = cache.hits
+    client.get("/config/cameras?limit=10&utm=1&enabled=true")
+    client.get("/config/cameras?limit=10&enabled=true&utm=2")
+    assert cache.hits == hits + 2
+    assert len(cache._entries["cameras"]) == 1
+
+    monkeypatch.setattr(cache, "max_entries", 3)
+    for limit in range(1, 6):
+        client.get("/config/cameras", params={"limit": limit})
+    assert list(cache._entries["cameras"]) == [(None, 0, limit, None) for limit in (3, 4, 5)]
+
+
+def test_config_snapshot_returns_only_changed_entities(client: TestClient):
+    client.post("/config/zones", json={"name": "Gate", "geometry": {"points": []}})
+    baseline = client.get("/config/snapshot").json()
+    assert set(baseline["changed"]) == {"cameras", "zones", "models", "sensors", "exporters"}
+    assert [zone["name"] for zone in baseline["changed"]["zones"]] == ["Gate"]
+
+    assert client.get("/config/snapshot", params={"since_version": baseline["version"]}).json()["changed"] == {}
+
+    client.post("/config/cameras", json={"name": "Cam", "rtsp_url": "rtsp://cam"})
+    delta = client.get("/config/snapshot", params={"since_version": baseline["version"]}).json()
+    assert list(delta["changed"]) == ["cameras"]
+    assert delta["version"] > baseline["version"]
@@ -0,0 +1,134 @@
+import gzip
+import json
+from datetime import datetime
+
+from fastapi.testclient import TestClient
+
+
+def test_bulk_ingest_json_array_reports_per_item_status(client: TestClient):
+    payload = [
+        {"plate_text": "BLK001", "timestamp": datetime.utcnow().isoformat(), "camera_id": None},
+        {"plate_text": "   "},
+        {"confidence": 0.5},
+        {"plate_text": "BLK002", "confidence": 0.7},
+    ]
+    response = client.post("/events/ingest/bulk", json=payload)
+    assert response.status_code == 200
+    body = response.json()
+    assert body["created"] == 2
+    assert body["failed"] == 2
+    statuses = [item["status"] for item in body["items"]]
+    assert statuses == ["created", "error", "error", "created"]
+    ids = [item["id"] for item in body["items"] if item["status"] == "created"]
+    assert len(set(ids)) == 2
+
+    results = client.get("/events/search?plate=BLK").json()
+    assert {event["id"] for event in results} == set(ids)
+
+
+def test_bulk_ingest_gzip_ndjson(client: TestClient):
+    lines = "\n".join(json.dumps({"plate_text": f"ND{index:03d}"}) for index in range(5))
+    response = client.post(
+        "/events/ingest/bulk",
+        content=gzip.compress(lines.encode()),
+        headers={"Content-Type": "application/x-ndjson", "Content-Encoding": "gzip"},
+    )
+    assert response.status_code == 200
+    assert response.json()["created"] == 5
+
+
+def test_bulk_ingest_ndjson_reports_malformed_lines_per_item(client: TestClient):
+    lines = b'{"plate_text": "GOOD01"}\n{"plate_text": \n{"plate_text": "GOOD02"}\n'
+    response = client.post("/events/ingest/bulk", content=lines, headers={"Content-Type": "application/x-ndjson"})
+    assert response.status_code == 200
+    body = response.json()
+    assert [item["status"] for item in body["items"]] == ["created", "error", "created"]
+    assert "invalid JSON" in body["items"][1]["error"]
+
+
+def test_bulk_ingest_caps_decompressed_size(client: TestClient, monkeypatch):
+    from app.routers import events
+
+    monkeypatch.setattr(events, "MAX_BULK_BYTES", 1024)
+    bomb = gzip.compress(b"[" + b" " * 10_000 + b"]")
+    response = client.post(
+        "/events/ingest/bulk",
+        content=bomb,
+        headers={"Content-Type": "application/json", "Content-Encoding": "gzip"},
+    )
+    assert response.status_code == 413
+
+
+def test_bulk_ingest_rejects_non_array(client: TestClient):
+    response = client.post("/events/ingest/bulk", json={"plate_text": "ABC123"})
+    assert response.status_code == 400
+
+
+def test_search_fuzzy_ranks_ocr_confusions_by_distance(client: TestClient):
+    for plate in ["ABC123", "A8C1Z3", "ABC128", "XYZ999", "ABD7777"]:
+        assert client.post("/events/ingest", json={"plate_text": plate}).status_code == 200
+
+    response = client.get("/events/search", params={"plate": "abc-123", "match": "fuzzy", "max_distance": 1})
+    assert response.status_code == 200
+    plates = [event["plate_text"] for event in response.json()]
+    assert plates == ["ABC123", "A8C1Z3", "ABC128"]
+
+
+def test_search_prefix_uses_normalized_key(client: TestClient):
+    for plate in ["B0I123", "BOI456", "CAR001"]:
+        client.post("/events/ingest", json={"plate_text": plate})
+
+    response = client.get("/events/search", params={"plate": "8O1", "match": "prefix"})
+    assert sorted(event["plate_text"] for event in response.json()) == ["B0I123", "BOI456"]
+
+
+def test_search_keyset_pagination_is_stable_under_inserts(client: TestClient):
+    for index in range(5):
+        client.post(
+            "/events/ingest",
+            json={"plate_text": f"PG{index}", "timestamp": datetime(2024, 1, 1, 12, 0, index).isoformat()},
+        )
+
+    first = client.get("/events/search", params={"limit": 2})
+    assert [event["plate_text"] for event in first.json()] == ["PG4", "PG3"]
+    cursor = first.headers["X-Next-Cursor"]
+
+    # A newer event arriving between pages must not shift the next page.
+    client.post("/events/ingest", json={"plate_text": "PG9", "timestamp": datetime(2024, 1, 2).isoformat()})
+
+    second = client.get("/events/search", params={"limit": 2, "cursor": cursor})
+    assert [event["plate_text"] for event in second.json()] == ["PG2", "PG1"]
+    third = client.get("/events/search", params={"limit": 2, "cursor": second.headers["X-Next-Cursor"]})
+    assert [event["plate_text"] for event in third.json()] == ["PG0"]
+    assert "X-Next-Cursor" not in third.headers
+
+
+def test_search_rejects_malformed_cursor(client: TestClient):
+    assert client.get("/events/search", params={"cursor": "not-a-cursor"}).status_code == 400
+
+
+def test_stream_pushes_filtered_events_from_single_and_bulk_ingest(client: TestClient):
+    with client.websocket_connect("/events/stream?camera_id=1") as websocket:
+        client.post("/events/ingest", json={"plate_text": "OTHER1", "camera_id": 2})
+        client.post("/events/ingest", json={"plate_text": "CAM101", "camera_id": 1})
+        client.post("/events/ingest/bulk", json=[{"plate_text": "CAM102", "camera_id": 1}, {"plate_text": "X"}])
+        assert websocket.receive_json()["plate_text"] == "CAM101"
+        assert websocket.receive_json()["plate_text"] == "CAM102"
+
+
+def test_stream_drops_slow_subscriber(client: TestClient, monkeypatch):
+    from app import broadcast
+
+    monkeypatch.setattr(broadcast, "SUBSCRIBER_BUFFER", 2)
+    with client.websocket_connect("/events/stream") as websocket:
+        # Publish straight into the hub in one loop callback so the sender cannot drain in between.
+        events = [{"id": index, "plate_text": f"SLOW{index}"} for index in range(5)]
+        client.portal.call(lambda: broadcast.hub.publish(broadcast.schemas.PlateEventRead(**event) for event in events))
+        received = []
+        try:
+            while True:
+                received.append(websocket.receive_json()["plate_text"])
+        except Exception:  # noqa: BLE001 - closed by the server
+            pass
+    assert len(received) < len(events)
+    assert broadcast.hub.dropped_subscribers >= 1
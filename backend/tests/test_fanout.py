@@ -0,0 +1,34 @@
+import asyncio
+import json
+
+from app import fanout, schemas
+from app.broadcast import hub
+
+
+def _event(event_id: int, note: str = "") -> schemas.PlateEventRead:
+    return schemas.PlateEventRead(id=event_id, plate_text=f"FAN{event_id:03d}", camera_id=1, raw_payload={"note": note})
+
+
+def test_pack_payloads_fills_notifications_and_references_oversized_events():
+    events = [_event(index) for index in range(50)] + [_event(99, "x" * 10_000)]
+    payloads = fanout.pack_payloads(events, limit=2000)
+
+    assert len(payloads) > 1
+    assert all(len(payload.encode()) <= 2000 for payload in payloads)
+    lines = [json.loads(line) for payload in payloads for line in payload.splitlines()]
+    assert [line.get("id") for line in lines[:50]] == list(range(50))
+    assert lines[-1] == {"ref": 99}
+
+
+def test_listener_forwards_notifications_to_local_subscribers():
+    async def scenario():
+        subscription = hub.subscribe(camera_ids=[1])
+        listener = fanout._Listener(connection=None)
+        try:
+            listener.on_notify(None, 0, fanout.CHANNEL, fanout.pack_payloads([_event(1), _event(2)])[0] + "\nnot json")
+            received = [json.loads(await subscription.next())["id"] for _ in range(2)]
+        finally:
+            hub.unsubscribe(subscription)
+        return received
+
+    assert asyncio.run(scenario()) == [1, 2]
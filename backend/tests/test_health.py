@@ -1,5 +1,11 @@
+import threading
+
+import pytest
 from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
 
+from app.database import InstrumentedQueuePool
 from app.main import app
 
 
@@ -8,3 +14,26 @@ def test_health_endpoint():
     response = client.get("/healthz")
     assert response.status_code == 200
     assert response.json() == {"status": "ok"}
+
+
+def test_health_reports_pool_stats_while_running():
+    with TestClient(app) as client:
+        pools = client.get("/healthz").json()["db_pool"]
+    assert pools.keys() == {"async", "sync"}
+    assert {"class", "size", "checked_out", "overflow"} <= pools["async"].keys()
+
+
+def test_instrumented_pool_counts_waits_and_timeouts(tmp_path):
+    engine = create_engine(
+        f"sqlite:///{tmp_path / 'pool.db'}", poolclass=InstrumentedQueuePool, pool_size=1, max_overflow=0, pool_timeout=0.2
+    )
+    held = engine.connect()
+    threading.Timer(0.05, held.close).start()
+    engine.connect().close()  # waits for the held connection
+    with engine.connect(), pytest.raises(PoolTimeoutError):
+        engine.connect()
+
+    pool = engine.pool
+    assert (pool.checkouts, pool.waited, pool.timeouts) == (4, 2, 1)
+    assert pool.wait_max_s >= 0.04
+    engine.dispose()
@@ -0,0 +1,89 @@
+from datetime import datetime
+
+from app.partitions import expired_partitions, partition_range, planned_partitions
+
+
+def test_planned_monthly_partitions_cover_history_and_future():
+    planned = planned_partitions(datetime(2024, 11, 15), ahead=2, interval="month", since=datetime(2024, 10, 3))
+    assert [name for name, _, _ in planned] == [
+        "plateevent_p2024_10",
+        "plateevent_p2024_11",
+        "plateevent_p2024_12",
+        "plateevent_p2025_01",
+    ]
+    assert planned[-1][1:] == (datetime(2025, 1, 1), datetime(2025, 2, 1))
+
+
+def test_daily_partition_names_round_trip():
+    planned = planned_partitions(datetime(2024, 2, 28, 13), ahead=1, interval="day")
+    assert [name for name, _, _ in planned] == ["plateevent_p2024_02_28", "plateevent_p2024_02_29"]
+    assert partition_range("plateevent_p2024_02_29") == (datetime(2024, 2, 29), datetime(2024, 3, 1))
+
+
+def test_only_fully_expired_partitions_are_dropped():
+    names = ["plateevent_p2024_01", "plateevent_p2024_02", "plateevent_p2024_03", "plateevent_default"]
+    assert expired_partitions(names, retention_days=30, now=datetime(2024, 3, 20)) == ["plateevent_p2024_01"]
+
+
+class _Result:
+    def __init__(self, rows=()):
+        self._rows = list(rows)
+        self.rowcount = len(self._rows)
+
+    def __iter__(self):
+        return iter(self._rows)
+
+
+class _Connection:
+    def __init__(self, engine):
+        self.engine = engine
+
+    def execute(self, statement, params=None):
+        sql = str(statement)
+        if "pg_inherits" in sql:
+            return _Result((name,) for name in self.engine.attached)
+        if sql.startswith(f"CREATE TABLE {self.engine.failing}"):
+            raise RuntimeError("updated partition constraint for default partition would be violated")
+        self.engine.statements.append(sql)
+        return _Result()
+
+
+class _Transaction:
+    def __init__(self, engine):
+        self.engine = engine
+
+    def __enter__(self):
+        return _Connection(self.engine)
+
+    def __exit__(self, exc_type, exc, tb):
+        self.engine.transactions += 1
+        return False
+
+
+class _FakePostgres:
+    class dialect:
+        name = "postgresql"
+
+    def __init__(self, attached, failing):
+        self.attached = attached
+        self.failing = failing
+        self.statements = []
+        self.transactions = 0
+
+    def connect(self):
+        return _Transaction(self)
+
+    begin = connect
+
+
+def test_maintenance_creates_each_partition_in_its_own_transaction(monkeypatch):
+    from app import partitions
+
+    monkeypatch.setattr(partitions, "RETENTION_DAYS", None)
+    engine = _FakePostgres(attached=["plateevent_p2024_03"], failing="plateevent_p2024_04")
+    partitions.run_maintenance(engine, now=datetime(2024, 3, 20))
+
+    attached = [sql for sql in engine.statements if "ATTACH PARTITION" in sql]
+    # April failed (rows stuck in the default partition) but May and June were still attached.
+    assert [sql.split()[5] for sql in attached] == ["plateevent_p2024_05", "plateevent_p2024_06"]
+    assert any("DELETE FROM plateevent_default" in sql for sql in engine.statements)
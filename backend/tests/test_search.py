@@ -0,0 +1,23 @@
+import itertools
+
+from app.search import _trigrams, edit_distance, trigram_threshold
+
+
+def _similarity(a: str, b: str) -> float:
+    left, right = _trigrams(a), _trigrams(b)
+    return len(left & right) / len(left | right)
+
+
+def test_trigram_threshold_never_excludes_a_key_within_max_distance():
+    key = "AB0110"
+    alphabet = "AB01"
+    for length in range(len(key) - 2, len(key) + 2):
+        for candidate in map("".join, itertools.product(alphabet, repeat=length)):
+            distance = edit_distance(key, candidate, 2)
+            if distance <= 2:
+                assert _similarity(key, candidate) >= trigram_threshold(key, distance) - 1e-9, candidate
+
+
+def test_trigram_threshold_is_zero_when_no_trigram_must_survive():
+    assert trigram_threshold("AB1", 2) == 0.0
+    assert 0 < trigram_threshold("ABC123", 2) < 0.1 < trigram_threshold("ABC123", 1)
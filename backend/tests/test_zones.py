@@ -0,0 +1,92 @@
+import importlib.util
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+
+from app import zones
+from app.zones import points_in_polygon
+
+EDGE_DIR = Path(__file__).resolve().parents[2] / "edge"
+
+
+def test_points_in_polygon_concave():
+    # "U" shape: the notch between the arms is outside.
+    polygon = np.array([(0, 0), (30, 0), (30, 30), (20, 30), (20, 10), (10, 10), (10, 30), (0, 30)], float)
+    points = np.array([(5, 20), (15, 20), (25, 20), (15, 5), (40, 5)], float)
+    assert points_in_polygon(points, polygon).tolist() == [True, False, True, True, False]
+
+
+@pytest.fixture
+def edge_zones(monkeypatch):
+    if not (EDGE_DIR / "zones.py").is_file():
+        pytest.skip("edge sources not available")
+    monkeypatch.syspath_prepend(str(EDGE_DIR))
+    for name in ("settings", "tracker"):
+        monkeypatch.delitem(sys.modules, name, raising=False)
+    spec = importlib.util.spec_from_file_location("edge_zones", EDGE_DIR / "zones.py")
+    module = importlib.util.module_from_spec(spec)
+    monkeypatch.setitem(sys.modules, "edge_zones", module)
+    try:
+        spec.loader.exec_module(module)
+    except ImportError as exc:
+        pytest.skip(f"edge dependencies not installed: {exc}")
+    yield module
+    for name in ("settings", "tracker"):
+        sys.modules.pop(name, None)
+
+
+def test_polygon_helpers_match_the_edge_copy(edge_zones):
+    rng = np.random.default_rng(3)
+    points = rng.uniform(-10, 110, size=(500, 2))
+    for _ in range(20):
+        polygon = rng.uniform(0, 100, size=(int(rng.integers(3, 9)), 2))
+        assert (points_in_polygon(points, polygon) == edge_zones.points_in_polygon(points, polygon)).all()
+    geometries = [
+        None,
+        {"points": [{"x": 0, "y": 0}, {"x": 5, "y": 0}, {"x": 5, "y": 5}]},
+        {"coordinates": [[[0, 0], [5, 0], [5, 5], [0, 5]]]},
+        {"points": [[0, 0], [1, 1]]},
+    ]
+    for geometry in geometries:
+        ours, theirs = zones.polygon_points(geometry), edge_zones.polygon_points(geometry)
+        assert (ours is None and theirs is None) or np.array_equal(ours, theirs)
+
+
+def _square(x, y, size):
+    return [{"x": x, "y": y}, {"x": x + size, "y": y}, {"x": x + size, "y": y + size}, {"x": x, "y": y + size}]
+
+
+def test_ingest_assigns_zone_from_bbox(client: TestClient):
+    gate = client.post("/config/zones", json={"name": "Gate", "geometry": {"points": _square(0, 0, 1000)}}).json()
+    lane = client.post(
+        "/config/zones", json={"name": "Lane", "geometry": {"points": _square(100, 100, 100), "camera_id": 1}}
+    ).json()
+    camera = client.post(
+        "/config/cameras", json={"name": "Cam", "rtsp_url": "rtsp://cam", "zone_id": gate["id"]}
+    ).json()
+    assert camera["id"] == 1
+
+    def ingest(bbox, **extra):
+        payload = {"plate_text": "ZON001", "camera_id": 1, "raw_payload": {"bbox": bbox}, **extra}
+        return client.post("/events/ingest", json=payload).json()["zone_id"]
+
+    assert ingest([140, 140, 160, 160]) == lane["id"]
+    assert ingest([500, 500, 520, 520]) == gate["id"]
+    assert ingest([140, 140, 160, 160], zone_id=gate["id"]) == gate["id"]
+
+    # Moving the lane zone is picked up without a restart.
+    client.put(f"/config/zones/{lane['id']}", json={"geometry": {"points": _square(600, 600, 100), "camera_id": 1}})
+    assert ingest([140, 140, 160, 160]) == gate["id"]
+
+    body = client.post(
+        "/events/ingest/bulk",
+        json=[
+            {"plate_text": "ZON002", "camera_id": 1, "raw_payload": {"bbox": [640, 640, 660, 660]}},
+            {"plate_text": "ZON003", "camera_id": 1},
+        ],
+    ).json()
+    zones = [client.get(f"/events/search?plate=ZON00{n}").json()[0]["zone_id"] for n in (2, 3)]
+    assert body["created"] == 2 and zones == [lane["id"], None]
@@ -0,0 +1,211 @@
+"""Backend configuration sync with an offline cache and change deltas."""
+from __future__ import annotations
+
+import dataclasses
+import json
+import logging
+import os
+import threading
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+import requests
+
+from settings import CONFIG_CACHE_PATH, EdgeConfig
+from exporters.dispatcher import EXPORTERS
+
+logger = logging.getLogger(__name__)
+
+ENTITIES = ("cameras", "zones", "models", "exporters")
+
+
+@dataclass
+class EntityDelta:
+    added: List[dict] = field(default_factory=list)
+    updated: List[dict] = field(default_factory=list)
+    removed: List[dict] = field(default_factory=list)
+
+    def __bool__(self) -> bool:
+        return bool(self.added or self.updated or self.removed)
+
+
+def diff_rows(old: List[dict], new: List[dict]) -> EntityDelta:
+    """Rows added, changed or removed between two lists keyed by ``id``."""
+    before = {row["id"]: row for row in old}
+    after = {row["id"]: row for row in new}
+    return EntityDelta(
+        added=[row for key, row in after.items() if key not in before],
+        updated=[row for key, row in after.items() if key in before and before[key] != row],
+        removed=[row for key, row in before.items() if key not in after],
+    )
+
+
+def _pick_exporter(rows: List[dict]) -> Optional[dict]:
+    # The dispatcher runs one exporter per type; an enabled row wins over a disabled one.
+    rows = sorted(rows, key=lambda row: (not row.get("enabled", True), row["id"]))
+    return rows[0] if rows else None
+
+
+def overlay(base: EdgeConfig, entities: Dict[str, List[dict]]) -> EdgeConfig:
+    """``base`` with the synced backend entities applied on top.
+
+    Backend cameras replace the camera list when ``camera_source`` is
+    ``backend``. ``detector`` models set ``detectors`` and ``ocr`` models the
+    engine section of the same name (``weights_path``, ``version`` and
+    ``params``). Exporter rows override the ``rest``/``websocket`` sections
+    (``endpoint``, ``enabled``, ``auth`` and ``retry_config``). Zones are
+    kept as the backend rows. Entities that were never synced leave the
+    YAML values untouched.
+    """
+    changes: Dict[str, Any] = {}
+    if base.camera_source == "backend" and "cameras" in entities:
+        changes.update(cameras=list(entities["cameras"]), camera_source="config")
+    if "zones" in entities:
+        changes["zones"] = list(entities["zones"])
+    if "models" in entities:
+        detectors = dict(base.detectors)
+        ocr = {name: dict(section) for name, section in base.ocr.items()}
+        for model in entities["models"]:
+            values = {
+                key: model[key] for key in ("weights_path", "version") if model.get(key) is not None
+            }
+            values.update(model.get("params") or {})
+            if model["type"] == "detector":
+                detectors.update(type=model["name"], **values)
+            elif model["type"] == "ocr":
+                ocr.setdefault(model["name"], {}).update(values)
+        changes.update(detectors=detectors, ocr=ocr)
+    if "exporters" in entities:
+        exporters = dict(base.exporters)
+        for kind in EXPORTERS:
+            row = _pick_exporter([row for row in entities["exporters"] if row["type"] == kind])
+            if row is None:
+                continue
+            section = {**exporters.get(kind, {}), "endpoint": row["endpoint"], "enabled": row["enabled"]}
+            if row.get("auth"):
+                section["auth"] = row["auth"]
+            section.update(row.get("retry_config") or {})
+            exporters[kind] = section
+        changes["exporters"] = exporters
+    return dataclasses.replace(base, **changes)
+
+
+class ConfigSync:
+    """Polls ``/config/snapshot`` and keeps the last known entities on disk.
+
+    Only entities that changed since the last seen version are transferred.
+    The merged snapshot is written to ``cache_path`` after every change so
+    the edge can start with the last known configuration while the backend
+    is unreachable.
+    """
+
+    def __init__(
+        self,
+        backend_url: str,
+        cache_path: Path = CONFIG_CACHE_PATH,
+        interval: float = 30.0,
+        timeout: float = 5.0,
+        session: Optional[requests.Session] = None,
+    ) -> None:
+        self.url = f"{backend_url.rstrip('/')}/config/snapshot"
+        self.cache_path = Path(cache_path)
+        self.interval = interval
+        self.timeout = timeout
+        self.session = session or requests.Session()
+        self.version = 0
+        self.entities: Dict[str, List[dict]] = {}
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @classmethod
+    def from_config(cls, config: EdgeConfig) -> Optional["ConfigSync"]:
+        settings = config.config_sync
+        if not settings.get("enabled", False):
+            return None
+        backend_url = os.getenv("BACKEND_API_URL")
+        if not backend_url:
+            raise ValueError("config_sync is enabled but BACKEND_API_URL is not set")
+        return cls(
+            backend_url,
+            cache_path=Path(settings.get("cache_path", CONFIG_CACHE_PATH)),
+            interval=float(settings.get("interval_s", 30)),
+            timeout=float(settings.get("timeout_s", 5)),
+        )
+
+    def load_cache(self) -> bool:
+        """Restore the last synced snapshot; returns False if there is none."""
+        try:
+            data = json.loads(self.cache_path.read_text())
+        except FileNotFoundError:
+            return False
+        except ValueError as exc:
+            logger.warning("Ignoring unreadable config cache %s: %s", self.cache_path, exc)
+            return False
+        self.version = int(data.get("version", 0))
+        entities = data.get("entities", {})
+        self.entities = {entity: entities[entity] for entity in ENTITIES if entity in entities}
+        return True
+
+    def save_cache(self) -> None:
+        self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+        scratch = self.cache_path.with_suffix(self.cache_path.suffix + ".tmp")
+        scratch.write_text(json.dumps({"version": self.version, "entities": self.entities}))
+        os.replace(scratch, self.cache_path)
+
+    def poll(self) -> Dict[str, EntityDelta]:
+        """Fetch changes since the last version and return the per-entity deltas."""
+        response = self.session.get(self.url, params={"since_version": self.version}, timeout=self.timeout)
+        response.raise_for_status()
+        snapshot = response.json()
+        deltas = {}
+        for entity, rows in snapshot.get("changed", {}).items():
+            if entity not in ENTITIES:
+                continue
+            delta = diff_rows(self.entities.get(entity, []), rows)
+            if delta or entity not in self.entities:
+                deltas[entity] = delta
+            self.entities[entity] = rows
+        if snapshot["version"] != self.version or deltas:
+            self.version = snapshot["version"]
+            self.save_cache()
+        return deltas
+
+    def bootstrap(self) -> None:
+        """Load the offline cache, then try one poll so startup uses fresh values.
+
+        If the backend is unreachable the cached snapshot (or, without one,
+        the YAML configuration) is used until a later poll succeeds.
+        """
+        if self.load_cache():
+            logger.info("Loaded config snapshot version %d from %s", self.version, self.cache_path)
+        try:
+            self.poll()
+        except Exception as exc:  # noqa: BLE001
+            source = "the cached snapshot" if self.entities else "the local configuration"
+            logger.warning("Backend config unavailable (%s), starting from %s", exc, source)
+
+    def start(self, on_change: Callable[[Dict[str, EntityDelta]], None]) -> None:
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._work, args=(on_change,), name="config-sync", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float | None = None) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def _work(self, on_change: Callable[[Dict[str, EntityDelta]], None]) -> None:
+        while not self._stop.wait(self.interval):
+            try:
+                deltas = self.poll()
+            except Exception as exc:  # noqa: BLE001
+                logger.warning("Config sync from %s failed: %s", self.url, exc)
+                continue
+            if not deltas:
+                continue
+            logger.info("Config changed: %s", ", ".join(sorted(deltas)))
+            try:
+                on_change(deltas)
+            except Exception as exc:  # noqa: BLE001
+                logger.error("Applying config changes failed: %s", exc)
@@ -1,52 +1,110 @@
-"""Dispatcher handling multiple exporters with retry queue."""
+"""Dispatcher handling multiple exporters with a durable retry log."""
 from __future__ import annotations
 
 import logging
+from collections import defaultdict
 from typing import Dict, List
 
-from settings import load_retry_queue, save_retry_queue
-from .rest import RestExporter
+from pathlib import Path
+
+from settings import RETRY_LOG_PATH, RETRY_QUEUE_PATH, load_retry_queue
+from .rest import BatchingRestExporter, RestExporter
+from .retry_log import DROP_OLDEST, RetryDrainer, RetryLog
 from .websocket import WebSocketExporter
 
 logger = logging.getLogger(__name__)
 
+EXPORTERS = ("rest", "websocket")
+
 
 class ExportDispatcher:
     def __init__(self, config: Dict):
         self.config = config
         self.exporters = []
-        if config.get("rest", {}).get("enabled", False):
-            self.exporters.append(RestExporter(config["rest"]))
-        if config.get("websocket", {}).get("enabled", False):
-            self.exporters.append(WebSocketExporter(config["websocket"]))
-        self.retry_queue = load_retry_queue()
-        if self.retry_queue:
-            logger.info("Retrying %d queued events", len(self.retry_queue))
-            self._flush_retry_queue()
+        for name in EXPORTERS:
+            exporter = self._build(name, config.get(name, {}))
+            if exporter is not None:
+                self.exporters.append(exporter)
+        retry = config.get("retry", {})
+        self.retry_log = RetryLog(
+            Path(retry.get("path", RETRY_LOG_PATH)),
+            max_events=int(retry.get("max_events", 100_000)),
+            eviction=retry.get("eviction", DROP_OLDEST),
+        )
+        self._import_legacy_queue()
+        if len(self.retry_log):
+            logger.info("%d queued events will be replayed in the background", len(self.retry_log))
+        self.drainer = RetryDrainer(
+            self.retry_log,
+            {exporter.name: exporter for exporter in self.exporters},
+            interval=float(retry.get("drain_interval_s", 5)),
+            batch_size=int(retry.get("drain_batch", 100)),
+            rate_per_s=float(retry.get("rate_per_s", 20)),
+        )
+        self.drainer.start()
+
+    def _build(self, name: str, config: Dict):
+        if not config.get("enabled", False):
+            return None
+        if name == "rest":
+            batched = config.get("batch", {}).get("enabled", False)
+            exporter = BatchingRestExporter(config) if batched else RestExporter(config)
+        else:
+            exporter = WebSocketExporter(config)
+        # Asynchronous exporters report undeliverable events after ``send`` returned.
+        if hasattr(exporter, "on_failure"):
+            exporter.on_failure = lambda events: self._queue_failed(name, events)
+        return exporter
+
+    def reload(self, config: Dict) -> None:
+        """Re-create only the exporters whose section of ``config`` changed.
+
+        A replaced exporter is closed after the new one took over, so events
+        it still held go to the retry log and are replayed by its successor.
+        ``retry`` settings apply on the next start.
+        """
+        for name in EXPORTERS:
+            section = config.get(name, {})
+            if section == self.config.get(name, {}):
+                continue
+            old = next((exporter for exporter in self.exporters if exporter.name == name), None)
+            new = self._build(name, section)
+            exporters = [exporter for exporter in self.exporters if exporter is not old]
+            self.exporters = exporters + [new] if new is not None else exporters
+            self.drainer.exporters = {exporter.name: exporter for exporter in self.exporters}
+            if old is not None and hasattr(old, "close"):
+                old.close()
+            logger.info("Exporter %s %s", name, "reloaded" if new else "disabled")
+        self.config = config
 
     def dispatch(self, event: dict) -> None:
         logger.info("Dispatching event %s", event)
-        failed: List[dict] = []
         for exporter in self.exporters:
             try:
                 exporter.send(event)
             except Exception as exc:  # noqa: BLE001
                 logger.error("Exporter %s failed: %s", exporter, exc)
-                failed.append({"exporter": exporter.name, "event": event})
-        if failed:
-            self.retry_queue.extend(failed)
-            save_retry_queue(self.retry_queue)
-
-    def _flush_retry_queue(self) -> None:
-        remaining: List[dict] = []
-        for item in self.retry_queue:
-            target = next((exp for exp in self.exporters if exp.name == item.get("exporter")), None)
-            if not target:
-                remaining.append(item)
-                continue
-            try:
-                target.send(item["event"])
-            except Exception:
-                remaining.append(item)
-        self.retry_queue = remaining
-        save_retry_queue(self.retry_queue)
+                self.retry_log.append(exporter.name, [event])
+
+    def close(self) -> None:
+        self.drainer.stop()
+        for exporter in self.exporters:
+            if hasattr(exporter, "close"):
+                exporter.close()
+        self.retry_log.close()
+
+    def _queue_failed(self, exporter_name: str, events: List[dict]) -> None:
+        self.retry_log.append(exporter_name, events)
+
+    def _import_legacy_queue(self, path: Path = RETRY_QUEUE_PATH) -> None:
+        """Move entries of the old JSON retry queue file into the retry log."""
+        legacy = load_retry_queue(path)
+        if not path.exists():
+            return
+        by_exporter: Dict[str, List[dict]] = defaultdict(list)
+        for item in legacy:
+            by_exporter[item.get("exporter", "")].append(item["event"])
+        for name, events in by_exporter.items():
+            self.retry_log.append(name, events)
+        path.unlink()
+        logger.info("Imported %d events from legacy retry queue %s", len(legacy), path)
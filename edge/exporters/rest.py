@@ -1,25 +1,155 @@
-"""REST exporter stub."""
+"""REST exporters: per-event and batched bulk posting over pooled connections."""
 from __future__ import annotations
 
+import gzip
 import json
 import logging
-from typing import Any
+import threading
+import time
+from typing import Any, Callable, List, Optional
 
 import requests
+from requests.adapters import HTTPAdapter
 
 logger = logging.getLogger(__name__)
 
 
+def _pooled_session(config: dict) -> requests.Session:
+    pool_size = int(config.get("pool_size", 4))
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
 class RestExporter:
     name = "rest"
 
     def __init__(self, config: dict) -> None:
         self.config = config
         self.endpoint = config.get("endpoint")
+        self.timeout = float(config.get("timeout", 5))
+        self.session = _pooled_session(config)
 
     def send(self, event: dict) -> None:
         if not self.endpoint:
             raise ValueError("REST endpoint not configured")
         logger.info("Sending event to REST %s", self.endpoint)
-        response = requests.post(self.endpoint, json=event, timeout=5)
+        response = self.session.post(self.endpoint, json=event, timeout=self.timeout)
+        response.raise_for_status()
+
+    def deliver(self, events: List[dict]) -> None:
+        """Send events synchronously, raising if any was not accepted."""
+        for event in events:
+            self.send(event)
+
+    def close(self) -> None:
+        self.session.close()
+
+
+class BatchingRestExporter(RestExporter):
+    """Accumulates events and posts them as one gzip-compressed JSON array.
+
+    A batch is flushed to ``bulk_endpoint`` (``<endpoint>/bulk`` by default)
+    once it holds ``batch.max_items`` events or its oldest event has waited
+    ``batch.max_wait_ms``. ``send`` only enqueues; events of a batch that
+    could not be delivered are handed to ``on_failure`` so the dispatcher
+    can queue them for retry.
+    """
+
+    def __init__(self, config: dict) -> None:
+        super().__init__(config)
+        batch = config.get("batch", {})
+        self.bulk_endpoint = config.get("bulk_endpoint") or (
+            f"{self.endpoint.rstrip('/')}/bulk" if self.endpoint else None
+        )
+        self.max_items = max(1, int(batch.get("max_items", 100)))
+        self.max_wait = max(0.0, float(batch.get("max_wait_ms", 500))) / 1000.0
+        self.compress = bool(batch.get("gzip", True))
+        self.on_failure: Optional[Callable[[List[dict]], None]] = None
+        self._pending: List[dict] = []
+        self._oldest = 0.0
+        self._closed = False
+        self._wakeup = threading.Condition()
+        self._thread = threading.Thread(target=self._work, name="rest-batcher", daemon=True)
+        self._thread.start()
+
+    def send(self, event: dict) -> None:
+        if not self.bulk_endpoint:
+            raise ValueError("REST endpoint not configured")
+        with self._wakeup:
+            first = not self._pending
+            if first:
+                self._oldest = time.monotonic()
+            self._pending.append(event)
+            # The worker sleeps untimed while idle; wake it to start the max_wait timer.
+            if first or len(self._pending) >= self.max_items:
+                self._wakeup.notify()
+
+    def flush(self) -> None:
+        with self._wakeup:
+            batch, self._pending = self._pending, []
+        if batch:
+            self._post(batch)
+
+    def close(self) -> None:
+        with self._wakeup:
+            self._closed = True
+            self._wakeup.notify()
+        self._thread.join()
+        super().close()
+
+    def _work(self) -> None:
+        while True:
+            with self._wakeup:
+                while not self._closed:
+                    if len(self._pending) >= self.max_items:
+                        break
+                    if self._pending:
+                        remaining = self._oldest + self.max_wait - time.monotonic()
+                        if remaining <= 0:
+                            break
+                        self._wakeup.wait(remaining)
+                    else:
+                        self._wakeup.wait()
+                batch, self._pending = self._pending[: self.max_items], self._pending[self.max_items :]
+                if self._pending:
+                    self._oldest = time.monotonic()
+                closed = self._closed and not self._pending
+            if batch:
+                self._post(batch)
+            if closed:
+                return
+
+    def deliver(self, events: List[dict]) -> None:
+        """Post events as one bulk request now, bypassing the batch queue."""
+        if not self.bulk_endpoint:
+            raise ValueError("REST endpoint not configured")
+        body = json.dumps(events).encode()
+        headers = {"Content-Type": "application/json"}
+        if self.compress:
+            body = gzip.compress(body)
+            headers["Content-Encoding"] = "gzip"
+        response = self.session.post(self.bulk_endpoint, data=body, headers=headers, timeout=self.timeout)
         response.raise_for_status()
+        rejected = [item for item in self._items(response) if item.get("status") != "created"]
+        if rejected:
+            logger.warning("Backend rejected %d of %d events: %s", len(rejected), len(events), rejected)
+        else:
+            logger.info("Exported %d events to REST %s", len(events), self.bulk_endpoint)
+
+    def _post(self, batch: List[dict]) -> None:
+        try:
+            self.deliver(batch)
+        except Exception as exc:  # noqa: BLE001
+            logger.error("Bulk REST export of %d events failed: %s", len(batch), exc)
+            if self.on_failure is not None:
+                self.on_failure(batch)
+
+    @staticmethod
+    def _items(response: requests.Response) -> List[dict[str, Any]]:
+        try:
+            return response.json().get("items", [])
+        except ValueError:
+            return []
@@ -0,0 +1,198 @@
+"""Durable retry log for events that exporters failed to deliver."""
+from __future__ import annotations
+
+import json
+import logging
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Iterable, List, Tuple
+
+logger = logging.getLogger(__name__)
+
+DROP_OLDEST = "drop_oldest"
+DROP_NEWEST = "drop_newest"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS retry_event (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    exporter TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    queued_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS retry_event_exporter_seq ON retry_event (exporter, seq);
+"""
+
+
+class RetryLog:
+    """Append-only SQLite (WAL) store of failed ``(exporter, event)`` pairs.
+
+    Appends are single-row inserts, so a failure costs O(1) I/O regardless of
+    backlog size, and WAL keeps the log consistent across crashes. With
+    ``synchronous=NORMAL`` commits are not fsync'd individually; the WAL is
+    fsync'd when it is checkpointed, which ``checkpoint`` triggers after a
+    batch of acknowledgements. Once ``max_events`` are stored the eviction
+    policy either drops the oldest entries or rejects new ones.
+    """
+
+    def __init__(self, path: Path, max_events: int = 100_000, eviction: str = DROP_OLDEST) -> None:
+        if eviction not in (DROP_OLDEST, DROP_NEWEST):
+            raise ValueError(f"Unknown eviction policy {eviction!r}")
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.path = path
+        self.max_events = max_events
+        self.eviction = eviction
+        self.evicted = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+        self._size = self._conn.execute("SELECT COUNT(*) FROM retry_event").fetchone()[0]
+
+    def __len__(self) -> int:
+        return self._size
+
+    def append(self, exporter: str, events: Iterable[dict]) -> int:
+        """Queue events for ``exporter``; returns how many were stored."""
+        rows = [(exporter, json.dumps(event), time.time()) for event in events]
+        with self._lock:
+            overflow = self._size + len(rows) - self.max_events
+            dropped = 0
+            if overflow > 0 and self.eviction == DROP_NEWEST:
+                dropped = min(overflow, len(rows))
+                rows = rows[: len(rows) - dropped]
+                overflow = 0
+            with self._conn:
+                self._conn.executemany(
+                    "INSERT INTO retry_event (exporter, payload, queued_at) VALUES (?, ?, ?)", rows
+                )
+                if overflow > 0:
+                    self._conn.execute(
+                        "DELETE FROM retry_event WHERE seq IN (SELECT seq FROM retry_event ORDER BY seq LIMIT ?)",
+                        (overflow,),
+                    )
+                    dropped = overflow
+            self._size += len(rows) - (dropped if overflow > 0 else 0)
+            self.evicted += dropped
+        if dropped:
+            logger.warning("Retry log full (%d events), evicted %d (%s)", self.max_events, dropped, self.eviction)
+        return len(rows)
+
+    def pending(self, exporter: str, limit: int) -> List[Tuple[int, dict]]:
+        """Oldest un-acknowledged events for ``exporter`` as ``(seq, event)``."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT seq, payload FROM retry_event WHERE exporter = ? ORDER BY seq LIMIT ?",
+                (exporter, limit),
+            ).fetchall()
+        return [(seq, json.loads(payload)) for seq, payload in rows]
+
+    def exporters(self) -> List[str]:
+        with self._lock:
+            return [row[0] for row in self._conn.execute("SELECT DISTINCT exporter FROM retry_event")]
+
+    def ack(self, seqs: Iterable[int]) -> None:
+        """Remove delivered events in one transaction."""
+        params = [(seq,) for seq in seqs]
+        if not params:
+            return
+        with self._lock, self._conn:
+            before = self._conn.total_changes
+            self._conn.executemany("DELETE FROM retry_event WHERE seq = ?", params)
+            self._size -= self._conn.total_changes - before
+
+    def mark_attempt(self, seq: int) -> None:
+        with self._lock, self._conn:
+            self._conn.execute("UPDATE retry_event SET attempts = attempts + 1 WHERE seq = ?", (seq,))
+
+    def checkpoint(self) -> None:
+        """Fold the WAL into the database file (this is where data is fsync'd)."""
+        with self._lock:
+            self._conn.execute("PRAGMA wal_checkpoint(PASSIVE)")
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+            self._conn.close()
+
+
+class RetryDrainer:
+    """Background thread replaying the retry log through each exporter.
+
+    Every ``interval`` seconds it sends up to ``batch_size`` events per
+    exporter, oldest first and at most ``rate_per_s`` per second. Events go
+    through the exporter's synchronous ``deliver`` (never the queued
+    ``send`` path), in chunks of the exporter's ``max_items`` (one event if it
+    does not batch), and a chunk is acknowledged only after ``deliver``
+    returned. The first failure for an exporter ends its pass so a dead
+    endpoint is not hammered.
+    """
+
+    def __init__(
+        self,
+        log: RetryLog,
+        exporters: Dict[str, object],
+        interval: float = 5.0,
+        batch_size: int = 100,
+        rate_per_s: float = 20.0,
+    ) -> None:
+        self.log = log
+        self.exporters = exporters
+        self.interval = interval
+        self.batch_size = batch_size
+        self.min_gap = 1.0 / rate_per_s if rate_per_s > 0 else 0.0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._work, name="retry-drainer", daemon=True)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self, timeout: float | None = None) -> None:
+        self._stop.set()
+        self._thread.join(timeout)
+
+    def drain_once(self) -> int:
+        delivered = 0
+        for name in self.log.exporters():
+            exporter = self.exporters.get(name)
+            if exporter is None:
+                continue
+            delivered += self._drain_exporter(name, exporter)
+        if delivered:
+            self.log.checkpoint()
+        return delivered
+
+    def _drain_exporter(self, name: str, exporter) -> int:
+        chunk_size = max(1, min(int(getattr(exporter, "max_items", 1)), self.batch_size))
+        pending = self.log.pending(name, self.batch_size)
+        delivered = 0
+        for start in range(0, len(pending), chunk_size):
+            if self._stop.is_set():
+                break
+            chunk = pending[start : start + chunk_size]
+            seqs = [seq for seq, _ in chunk]
+            try:
+                exporter.deliver([event for _, event in chunk])
+            except Exception as exc:  # noqa: BLE001
+                for seq in seqs:
+                    self.log.mark_attempt(seq)
+                logger.warning("Retry of %d events via %s failed: %s", len(seqs), name, exc)
+                break
+            self.log.ack(seqs)
+            delivered += len(seqs)
+            if self.min_gap:
+                self._stop.wait(self.min_gap * len(seqs))
+        if delivered:
+            logger.info("Replayed %d queued events via %s, %d left in retry log", delivered, name, len(self.log))
+        return delivered
+
+    def _work(self) -> None:
+        while not self._stop.is_set():
+            try:
+                self.drain_once()
+            except Exception as exc:  # noqa: BLE001
+                logger.error("Retry drainer failed: %s", exc)
+            self._stop.wait(self.interval)
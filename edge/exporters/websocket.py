@@ -1,27 +1,148 @@
-"""WebSocket exporter stub."""
+"""Persistent-connection WebSocket exporter."""
 from __future__ import annotations
 
 import asyncio
 import json
 import logging
+import random
+import threading
+from collections import deque
+from typing import Callable, Deque, List, Optional
+
 import websockets
 
 logger = logging.getLogger(__name__)
 
 
 class WebSocketExporter:
+    """Streams events over one long-lived WebSocket connection.
+
+    The connection lives on a background event loop thread; ``send`` only
+    appends to a bounded outbound queue and returns. Queued events are
+    pipelined onto the socket without waiting for replies, the connection is
+    kept alive with pings, and dropped connections are re-established with
+    jittered exponential backoff. An event is removed from the queue only
+    after it was written, so it is re-sent after a reconnect.
+    """
+
     name = "websocket"
 
     def __init__(self, config: dict) -> None:
         self.config = config
         self.endpoint = config.get("endpoint")
+        self.max_queue = int(config.get("max_queue", 1000))
+        self.ping_interval = float(config.get("ping_interval", 20))
+        self.ping_timeout = float(config.get("ping_timeout", 20))
+        self.backoff_initial = float(config.get("backoff_initial", 0.5))
+        self.backoff_max = float(config.get("backoff_max", 30))
+        self.on_failure: Optional[Callable[[List[dict]], None]] = None
+        self.connected = False
+        self._ws = None
+        self._outbox: Deque[dict] = deque()
+        self._loop = asyncio.new_event_loop()
+        self._wakeup = asyncio.Event()
+        self._closing = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self._thread: Optional[threading.Thread] = None
+        if self.endpoint:
+            self._task = self._loop.create_task(self._pump())
+            self._thread = threading.Thread(target=self._run_loop, name="websocket-exporter", daemon=True)
+            self._thread.start()
 
     def send(self, event: dict) -> None:
         if not self.endpoint:
             raise ValueError("WebSocket endpoint not configured")
-        logger.info("Sending event to WebSocket %s", self.endpoint)
-        asyncio.get_event_loop().run_until_complete(self._send(event))
+        if len(self._outbox) >= self.max_queue:
+            raise RuntimeError(f"WebSocket outbound queue is full ({self.max_queue} events)")
+        self._outbox.append(event)
+        self._loop.call_soon_threadsafe(self._wakeup.set)
+
+    def deliver(self, events: List[dict], timeout: float = 10.0) -> None:
+        """Write events on the open connection and wait until they were sent.
+
+        Raises if the exporter is not connected, so callers that need to know
+        the outcome (the retry drainer) do not lose events to the queue.
+        """
+        if not self.endpoint:
+            raise ValueError("WebSocket endpoint not configured")
+        if self._ws is None:
+            raise ConnectionError(f"WebSocket {self.endpoint} is not connected")
+        asyncio.run_coroutine_threadsafe(self._write(events), self._loop).result(timeout)
 
-    async def _send(self, event: dict) -> None:
-        async with websockets.connect(self.endpoint) as ws:  # type: ignore[arg-type]
+    async def _write(self, events: List[dict]) -> None:
+        ws = self._ws
+        if ws is None:
+            raise ConnectionError(f"WebSocket {self.endpoint} is not connected")
+        for event in events:
             await ws.send(json.dumps(event))
+
+    def close(self, timeout: float = 5.0) -> None:
+        """Stop the connection, handing undelivered events to ``on_failure``.
+
+        Queued events get ``timeout`` seconds to go out. The hand-off waits
+        for the loop thread to exit, so an event is never both sent and
+        handed on for retry.
+        """
+        if self._thread is None:
+            return
+        self._loop.call_soon_threadsafe(self._closing.set)
+        self._loop.call_soon_threadsafe(self._wakeup.set)
+        self._thread.join(timeout)
+        if self._thread.is_alive():
+            logger.warning("WebSocket %s still sending after %.1fs, stopping it", self.endpoint, timeout)
+            try:
+                self._loop.call_soon_threadsafe(self._task.cancel)
+            except RuntimeError:
+                pass  # the loop finished on its own meanwhile
+            self._thread.join()
+        pending = list(self._outbox)
+        self._outbox.clear()
+        if pending and self.on_failure is not None:
+            self.on_failure(pending)
+
+    def _run_loop(self) -> None:
+        asyncio.set_event_loop(self._loop)
+        try:
+            self._loop.run_until_complete(self._task)
+        except asyncio.CancelledError:
+            pass
+        finally:
+            self._loop.close()
+
+    async def _pump(self) -> None:
+        backoff = self.backoff_initial
+        while not self._closing.is_set():
+            try:
+                async with websockets.connect(  # type: ignore[arg-type]
+                    self.endpoint, ping_interval=self.ping_interval, ping_timeout=self.ping_timeout
+                ) as ws:
+                    logger.info("Connected to WebSocket %s", self.endpoint)
+                    self.connected = True
+                    self._ws = ws
+                    backoff = self.backoff_initial
+                    await self._drain(ws)
+            except Exception as exc:  # noqa: BLE001
+                if self._closing.is_set():
+                    break
+                delay = random.uniform(0, backoff)
+                logger.warning("WebSocket %s unavailable (%s), reconnecting in %.1fs", self.endpoint, exc, delay)
+                try:
+                    await asyncio.wait_for(self._closing.wait(), timeout=delay)
+                except asyncio.TimeoutError:
+                    pass
+                backoff = min(backoff * 2, self.backoff_max)
+            finally:
+                self.connected = False
+                self._ws = None
+
+    async def _drain(self, ws) -> None:
+        while True:
+            if not self._outbox:
+                if self._closing.is_set():
+                    return
+                self._wakeup.clear()
+                if not self._outbox:
+                    await self._wakeup.wait()
+                continue
+            await ws.send(json.dumps(self._outbox[0]))
+            self._outbox.popleft()
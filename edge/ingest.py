@@ -0,0 +1,229 @@
+"""Camera ingest: FFmpeg decoding straight into preallocated frame rings."""
+from __future__ import annotations
+
+import logging
+import random
+import subprocess
+import threading
+import time
+import weakref
+from collections import deque
+from typing import Deque, Iterator, List, Optional
+
+import numpy as np
+
+from settings import CameraConfig
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_WIDTH = 1280
+DEFAULT_HEIGHT = 720
+
+
+class Frame:
+    """One decoded BGR frame; ``image`` is a view into a ``FrameRing`` slot.
+
+    The slot is handed back to the ring when the last reference to the
+    ``Frame`` goes away, so stages keep the ``Frame`` (not only ``image``)
+    for as long as they read its pixels.
+    """
+
+    __slots__ = ("image", "camera_id", "seq", "timestamp", "__weakref__")
+
+    def __init__(self, image: np.ndarray, camera_id: int, seq: int, timestamp: float) -> None:
+        self.image = image
+        self.camera_id = camera_id
+        self.seq = seq
+        self.timestamp = timestamp
+
+
+class FrameRing:
+    """Fixed pool of frame buffers allocated once per camera.
+
+    The decoder reads each frame directly into a free slot through a
+    ``memoryview``, and downstream stages get ``Frame`` views of it, so
+    pixels are never copied between ingest, detection and OCR. When every
+    slot is still held downstream the new frame is decoded into a scratch
+    buffer and dropped (``overruns``).
+    """
+
+    def __init__(self, slots: int, height: int, width: int, channels: int = 3) -> None:
+        # Zeroed lazily by the OS (calloc), so untouched slots stay unmapped.
+        self.buffer = np.zeros((slots, height, width, channels), dtype=np.uint8)
+        self.scratch = np.empty((height, width, channels), dtype=np.uint8)
+        self.overruns = 0
+        self._free: Deque[int] = deque(range(slots))
+        self._lock = threading.Lock()
+
+    def acquire(self) -> Optional[int]:
+        with self._lock:
+            # Most recently released first: slots never needed stay untouched
+            # and never become resident memory.
+            return self._free.pop() if self._free else None
+
+    def release(self, slot: int) -> None:
+        with self._lock:
+            self._free.append(slot)
+
+    def view(self, slot: Optional[int]) -> memoryview:
+        """Writable byte view of ``slot``, or of the scratch buffer for ``None``."""
+        target = self.scratch if slot is None else self.buffer[slot]
+        return memoryview(target).cast("B")
+
+    def frame(self, slot: int, camera_id: int, seq: int) -> Frame:
+        frame = Frame(self.buffer[slot], camera_id, seq, time.time())
+        weakref.finalize(frame, self.release, slot)
+        return frame
+
+
+def _read_exact(stream, view: memoryview) -> bool:
+    """Fill ``view`` from ``stream``; False if the stream ended first."""
+    filled = 0
+    while filled < len(view):
+        count = stream.readinto(view[filled:])
+        if not count:
+            return False
+        filled += count
+    return True
+
+
+class FFmpegIngest:
+    """Decodes one camera stream with an ``ffmpeg`` subprocess.
+
+    FFmpeg converts to raw BGR at the camera's ``resolution_width`` x
+    ``resolution_height`` (``ingest.width``/``height`` when unset) and keeps
+    only every ``sample_every``-th frame, so dropped frames never cross the
+    pipe. ``ingest.hwaccel`` selects hardware decoding (``auto``, ``vaapi``,
+    ``v4l2m2m`` ...). When the stream ends or FFmpeg exits the ingest
+    reconnects with jittered exponential backoff, unless ``reconnect`` is off.
+    A local video file works as ``rtsp_url`` too; ``realtime`` paces it at
+    its native frame rate like a live camera.
+    """
+
+    def __init__(self, camera: CameraConfig, options: Optional[dict] = None) -> None:
+        options = options or {}
+        self.camera = camera
+        self.rtsp_url = camera.rtsp_url
+        self.width = int(camera.resolution_width or options.get("width", DEFAULT_WIDTH))
+        self.height = int(camera.resolution_height or options.get("height", DEFAULT_HEIGHT))
+        self.sample_every = max(1, int(camera.sample_every))
+        self.ffmpeg = options.get("ffmpeg", "ffmpeg")
+        self.hwaccel = options.get("hwaccel")
+        self.rtsp_transport = options.get("rtsp_transport", "tcp")
+        self.reconnect = bool(options.get("reconnect", True))
+        self.realtime = bool(options.get("realtime", False))
+        self.backoff_initial = float(options.get("backoff_initial", 0.5))
+        self.backoff_max = float(options.get("backoff_max", 30))
+        self.ring = FrameRing(int(options.get("ring_slots", 16)), self.height, self.width)
+        self.decoded = 0
+        self._seq = 0
+        self._closed = threading.Event()
+        self._process: Optional[subprocess.Popen] = None
+
+    def _command(self) -> List[str]:
+        command = [self.ffmpeg, "-hide_banner", "-loglevel", "error", "-nostdin"]
+        if self.rtsp_url.startswith("rtsp://"):
+            command += ["-rtsp_transport", self.rtsp_transport]
+        if self.hwaccel:
+            command += ["-hwaccel", str(self.hwaccel)]
+        if self.realtime:
+            command.append("-re")
+        filters = [f"scale={self.width}:{self.height}"]
+        if self.sample_every > 1:
+            filters.insert(0, f"select=not(mod(n\\,{self.sample_every}))")
+        command += ["-i", self.rtsp_url, "-an", "-vf", ",".join(filters), "-fps_mode", "passthrough"]
+        return command + ["-f", "rawvideo", "-pix_fmt", "bgr24", "pipe:1"]
+
+    def frames(self) -> Iterator[Frame]:
+        logger.info("Starting ingest for %s (%dx%d)", self.rtsp_url, self.width, self.height)
+        backoff = self.backoff_initial
+        while not self._closed.is_set():
+            try:
+                for frame in self._decode():
+                    backoff = self.backoff_initial
+                    yield frame
+            except OSError as exc:
+                logger.warning("Ingest for %s failed: %s", self.rtsp_url, exc)
+            if self._closed.is_set() or not self.reconnect:
+                return
+            delay = random.uniform(0, backoff)
+            logger.warning("Stream %s ended, reconnecting in %.1fs", self.rtsp_url, delay)
+            self._closed.wait(delay)
+            backoff = min(backoff * 2, self.backoff_max)
+
+    def _decode(self) -> Iterator[Frame]:
+        process = self._process = subprocess.Popen(
+            self._command(), stdout=subprocess.PIPE, stdin=subprocess.DEVNULL, bufsize=0
+        )
+        try:
+            while not self._closed.is_set():
+                slot = self.ring.acquire()
+                if not _read_exact(process.stdout, self.ring.view(slot)):
+                    if slot is not None:
+                        self.ring.release(slot)
+                    return
+                self.decoded += 1
+                if slot is None:
+                    self.ring.overruns += 1
+                    continue
+                self._seq += 1
+                yield self.ring.frame(slot, self.camera.id, self._seq)
+        finally:
+            self._stop_process(process)
+
+    @staticmethod
+    def _stop_process(process: subprocess.Popen) -> None:
+        if process.poll() is None:
+            process.terminate()
+            try:
+                process.wait(timeout=5)
+            except subprocess.TimeoutExpired:
+                process.kill()
+                process.wait()
+        process.stdout.close()
+
+    def close(self) -> None:
+        self._closed.set()
+        process = self._process
+        if process is not None and process.poll() is None:
+            # Unblocks a read waiting on the pipe; the decode loop reaps the process.
+            process.terminate()
+
+
+class SyntheticIngest:
+    """Blank frames once per second through the same ring, for development without cameras."""
+
+    def __init__(self, camera: CameraConfig, options: Optional[dict] = None) -> None:
+        options = options or {}
+        self.camera = camera
+        self.rtsp_url = camera.rtsp_url
+        width = int(camera.resolution_width or options.get("width", DEFAULT_WIDTH))
+        height = int(camera.resolution_height or options.get("height", DEFAULT_HEIGHT))
+        self.interval = float(options.get("interval_s", 1.0))
+        self.ring = FrameRing(int(options.get("ring_slots", 16)), height, width)
+        self._seq = 0
+        self._closed = threading.Event()
+
+    def frames(self) -> Iterator[Frame]:
+        while not self._closed.is_set():
+            slot = self.ring.acquire()
+            if slot is None:
+                self.ring.overruns += 1
+            else:
+                self._seq += 1
+                yield self.ring.frame(slot, self.camera.id, self._seq)
+            self._closed.wait(self.interval)
+
+    def close(self) -> None:
+        self._closed.set()
+
+
+INGESTS = {"ffmpeg": FFmpegIngest, "synthetic": SyntheticIngest}
+
+
+def create_ingest(camera: CameraConfig, options: Optional[dict] = None):
+    options = options or {}
+    backend = options.get("backend", "ffmpeg")
+    if backend not in INGESTS:
+        raise ValueError(f"Unknown ingest backend {backend!r}, expected one of {sorted(INGESTS)}")
+    return INGESTS[backend](camera, options)
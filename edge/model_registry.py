@@ -0,0 +1,134 @@
+"""Process-wide registry of loaded models: lazy, shared and kept within a memory budget."""
+from __future__ import annotations
+
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Hashable, Optional
+
+logger = logging.getLogger(__name__)
+
+
+def file_size(path: Optional[str]) -> int:
+    """Size of a weights file in bytes, the registry's estimate of a model's memory; 0 if unknown."""
+    try:
+        return os.path.getsize(path) if path else 0
+    except OSError:
+        return 0
+
+
+def _name(key: Hashable) -> Hashable:
+    return key[0] if isinstance(key, tuple) else key
+
+
+@dataclass
+class _Entry:
+    model: Any
+    size: int
+
+
+class ModelRegistry:
+    """Loads each model on first use and shares it between everyone asking for the same key.
+
+    Detectors and OCR engines ``retain`` their key when they are built,
+    which costs nothing, and call ``get`` with a loader whenever they need
+    the model. The first ``get`` loads it (concurrent callers wait for that
+    one load); later calls, from any camera or pipeline in the process, get
+    the same object. With a ``budget`` (bytes) the least recently used
+    models are unloaded once the loaded ones exceed it and are loaded again
+    on their next use. A model is dropped as soon as its last user
+    ``release``s it; keys nobody retains are loaded but never kept.
+    """
+
+    def __init__(self, budget: Optional[int] = None) -> None:
+        self.budget = budget
+        self.loads = 0
+        self.evictions = 0
+        self._entries: "OrderedDict[Hashable, _Entry]" = OrderedDict()
+        self._users: Dict[Hashable, int] = {}
+        self._loading: Dict[Hashable, threading.Lock] = {}
+        self._lock = threading.Lock()
+
+    def configure(self, budget_mb: Optional[float]) -> None:
+        with self._lock:
+            self.budget = None if budget_mb is None else int(float(budget_mb) * 2**20)
+            self._evict()
+
+    def retain(self, key: Hashable) -> None:
+        with self._lock:
+            self._users[key] = self._users.get(key, 0) + 1
+
+    def release(self, key: Hashable) -> None:
+        with self._lock:
+            users = self._users.get(key, 0) - 1
+            if users > 0:
+                self._users[key] = users
+                return
+            self._users.pop(key, None)
+            if self._entries.pop(key, None) is not None:
+                logger.info("Unloaded model %s, no longer used", _name(key))
+
+    def get(self, key: Hashable, loader: Callable[[], Any], size: int = 0) -> Any:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                return entry.model
+            loading = self._loading.setdefault(key, threading.Lock())
+        with loading:
+            with self._lock:
+                entry = self._entries.get(key)
+                if entry is not None:
+                    self._entries.move_to_end(key)
+                    return entry.model
+            started = time.perf_counter()
+            try:
+                model = loader()
+            except BaseException:
+                with self._lock:
+                    self._loading.pop(key, None)
+                raise
+            logger.info("Loaded model %s in %.0f ms", _name(key), (time.perf_counter() - started) * 1000)
+            with self._lock:
+                self._loading.pop(key, None)
+                self.loads += 1
+                # Released while loading (a config reload swapped its owner): use once, do not keep.
+                if key in self._users:
+                    self._entries[key] = _Entry(model, size)
+                    self._evict(keep=key)
+            return model
+
+    def _evict(self, keep: Optional[Hashable] = None) -> None:
+        # Called with ``_lock`` held. Callers still holding an evicted model
+        # keep using it; it is freed when they let go.
+        if self.budget is None:
+            return
+        while self.used() > self.budget:
+            victim = next((key for key in self._entries if key != keep), None)
+            if victim is None:
+                return
+            del self._entries[victim]
+            self.evictions += 1
+            logger.info("Unloaded model %s to stay within the memory budget", _name(victim))
+
+    def used(self) -> int:
+        return sum(entry.size for entry in self._entries.values())
+
+    def loaded(self) -> list:
+        with self._lock:
+            return list(self._entries)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "loaded": len(self._entries),
+                "bytes": self.used(),
+                "loads": self.loads,
+                "evictions": self.evictions,
+            }
+
+
+registry = ModelRegistry()
@@ -0,0 +1,100 @@
+"""Cheap motion gate that keeps idle frames away from the detector."""
+from __future__ import annotations
+
+from typing import Optional, Sequence, Tuple
+
+import numpy as np
+
+from zones import points_in_polygon
+
+# BGR weights of the usual luma conversion.
+_LUMA = np.array([0.114, 0.587, 0.299], dtype=np.float32)
+
+
+class MotionGate:
+    """Frame differencing against a running-average background, inside the ROI.
+
+    Frames are subsampled by ``scale`` in both directions (a strided view, no
+    copy) and only the bounding box of the region of interest is converted
+    to grey and compared, so a gate check costs a small fraction of a
+    detector call. The ROI is the union of the camera's zone polygons, or
+    the whole frame when it has none. A frame passes when at least
+    ``min_area`` of the ROI changed by more than ``threshold`` grey levels;
+    ``hold_frames`` more frames pass after the last motion so the tracker
+    sees plates leave and can retire their tracks.
+    """
+
+    def __init__(self, config: Optional[dict] = None) -> None:
+        config = config or {}
+        self.scale = max(1, int(config.get("scale", 4)))
+        self.threshold = float(config.get("threshold", 25))
+        self.min_area = float(config.get("min_area", 0.002))
+        self.learning_rate = float(config.get("learning_rate", 0.05))
+        self.hold_frames = int(config.get("hold_frames", 8))
+        self.passed = 0
+        self.skipped = 0
+        self._polygons: Sequence[np.ndarray] = ()
+        self._roi: Optional[Tuple[slice, slice, np.ndarray]] = None
+        self._background: Optional[np.ndarray] = None
+        self._shape: Tuple[int, ...] = ()
+        self._hold_left = 0
+
+    def set_roi(self, polygons: Sequence[np.ndarray]) -> None:
+        """Restrict the gate to ``polygons`` (frame pixels); empty means the whole frame."""
+        polygons = list(polygons)
+        if len(polygons) == len(self._polygons) and all(
+            np.array_equal(new, old) for new, old in zip(polygons, self._polygons)
+        ):
+            return  # keep the learned background
+        self._polygons = polygons
+        self._roi = None
+
+    def _build_roi(self, height: int, width: int) -> Tuple[slice, slice, np.ndarray]:
+        if not self._polygons:
+            return slice(0, height), slice(0, width), np.ones((height, width), dtype=bool)
+        # Sample every polygon at the centres of the subsampled pixels.
+        ys, xs = np.mgrid[0:height, 0:width]
+        centres = np.column_stack([xs.ravel(), ys.ravel()]).astype(np.float64) * self.scale
+        mask = np.zeros(height * width, dtype=bool)
+        for polygon in self._polygons:
+            mask |= points_in_polygon(centres, polygon)
+        mask = mask.reshape(height, width)
+        rows, cols = np.flatnonzero(mask.any(axis=1)), np.flatnonzero(mask.any(axis=0))
+        if not len(rows):
+            # Zones drawn outside this resolution: gating on nothing would blind the camera.
+            return slice(0, height), slice(0, width), np.ones((height, width), dtype=bool)
+        window_y, window_x = slice(rows[0], rows[-1] + 1), slice(cols[0], cols[-1] + 1)
+        return window_y, window_x, mask[window_y, window_x]
+
+    def check(self, image: np.ndarray) -> bool:
+        """True if ``image`` should go to the detector."""
+        small = image[:: self.scale, :: self.scale]
+        roi = self._roi
+        if roi is None or small.shape[:2] != self._shape:
+            # New zones or a new resolution: rebuild the mask and relearn the background.
+            self._shape = small.shape[:2]
+            roi = self._roi = self._build_roi(*self._shape)
+            self._background = None
+        window_y, window_x, mask = roi
+        grey = small[window_y, window_x] @ _LUMA
+        if self._background is None:
+            self._background = grey
+            return self._admit(True)
+        delta = grey - self._background
+        changed = np.count_nonzero((np.abs(delta) > self.threshold) & mask)
+        self._background += self.learning_rate * delta
+        return self._admit(changed >= max(1.0, self.min_area * np.count_nonzero(mask)))
+
+    def _admit(self, motion: bool) -> bool:
+        if motion:
+            self._hold_left = self.hold_frames
+        elif self._hold_left > 0:
+            self._hold_left -= 1
+        else:
+            self.skipped += 1
+            return False
+        self.passed += 1
+        return True
+
+    def stats(self) -> dict:
+        return {"passed": self.passed, "skipped": self.skipped}
@@ -0,0 +1,114 @@
+"""Per-track OCR cache and temporal plate consensus."""
+from __future__ import annotations
+
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Dict, Optional, Tuple
+
+import numpy as np
+
+from ocr.ensemble import EnsembleResult
+
+if TYPE_CHECKING:
+    from tracker import Track
+
+TrackKey = Tuple[int, int]
+
+
+@dataclass
+class _TrackState:
+    votes: Dict[str, float] = field(default_factory=dict)
+    engines: Dict[str, None] = field(default_factory=dict)
+    readings: int = 0
+    streak: int = 0
+    last_text: str = ""
+    stable: bool = False
+    emitted: bool = False
+    # Most confident crop per text, so the event shows a crop that reads as the winner.
+    crops: Dict[str, Tuple[float, np.ndarray]] = field(default_factory=dict)
+
+
+class TemporalConsensus:
+    """Fuses OCR readings of a track across frames into one plate event.
+
+    Readings are accumulated with confidence-weighted voting. The consensus
+    confidence is the winning text's vote total divided by the number of
+    readings, so disagreement between frames lowers it. A track is emitted
+    exactly once: as soon as it has ``min_readings`` readings and the
+    consensus confidence reaches ``emit_confidence``, or otherwise when the
+    track ends. The emitted result carries the most confident crop of the
+    winning text. Once the same text has won ``stable_after`` readings in a
+    row (or the track was emitted) the track is cached and ``needs_ocr``
+    returns False so the pipeline stops re-recognizing it.
+    """
+
+    def __init__(self, config: dict) -> None:
+        self.emit_confidence = float(config.get("emit_confidence", 0.9))
+        self.min_readings = int(config.get("min_readings", 2))
+        self.stable_after = int(config.get("stable_after", 3))
+        self.finished_history = int(config.get("finished_history", 4096))
+        self._states: Dict[TrackKey, _TrackState] = {}
+        self._finished: "OrderedDict[TrackKey, None]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def needs_ocr(self, camera_id: int, track_id: int) -> bool:
+        key = (camera_id, track_id)
+        with self._lock:
+            if key in self._finished:
+                return False
+            state = self._states.get(key)
+            return state is None or not (state.stable or state.emitted)
+
+    def add(self, camera_id: int, track: Track, result: EnsembleResult) -> Optional[EnsembleResult]:
+        """Record a reading; returns the consensus if the track should be emitted now."""
+        key = (camera_id, track.track_id)
+        with self._lock:
+            if key in self._finished:
+                return None
+            state = self._states.setdefault(key, _TrackState())
+            if state.emitted or not result.text:
+                return None
+            state.readings += 1
+            state.votes[result.text] = state.votes.get(result.text, 0.0) + result.confidence
+            state.engines.update(dict.fromkeys(result.engines))
+            best = state.crops.get(result.text)
+            if result.crop is not None and (best is None or result.confidence > best[0]):
+                state.crops[result.text] = (result.confidence, result.crop)
+            leader = max(state.votes, key=state.votes.get)
+            state.streak = state.streak + 1 if leader == state.last_text else 1
+            state.last_text = leader
+            if state.streak >= self.stable_after:
+                state.stable = True
+            consensus = self._consensus(state)
+            if state.readings >= self.min_readings and consensus.confidence >= self.emit_confidence:
+                state.emitted = True
+                return consensus
+            return None
+
+    def finish(self, camera_id: int, track: Track) -> Optional[EnsembleResult]:
+        """Forget an ended track; returns its consensus unless it was already emitted."""
+        key = (camera_id, track.track_id)
+        with self._lock:
+            state = self._states.pop(key, None)
+            self._finished[key] = None
+            while len(self._finished) > self.finished_history:
+                self._finished.popitem(last=False)
+            if state is None or state.emitted or not state.votes:
+                return None
+            return self._consensus(state)
+
+    def __len__(self) -> int:
+        return len(self._states)
+
+    @staticmethod
+    def _consensus(state: _TrackState) -> EnsembleResult:
+        text = max(state.votes, key=state.votes.get)
+        best = state.crops.get(text)
+        return EnsembleResult(
+            text=text,
+            confidence=state.votes[text] / state.readings,
+            engines=list(state.engines),
+            readings=state.readings,
+            crop=best[1] if best else None,
+        )
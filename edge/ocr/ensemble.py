@@ -1,8 +1,22 @@
-from dataclasses import dataclass
+from __future__ import annotations
+
+import json
+import logging
+from abc import ABC, abstractmethod
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass, field
 from datetime import datetime
-from typing import Dict, List
+from typing import TYPE_CHECKING, Dict, Iterator, List, Optional, Tuple
 
-from pipeline import Detection
+import numpy as np
+
+from model_registry import ModelRegistry, file_size, registry as default_registry
+
+if TYPE_CHECKING:
+    from tracker import Track
+
+logger = logging.getLogger(__name__)
 
 
 @dataclass
@@ -11,55 +25,205 @@ class OCRResult:
     confidence: float
 
 
-class CRNNRecognizer:
-    def __init__(self, config: dict) -> None:
-        self.config = config
+class Recognizer(ABC):
+    """Base class for plate recognizers; engines implement ``load`` and ``_recognize``.
 
-    def recognize(self, frame: bytes, detection: Detection) -> OCRResult:
-        return OCRResult(text="CRNN123", confidence=0.8)
+    Engines get the shared, read-only ``(n, height, width)`` grey crop batch
+    from ``ocr.crops.PlateCropper`` and must not modify it. The model comes
+    from the model registry on every batch, so it is loaded on first use,
+    shared with engines of the same configuration and may be unloaded in
+    between; engines must not keep their own reference to it.
+    """
 
+    name = "recognizer"
 
-class TransformerRecognizer:
-    def __init__(self, config: dict) -> None:
+    def __init__(self, config: dict, registry: Optional[ModelRegistry] = None) -> None:
         self.config = config
+        self.registry = registry or default_registry
+        self.weights = config.get("weights_path") or config.get("checkpoint")
+        self.key = (self.name, json.dumps(config, sort_keys=True, default=str))
+        self.registry.retain(self.key)
 
-    def recognize(self, frame: bytes, detection: Detection) -> OCRResult:
-        return OCRResult(text="TRF123", confidence=0.85)
+    def load(self):
+        """Load the engine's model. The stub engines have no model and return the weights path."""
+        return self.weights
 
+    def recognize(self, crop: np.ndarray) -> OCRResult:
+        return self.recognize_batch(crop[None])[0]
 
-class TesseractRecognizer:
-    def __init__(self, config: dict) -> None:
-        self.config = config
+    def recognize_batch(self, crops: np.ndarray) -> List[OCRResult]:
+        model = self.registry.get(self.key, self.load, file_size(self.weights))
+        return self._recognize(model, crops)
+
+    @abstractmethod
+    def _recognize(self, model, crops: np.ndarray) -> List[OCRResult]:
+        """Read every crop of the batch with the loaded ``model``."""
+
+    def close(self) -> None:
+        self.registry.release(self.key)
+
+
+class CRNNRecognizer(Recognizer):
+    name = "crnn"
+
+    def _recognize(self, model, crops: np.ndarray) -> List[OCRResult]:
+        return [OCRResult(text="CRNN123", confidence=0.8) for _ in crops]
+
+
+class TransformerRecognizer(Recognizer):
+    name = "transformer"
 
-    def recognize(self, frame: bytes, detection: Detection) -> OCRResult:
-        return OCRResult(text="TESS123", confidence=0.75)
+    def _recognize(self, model, crops: np.ndarray) -> List[OCRResult]:
+        return [OCRResult(text="TRF123", confidence=0.85) for _ in crops]
+
+
+class TesseractRecognizer(Recognizer):
+    name = "tesseract"
+
+    def _recognize(self, model, crops: np.ndarray) -> List[OCRResult]:
+        return [OCRResult(text="TESS123", confidence=0.75) for _ in crops]
+
+
+RECOGNIZERS = {"crnn": CRNNRecognizer, "transformer": TransformerRecognizer, "tesseract": TesseractRecognizer}
+
+
+@dataclass
+class EnsembleResult:
+    text: str
+    confidence: float
+    engines: List[str] = field(default_factory=list)
+    skipped: List[str] = field(default_factory=list)  # cancelled or ignored after an early exit
+    failed: List[str] = field(default_factory=list)  # raised while reading the batch
+    readings: int = 1
+    crop: Optional[np.ndarray] = None  # the plate crop the text was read from
 
 
 class OCREnsemble:
-    def __init__(self, config: Dict):
+    """Votes over the CRNN, Transformer and Tesseract readings of each plate.
+
+    Only engines whose section does not set ``enabled: false`` are built,
+    and building one does not load its model (see ``Recognizer``).
+    With ``aggregator.parallel`` the engines run concurrently on a thread pool.
+    With ``aggregator.early_exit.enabled`` the vote is settled as soon as the
+    first engine to finish clears ``confidence`` or ``agreement`` engines read
+    the same text; remaining engines are cancelled (or ignored if already
+    running) and reported in ``EnsembleResult.skipped``. Engines that raise
+    are left out of the vote and reported in ``EnsembleResult.failed``.
+    """
+
+    def __init__(self, config: Dict, registry: Optional[ModelRegistry] = None):
         self.config = config
-        self.crnn = CRNNRecognizer(config.get("crnn", {}))
-        self.transformer = TransformerRecognizer(config.get("transformer", {}))
-        self.tesseract = TesseractRecognizer(config.get("tesseract", {}))
-
-    def recognize(self, frame: bytes, detection: Detection) -> str:
-        candidates: List[OCRResult] = [
-            self.crnn.recognize(frame, detection),
-            self.transformer.recognize(frame, detection),
-            self.tesseract.recognize(frame, detection),
+        self.engines: List[Recognizer] = [
+            engine(config.get(name, {}), registry)
+            for name, engine in RECOGNIZERS.items()
+            if config.get(name, {}).get("enabled", True)
         ]
+        if not self.engines:
+            raise ValueError("No OCR engine is enabled")
+
+        aggregator = config.get("aggregator", {})
+        early_exit = aggregator.get("early_exit") or {}
+        self.early_exit = bool(early_exit.get("enabled", False))
+        self.exit_confidence = float(early_exit.get("confidence", 0.9))
+        self.exit_agreement = int(early_exit.get("agreement", 2))
+        self._executor: Optional[ThreadPoolExecutor] = None
+        if aggregator.get("parallel", False):
+            self._executor = ThreadPoolExecutor(max_workers=len(self.engines), thread_name_prefix="ocr")
+
+    def close(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+        for engine in self.engines:
+            engine.close()
+
+    def recognize(self, crop: np.ndarray) -> EnsembleResult:
+        return self.recognize_batch(crop[None])[0]
+
+    def recognize_batch(self, crops: np.ndarray) -> List[EnsembleResult]:
+        """Recognize every plate of a crop batch with one call per engine; all engines share ``crops``."""
+        if not len(crops):
+            return []
+        finished: Dict[str, List[OCRResult]] = {}
+        failed: List[str] = []
+        for name, results in self._run_engines(crops):
+            if results is None:
+                failed.append(name)
+                continue
+            finished[name] = results
+            if self.early_exit and all(self._decided(finished, index) for index in range(len(crops))):
+                break
+        skipped = [engine.name for engine in self.engines if engine.name not in finished.keys() | failed]
+        results = [self._vote(finished, index, skipped, failed) for index in range(len(crops))]
+        for result, crop in zip(results, crops):
+            result.crop = crop
+        return results
+
+    def _run_engines(self, crops: np.ndarray) -> Iterator[Tuple[str, Optional[List[OCRResult]]]]:
+        """Yield ``(engine name, results)`` in the order engines finish; results are None if it raised."""
+        if self._executor is None:
+            for engine in self.engines:
+                try:
+                    results = engine.recognize_batch(crops)
+                except Exception as exc:  # noqa: BLE001
+                    logger.error("OCR engine %s failed: %s", engine.name, exc)
+                    results = None
+                yield engine.name, results
+            return
+
+        futures = {
+            self._executor.submit(engine.recognize_batch, crops): engine.name
+            for engine in self.engines
+        }
+        try:
+            for future in as_completed(futures):
+                try:
+                    results = future.result()
+                except Exception as exc:  # noqa: BLE001
+                    logger.error("OCR engine %s failed: %s", futures[future], exc)
+                    results = None
+                yield futures[future], results
+        finally:
+            for future in futures:
+                future.cancel()
+
+    def _decided(self, finished: Dict[str, List[OCRResult]], index: int) -> bool:
+        readings = [results[index] for results in finished.values()]
+        if len(readings) == 1 and readings[0].confidence >= self.exit_confidence:
+            return True
+        counts = Counter(reading.text for reading in readings)
+        return counts.most_common(1)[0][1] >= self.exit_agreement
+
+    @staticmethod
+    def _vote(
+        finished: Dict[str, List[OCRResult]], index: int, skipped: List[str], failed: List[str]
+    ) -> EnsembleResult:
         votes: Dict[str, float] = {}
-        for candidate in candidates:
+        for results in finished.values():
+            candidate = results[index]
             votes[candidate.text] = votes.get(candidate.text, 0) + candidate.confidence
-        return max(votes, key=votes.get)
-
-    def build_event(self, track, plate_text: str) -> dict:
+        if not votes:
+            return EnsembleResult(text="", confidence=0.0, skipped=skipped, failed=failed)
+        text = max(votes, key=votes.get)
+        engines = [name for name, results in finished.items() if results[index].text == text]
+        return EnsembleResult(
+            text=text, confidence=votes[text] / len(engines), engines=engines, skipped=skipped, failed=failed
+        )
+
+    def build_event(
+        self, track: Track, result: EnsembleResult, camera_id: int, crop_url: Optional[str] = None
+    ) -> dict:
         return {
-            "plate_text": plate_text,
-            "camera_id": 1,
+            "plate_text": result.text,
+            "confidence": result.confidence,
+            "camera_id": camera_id,
+            "zone_id": track.zone_id,
+            "direction": track.direction,
             "timestamp": datetime.utcnow().isoformat(),
+            "crop_url": crop_url,
             "raw_payload": {
                 "track_id": track.track_id,
                 "bbox": track.detection.bbox,
+                "ocr_engines": result.engines,
+                "ocr_readings": result.readings,
             },
         }
@@ -4,52 +4,140 @@ from __future__ import annotations
 import logging
 import random
 import string
-import time
-from dataclasses import dataclass
-from typing import Iterator
+import threading
+from contextlib import contextmanager
+from typing import Any, Dict, Iterable, Iterator, Optional, Sequence
 
-from settings import EdgeConfig, load_config
+from settings import CameraConfig, EdgeConfig, load_config, resolve_cameras
+from detector import Detection, create_detector  # noqa: F401  (Detection re-exported)
+from ingest import Frame, create_ingest
+from model_registry import registry
+from motion import MotionGate
+from config_sync import ConfigSync, EntityDelta, overlay
+from scheduler import Batch, BatchPolicy, InferenceScheduler
+from stages import BLOCK, BoundedQueue, Stage
 from tracker import CentroidTracker
+from zones import ZoneAssigner
+from ocr.consensus import TemporalConsensus
+from ocr.crops import CropStore, PlateCropper
 from ocr.ensemble import OCREnsemble
 from exporters.dispatcher import ExportDispatcher
 
 logger = logging.getLogger(__name__)
 
 
-@dataclass
-class Detection:
-    bbox: tuple[int, int, int, int]
-    score: float
-    label: str
+def _ingest_settings(camera: CameraConfig) -> tuple:
+    return camera.rtsp_url, camera.resolution_width, camera.resolution_height, camera.sample_every
 
 
-class RTSPIngest:
-    def __init__(self, rtsp_url: str) -> None:
-        self.rtsp_url = rtsp_url
+class _Swappable:
+    """The current detector or OCR ensemble, replaceable while stage workers use it.
 
-    def frames(self) -> Iterator[bytes]:
-        logger.info("Starting RTSP ingest for %s", self.rtsp_url)
-        while True:
-            yield b"fake-frame"
-            time.sleep(1)
+    Workers take the current object with ``use`` for one item. ``swap``
+    installs a new one at once, but the replaced object is closed only after
+    the last call that was already using it has returned.
+    """
 
+    def __init__(self, current: Any) -> None:
+        self.current = current
+        self._users: Dict[int, int] = {}
+        self._retired: Dict[int, Any] = {}
+        self._lock = threading.Lock()
 
-class Detector:
-    def __init__(self, config: dict) -> None:
-        self.config = config
+    @contextmanager
+    def use(self) -> Iterator[Any]:
+        with self._lock:
+            current = self.current
+            self._users[id(current)] = self._users.get(id(current), 0) + 1
+        try:
+            yield current
+        finally:
+            with self._lock:
+                users = self._users.pop(id(current)) - 1
+                if users:
+                    self._users[id(current)] = users
+                retired = self._retired.pop(id(current), None) if not users else None
+            if retired is not None:
+                retired.close()
+
+    def swap(self, new: Any) -> None:
+        with self._lock:
+            old, self.current = self.current, new
+            if id(old) in self._users:
+                self._retired[id(old)] = old
+                return
+        old.close()
 
-    def detect(self, frame: bytes) -> list[Detection]:
-        return [Detection(bbox=(0, 0, 100, 50), score=0.9, label="plate")]
+    def close(self) -> None:
+        self.current.close()
 
 
 class EdgePipeline:
-    def __init__(self, config: EdgeConfig) -> None:
+    def __init__(self, config: EdgeConfig, sync: Optional[ConfigSync] = None) -> None:
+        self.base_config = config
+        self.sync = sync
+        if sync is not None:
+            config = overlay(config, sync.entities)
         self.config = config
-        self.ingest = RTSPIngest(config.rtsp_url)
-        self.detector = Detector(config.detectors)
-        self.tracker = CentroidTracker(max_disappeared=5)
-        self.ocr = OCREnsemble(config.ocr)
+        self.cameras = resolve_cameras(config)
+        if not self.cameras and sync is None:
+            raise ValueError("No enabled cameras configured")
+        self.ingests = {camera.id: create_ingest(camera, config.ingest) for camera in self.cameras}
+        # Models load on first use and are shared by every pipeline in the process.
+        registry.configure(config.model_cache.get("memory_budget_mb"))
+        self._detector = _Swappable(create_detector(config.detectors))
+        self.trackers = {camera.id: self._new_tracker() for camera in self.cameras}
+        self.zones = ZoneAssigner()
+        self.zones.update(config.zones, self.cameras)
+        self.gates: Dict[int, MotionGate] = {}
+        self._update_gates()
+        self._ocr = _Swappable(OCREnsemble(config.ocr))
+        self.cropper, self.crop_store = self._new_crops(config.ocr)
+        consensus = config.ocr.get("consensus", {})
+        self.consensus = TemporalConsensus(consensus) if consensus.get("enabled", False) else None
         self.exporter = ExportDispatcher(config.exporters)
+        self._stop = threading.Event()
+        self._reload_lock = threading.Lock()
+        self._scheduler: Optional[InferenceScheduler] = None
+        self._ingest_threads: Dict[int, threading.Thread] = {}
+
+    @property
+    def detector(self):
+        return self._detector.current
+
+    @property
+    def ocr(self) -> OCREnsemble:
+        return self._ocr.current
+
+    def _update_gates(self, rebuild: bool = False) -> None:
+        """One motion gate per gated camera, with the camera's zone polygons as its ROI."""
+        motion = self.config.ingest.get("motion", {})
+        gates = {}
+        for camera in self.cameras:
+            if not (motion.get("enabled", False) if camera.motion_gate is None else camera.motion_gate):
+                continue
+            gate = None if rebuild else self.gates.get(camera.id)
+            gate = gate or MotionGate(motion)
+            gate.set_roi(self.zones.polygons(camera.id))
+            gates[camera.id] = gate
+        self.gates = gates
+
+    def _admit(self, camera_id: int, frame: Frame) -> bool:
+        """False for frames the camera's motion gate keeps away from the detector."""
+        gate = self.gates.get(camera_id)
+        return gate is None or gate.check(frame.image)
+
+    def _gate_stats(self) -> dict:
+        return {camera_id: gate.stats() for camera_id, gate in self.gates.items()}
+
+    @staticmethod
+    def _new_crops(ocr: dict) -> tuple:
+        crop = ocr.get("crop", {})
+        store = crop.get("store") or {}
+        return PlateCropper(crop), CropStore(store) if store.get("path") else None
+
+    def _new_tracker(self) -> CentroidTracker:
+        return CentroidTracker(**{"max_disappeared": 5, **self.config.tracker})
 
     @staticmethod
     def _fake_plate() -> str:
@@ -58,23 +146,294 @@ class EdgePipeline:
         return f"{letters}{digits}"
 
     def run(self) -> None:
-        logger.info("Edge pipeline starting")
-        for frame in self.ingest.frames():
-            detections = self.detector.detect(frame)
-            tracked = self.tracker.update(detections)
-            for track in tracked:
-                plate_text = self.ocr.recognize(frame, track) or self._fake_plate()
-                event = self.ocr.build_event(track, plate_text)
-                logger.info("Generated event %s", event)
-                self.exporter.dispatch(event)
-            time.sleep(10)
+        mode = self.config.pipeline.get("mode", "sequential")
+        logger.info("Edge pipeline starting in %s mode for %d camera(s)", mode, len(self.cameras))
+        if mode not in ("staged", "sequential"):
+            raise ValueError(f"Unknown pipeline mode {mode!r}")
+        self._stop.clear()
+        if self.sync is not None:
+            self.sync.start(self._on_config_change)
+        try:
+            if mode == "staged":
+                self._run_staged()
+            else:
+                self._run_sequential()
+        finally:
+            if self.sync is not None:
+                self.sync.stop()
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def close(self) -> None:
+        self.exporter.close()
+        self._ocr.close()
+        self._detector.close()
+
+    def _on_config_change(self, deltas: Dict[str, EntityDelta]) -> None:
+        self.reload(overlay(self.base_config, self.sync.entities))
+
+    def reload(self, config: EdgeConfig) -> None:
+        """Apply a changed configuration without restarting the pipeline.
+
+        Only the affected parts are rebuilt: an added, removed or changed
+        camera gets its own ingest (and scheduler lane) started, stopped or
+        swapped while the other streams keep running; changed zones are
+        recompiled in the zone index and in the motion gates' ROI; a changed
+        detector or OCR section replaces that model (the old one is closed
+        once the batches already using it are done); changed exporter
+        sections re-create just those exporters.
+        """
+        with self._reload_lock:
+            detector = None
+            if config.detectors != self.config.detectors:
+                logger.info("Detector configuration changed, reloading the detector")
+                # Loaded and warmed up first: a bad model leaves the old configuration in place.
+                detector = create_detector(config.detectors)
+            previous, self.config = self.config, config
+            self._reload_cameras(resolve_cameras(config), restart_ingests=config.ingest != previous.ingest)
+            self.zones.update(config.zones, self.cameras)
+            self._update_gates(rebuild=config.ingest.get("motion") != previous.ingest.get("motion"))
+            if detector is not None:
+                self._detector.swap(detector)
+            if config.model_cache != previous.model_cache:
+                registry.configure(config.model_cache.get("memory_budget_mb"))
+            if config.ocr != previous.ocr:
+                logger.info("OCR configuration changed, reloading the OCR ensemble")
+                self._ocr.swap(OCREnsemble(config.ocr))
+                if config.ocr.get("crop") != previous.ocr.get("crop"):
+                    self.cropper, self.crop_store = self._new_crops(config.ocr)
+            if config.exporters != previous.exporters:
+                self.exporter.reload(config.exporters)
+
+    def _reload_cameras(self, cameras: Sequence[CameraConfig], restart_ingests: bool = False) -> None:
+        current = {camera.id: camera for camera in self.cameras}
+        wanted = {camera.id: camera for camera in cameras}
+        self.cameras = list(cameras)
+        for camera_id in current.keys() - wanted.keys():
+            logger.info("Camera %s removed, stopping its ingest", camera_id)
+            self.ingests.pop(camera_id).close()
+            self.trackers.pop(camera_id, None)
+            if self._scheduler is not None:
+                self._scheduler.remove_camera(camera_id)
+        for camera_id, camera in wanted.items():
+            if current.get(camera_id) == camera and not restart_ingests:
+                continue
+            if self._scheduler is not None:
+                self._scheduler.set_camera(camera)
+            if camera_id not in current:
+                logger.info("Camera %s added", camera_id)
+                self.trackers[camera_id] = self._new_tracker()
+                self.ingests[camera_id] = create_ingest(camera, self.config.ingest)
+            elif restart_ingests or _ingest_settings(camera) != _ingest_settings(current[camera_id]):
+                logger.info("Camera %s stream changed, swapping its ingest", camera_id)
+                ingest = self.ingests[camera_id]
+                self.ingests[camera_id] = create_ingest(camera, self.config.ingest)
+                ingest.close()
+            if self._scheduler is not None:
+                self._start_ingest(camera)
+
+    def _frames(self, camera_id: int) -> Iterator[Frame]:
+        """Frames of one camera, following ingest swaps until the camera is removed."""
+        ingest = None
+        while not self._stop.is_set():
+            current = self.ingests.get(camera_id)
+            if current is None or current is ingest:
+                return
+            ingest = current
+            for frame in ingest.frames():
+                if self._stop.is_set() or self.ingests.get(camera_id) is not ingest:
+                    break
+                yield frame
+
+    def _run_sequential(self) -> None:
+        streams: Dict[int, Iterator[Frame]] = {}
+        while not self._stop.is_set():
+            progressed = False
+            for camera in list(self.cameras):
+                if camera.id not in streams:
+                    streams[camera.id] = self._frames(camera.id)
+                frame = next(streams[camera.id], None)
+                if frame is None:
+                    del streams[camera.id]
+                    continue
+                progressed = True
+                if not self._admit(camera.id, frame):
+                    continue
+                for item in self._detect([(camera, frame)]):
+                    for event in self._recognize(self._crop(item)[0]):
+                        self._export(event)
+            if not progressed:
+                if self.sync is None:
+                    break
+                # Every stream ended; wait for a config change to bring cameras back.
+                self._stop.wait(1)
+        for item in self._flush_tracks():
+            for event in self._recognize(self._crop(item)[0]):
+                self._export(event)
+        if self.gates:
+            logger.info("Motion gates: %s", self._gate_stats())
+
+    def _run_staged(self) -> None:
+        settings = self.config.pipeline
+        depth = int(settings.get("queue_depth", 8))
+        tracks = BoundedQueue(depth, BLOCK, name="tracks")
+        crops = BoundedQueue(depth, BLOCK, name="crops")
+        events = BoundedQueue(depth, BLOCK, name="events")
+        stages = [
+            Stage("crop", self._crop, tracks, crops, workers=settings.get("crop_workers", 1)),
+            Stage("ocr", self._recognize, crops, events, workers=settings.get("ocr_workers", 2)),
+            Stage("export", self._export, events, workers=settings.get("export_workers", 1)),
+        ]
+        with self._reload_lock:
+            # Detection and tracking run on the scheduler thread, which also keeps
+            # the per-camera trackers single-threaded.
+            scheduler = self._scheduler = InferenceScheduler(
+                self.cameras,
+                self._detect,
+                tracks,
+                policy=BatchPolicy.from_config(settings),
+                flush=self._flush_tracks,
+            )
+            scheduler.start()
+            for stage in stages:
+                stage.start()
+            for camera in self.cameras:
+                self._start_ingest(camera)
+        try:
+            # With config sync, cameras may come back after all streams ended.
+            while not self._stop.is_set() and (self.sync is not None or self._ingest_threads):
+                self._stop.wait(0.5)
+        finally:
+            self.stop()
+            scheduler.close()
+            scheduler.join()
+            for stage in stages:
+                stage.join()
+            self._scheduler = None
+            logger.info(
+                "Edge pipeline stopped: %s, motion gates: %s, models: %s",
+                scheduler.stats(),
+                self._gate_stats(),
+                registry.stats(),
+            )
+
+    def _start_ingest(self, camera: CameraConfig) -> None:
+        # Called with ``_reload_lock`` held. A thread still registered for the
+        # camera picks up its new ingest by itself.
+        if camera.id in self._ingest_threads:
+            return
+        thread = threading.Thread(
+            target=self._ingest, args=(camera.id, self._scheduler), name=f"ingest-{camera.id}", daemon=True
+        )
+        self._ingest_threads[camera.id] = thread
+        thread.start()
+
+    def _ingest(self, camera_id: int, scheduler: InferenceScheduler) -> None:
+        ingest = None
+        while not self._stop.is_set():
+            with self._reload_lock:
+                current = self.ingests.get(camera_id)
+                if current is None or current is ingest:
+                    # The camera was removed, or its stream ended without being replaced.
+                    del self._ingest_threads[camera_id]
+                    return
+            ingest = current
+            for frame in ingest.frames():
+                if self._stop.is_set() or self.ingests.get(camera_id) is not ingest:
+                    break
+                if self._admit(camera_id, frame):
+                    scheduler.submit(camera_id, frame)
+
+    def _detect(self, batch: Batch) -> Iterable[tuple]:
+        images = [frame.image for _, frame in batch]
+        with self._detector.use() as detector:
+            detected = detector.detect_batch(images)
+        results = []
+        for (camera, frame), detections in zip(batch, detected):
+            tracker = self.trackers.get(camera.id)
+            if tracker is None:
+                continue  # camera removed by a config reload
+            tracks = tracker.update(detections)
+            self.zones.assign(camera, tracks)
+            expired = []
+            if self.consensus is not None:
+                tracks = [track for track in tracks if self.consensus.needs_ocr(camera.id, track.track_id)]
+                expired = tracker.expired
+            if tracks or expired:
+                results.append((camera, frame, tracks, expired))
+        return results
+
+    def _flush_tracks(self) -> Iterable[tuple]:
+        """Treat every live track as ended so pending consensus readings are emitted."""
+        if self.consensus is None:
+            return []
+        return [
+            (camera, None, [], list(tracker.tracks.values()))
+            for camera in self.cameras
+            if (tracker := self.trackers.get(camera.id)) is not None and tracker.tracks
+        ]
+
+    def _crop(self, item: tuple) -> list:
+        """Replace the frame by one shared crop batch of its tracked plates.
+
+        The returned item no longer references the frame, so its ingest ring
+        slot goes back to the ring as soon as the crop stage drops the input
+        item, before OCR runs.
+        """
+        camera, frame, tracks, expired = item
+        crops = self.cropper.crop_batch(frame.image, [track.detection.bbox for track in tracks]) if tracks else None
+        return [(camera, crops, tracks, expired)]
+
+    def _recognize(self, item: tuple) -> Iterable[dict]:
+        camera, crops, tracks, expired = item
+        with self._ocr.use() as ocr:
+            return self._read(ocr, camera, crops, tracks, expired)
+
+    def _read(self, ocr: OCREnsemble, camera: CameraConfig, crops, tracks: list, expired: list) -> list:
+        finished = []
+        results = ocr.recognize_batch(crops) if tracks else []
+        for track, result in zip(tracks, results):
+            if self.consensus is None:
+                if not result.text:
+                    result.text = self._fake_plate()
+                finished.append((track, result))
+                continue
+            consensus = self.consensus.add(camera.id, track, result)
+            if consensus is not None:
+                finished.append((track, consensus))
+        for track in expired:
+            consensus = self.consensus.finish(camera.id, track)
+            if consensus is not None:
+                finished.append((track, consensus))
+
+        events = []
+        for track, result in finished:
+            crop_url = None
+            if self.crop_store is not None and result.crop is not None:
+                # Encoded once per event, whichever exporters send it.
+                crop_url = self.crop_store.write(result.crop, camera.id, track.track_id)
+            event = ocr.build_event(track, result, camera_id=camera.id, crop_url=crop_url)
+            logger.info("Generated event %s", event)
+            events.append(event)
+        return events
+
+    def _export(self, event: dict) -> Iterable[dict]:
+        self.exporter.dispatch(event)
+        return ()
 
 
 def main() -> None:
     logging.basicConfig(level=logging.INFO)
     config = load_config()
-    pipeline = EdgePipeline(config)
-    pipeline.run()
+    sync = ConfigSync.from_config(config)
+    if sync is not None:
+        sync.bootstrap()
+    pipeline = EdgePipeline(config, sync)
+    try:
+        pipeline.run()
+    finally:
+        pipeline.close()
 
 
 if __name__ == "__main__":
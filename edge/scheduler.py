@@ -0,0 +1,188 @@
+"""Shared inference scheduler that multiplexes frames from several cameras."""
+from __future__ import annotations
+
+import logging
+import queue
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from settings import CameraConfig
+from stages import BoundedQueue
+
+logger = logging.getLogger(__name__)
+
+Batch = List[Tuple[CameraConfig, Any]]
+
+
+@dataclass
+class BatchPolicy:
+    """Dispatch a batch once it holds ``max_batch_size`` frames or the oldest
+    frame in it has waited ``max_wait_ms``."""
+
+    max_batch_size: int = 4
+    max_wait_ms: float = 10.0
+
+    @classmethod
+    def from_config(cls, config: dict) -> "BatchPolicy":
+        return cls(
+            max_batch_size=max(1, int(config.get("max_batch_size", cls.max_batch_size))),
+            max_wait_ms=max(0.0, float(config.get("max_wait_ms", cls.max_wait_ms))),
+        )
+
+
+class _CameraLane:
+    def __init__(self, camera: CameraConfig) -> None:
+        self.camera = camera
+        self.queue = BoundedQueue(camera.queue_depth, camera.drop_policy, name=f"camera-{camera.id}")
+        self.min_interval = 1.0 / camera.fps if camera.fps else 0.0
+        self.last_accepted = 0.0
+        self.throttled = 0
+        self.scheduled = 0
+
+
+class InferenceScheduler:
+    """Batches frames from all camera lanes into one shared inference handler.
+
+    Each camera gets its own bounded lane (with the camera's drop policy) and an
+    FPS cap taken from ``CameraConfig.fps``. Batches are filled by weighted
+    round-robin over the lanes, ``priority`` being the number of frames a
+    camera may contribute per round, so one busy stream cannot starve the rest.
+    """
+
+    def __init__(
+        self,
+        cameras: Iterable[CameraConfig],
+        handler: Callable[[Batch], Iterable[Any]],
+        outbox: Optional[BoundedQueue] = None,
+        policy: Optional[BatchPolicy] = None,
+        flush: Optional[Callable[[], Iterable[Any]]] = None,
+    ) -> None:
+        self.lanes: Dict[int, _CameraLane] = {camera.id: _CameraLane(camera) for camera in cameras}
+        self.handler = handler
+        self.outbox = outbox
+        self.policy = policy or BatchPolicy()
+        self.flush = flush
+        self._cursor = 0
+        self._closed = threading.Event()
+        self._wakeup = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+
+    def submit(self, camera_id: int, frame: Any) -> bool:
+        """Offer a frame from ``camera_id``; returns False if it was throttled or dropped."""
+        lane = self.lanes.get(camera_id)
+        if lane is None:
+            return False
+        now = time.monotonic()
+        if lane.min_interval and now - lane.last_accepted < lane.min_interval:
+            lane.throttled += 1
+            return False
+        lane.last_accepted = now
+        accepted = lane.queue.put(frame)
+        with self._wakeup:
+            self._wakeup.notify()
+        return accepted
+
+    def set_camera(self, camera: CameraConfig) -> None:
+        """Add a lane for ``camera`` or replace its lane after a config change.
+
+        Frames still queued in a replaced lane are discarded. The lane map
+        is swapped rather than mutated so ``_collect`` never sees it
+        half-updated.
+        """
+        self.lanes = {**self.lanes, camera.id: _CameraLane(camera)}
+
+    def remove_camera(self, camera_id: int) -> None:
+        self.lanes = {key: lane for key, lane in self.lanes.items() if key != camera_id}
+
+    def next_batch(self, timeout: float = 0.1) -> Batch:
+        """Build the next batch under the ``BatchPolicy``.
+
+        Waits up to ``timeout`` seconds for a first frame, then keeps topping
+        the batch up until it is full or ``max_wait_ms`` has elapsed.
+        """
+        limit = self.policy.max_batch_size
+        batch = self._collect(limit)
+        if not batch and not self._closed.is_set():
+            with self._wakeup:
+                self._wakeup.wait(timeout)
+            batch = self._collect(limit)
+        if not batch:
+            return batch
+        deadline = time.monotonic() + self.policy.max_wait_ms / 1000.0
+        while len(batch) < limit and not self._closed.is_set():
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            with self._wakeup:
+                self._wakeup.wait(remaining)
+            batch.extend(self._collect(limit - len(batch)))
+        return batch
+
+    def _collect(self, limit: int) -> Batch:
+        """Take up to ``limit`` queued frames fairly across camera lanes."""
+        batch: Batch = []
+        lanes = self.lanes
+        order = list(lanes)
+        if not order:
+            return batch
+        progressed = True
+        while len(batch) < limit and progressed:
+            progressed = False
+            for offset in range(len(order)):
+                lane = lanes[order[(self._cursor + offset) % len(order)]]
+                for _ in range(max(1, lane.camera.priority)):
+                    if len(batch) >= limit:
+                        break
+                    try:
+                        frame = lane.queue.get(block=False)
+                    except queue.Empty:
+                        break
+                    batch.append((lane.camera, frame))
+                    lane.scheduled += 1
+                    progressed = True
+        # Rotate the starting lane so ties do not always favour the first camera.
+        self._cursor = (self._cursor + 1) % len(order)
+        return batch
+
+    def start(self) -> None:
+        self._thread = threading.Thread(target=self._work, name="inference-scheduler", daemon=True)
+        self._thread.start()
+
+    def close(self) -> None:
+        self._closed.set()
+        with self._wakeup:
+            self._wakeup.notify()
+
+    def join(self, timeout: float | None = None) -> None:
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def stats(self) -> Dict[int, dict]:
+        return {
+            camera_id: {
+                "scheduled": lane.scheduled,
+                "dropped": lane.queue.dropped,
+                "throttled": lane.throttled,
+            }
+            for camera_id, lane in self.lanes.items()
+        }
+
+    def _work(self) -> None:
+        while True:
+            batch = self.next_batch()
+            if not batch:
+                if self._closed.is_set():
+                    break
+                continue
+            try:
+                for result in self.handler(batch) or ():
+                    if self.outbox is not None:
+                        self.outbox.put(result)
+            except Exception as exc:  # noqa: BLE001
+                logger.error("Inference batch of %d frames failed: %s", len(batch), exc)
+        if self.outbox is not None:
+            for result in self.flush() if self.flush else ():
+                self.outbox.put(result)
+            self.outbox.close()
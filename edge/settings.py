@@ -7,21 +7,50 @@ import json
 import os
 from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Any, Dict
+from typing import Any, Dict, List, Optional
 
+import requests
 import yaml
 
 DEFAULT_CONFIG_PATH = Path(__file__).parent / "config" / "cameras.example.yaml"
 RETRY_QUEUE_PATH = Path(__file__).parent / "exporters" / "retry_queue.json"
+RETRY_LOG_PATH = Path(__file__).parent / "exporters" / "retry_log.sqlite3"
+CONFIG_CACHE_PATH = Path(__file__).parent / "config" / "backend_snapshot.json"
+MODELS_DIR = Path(__file__).parent / "models"
 
 
 @dataclass
-class EdgeConfig:
+class CameraConfig:
+    id: int
     rtsp_url: str
+    name: Optional[str] = None
+    fps: Optional[int] = None
+    priority: int = 1
+    drop_policy: str = "drop_oldest"
+    queue_depth: int = 8
+    enabled: bool = True
+    zone_id: Optional[int] = None
+    resolution_width: Optional[int] = None
+    resolution_height: Optional[int] = None
+    sample_every: int = 1
+    motion_gate: Optional[bool] = None
+
+
+@dataclass
+class EdgeConfig:
+    rtsp_url: Optional[str] = None
+    cameras: List[Dict[str, Any]] = field(default_factory=list)
+    camera_source: str = "config"
     detectors: Dict[str, Any] = field(default_factory=dict)
     ocr: Dict[str, Any] = field(default_factory=dict)
     exporters: Dict[str, Any] = field(default_factory=dict)
     sensors: Dict[str, Any] = field(default_factory=dict)
+    pipeline: Dict[str, Any] = field(default_factory=dict)
+    tracker: Dict[str, Any] = field(default_factory=dict)
+    ingest: Dict[str, Any] = field(default_factory=dict)
+    zones: List[Dict[str, Any]] = field(default_factory=list)
+    config_sync: Dict[str, Any] = field(default_factory=dict)
+    model_cache: Dict[str, Any] = field(default_factory=dict)
 
 
 def load_config(path: Path | None = None) -> EdgeConfig:
@@ -33,12 +62,53 @@ def load_config(path: Path | None = None) -> EdgeConfig:
     return EdgeConfig(**data)
 
 
+def fetch_backend_cameras(backend_url: str) -> list[dict[str, Any]]:
+    """Every enabled camera, following ``X-Next-Cursor`` across pages."""
+    cameras: list[dict[str, Any]] = []
+    params: dict[str, Any] = {"enabled": True, "limit": 200}
+    while True:
+        response = requests.get(f"{backend_url.rstrip('/')}/config/cameras", params=params, timeout=5)
+        response.raise_for_status()
+        cameras.extend(response.json())
+        cursor = response.headers.get("X-Next-Cursor")
+        if not cursor:
+            return cameras
+        params["cursor"] = cursor
+
+
+def resolve_cameras(config: EdgeConfig) -> list[CameraConfig]:
+    """Return the enabled cameras this edge process should ingest.
+
+    Cameras come from the ``cameras`` list, from the backend ``Camera`` table
+    when ``camera_source`` is ``backend``, or from the legacy single
+    ``rtsp_url``. Per-camera keys override the ``pipeline`` defaults (and
+    ``ingest.sample_every``).
+    """
+    entries = list(config.cameras)
+    if config.camera_source == "backend":
+        backend_url = os.getenv("BACKEND_API_URL")
+        if not backend_url:
+            raise ValueError("camera_source is 'backend' but BACKEND_API_URL is not set")
+        entries = fetch_backend_cameras(backend_url)
+    elif not entries and config.rtsp_url:
+        entries = [{"id": 1, "rtsp_url": config.rtsp_url}]
+
+    defaults = {
+        key: config.pipeline[key] for key in ("drop_policy", "queue_depth") if key in config.pipeline
+    }
+    if "sample_every" in config.ingest:
+        defaults["sample_every"] = config.ingest["sample_every"]
+    known = CameraConfig.__dataclass_fields__
+    cameras = []
+    for entry in entries:
+        values = {**defaults, **{key: value for key, value in entry.items() if key in known and value is not None}}
+        camera = CameraConfig(**values)
+        if camera.enabled:
+            cameras.append(camera)
+    return cameras
+
+
 def load_retry_queue(path: Path = RETRY_QUEUE_PATH) -> list[dict[str, Any]]:
     if not path.exists():
         return []
     return json.loads(path.read_text())
-
-
-def save_retry_queue(queue: list[dict[str, Any]], path: Path = RETRY_QUEUE_PATH) -> None:
-    path.parent.mkdir(parents=True, exist_ok=True)
-    path.write_text(json.dumps(queue, indent=2))
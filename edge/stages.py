@@ -0,0 +1,124 @@
+"""Bounded queues and worker stages for the concurrent edge pipeline."""
+from __future__ import annotations
+
+import logging
+import queue
+import threading
+from typing import Any, Callable, Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+DROP_OLDEST = "drop_oldest"
+DROP_NEWEST = "drop_newest"
+BLOCK = "block"
+DROP_POLICIES = (DROP_OLDEST, DROP_NEWEST, BLOCK)
+
+_CLOSED = object()
+
+
+class BoundedQueue:
+    """Fixed-depth FIFO with a policy for what ``put`` does when it is full.
+
+    ``block`` waits for room (backpressure), ``drop_newest`` discards the
+    incoming item and ``drop_oldest`` evicts the head to make room for it.
+    """
+
+    def __init__(self, maxsize: int, policy: str = BLOCK, name: str = "queue") -> None:
+        if policy not in DROP_POLICIES:
+            raise ValueError(f"Unknown drop policy {policy!r}, expected one of {DROP_POLICIES}")
+        self.name = name
+        self.policy = policy
+        self.dropped = 0
+        self._queue: queue.Queue = queue.Queue(maxsize=max(1, int(maxsize)))
+
+    def put(self, item: Any) -> bool:
+        """Enqueue ``item``; returns False if it was dropped."""
+        if self.policy == BLOCK:
+            self._queue.put(item)
+            return True
+        while True:
+            try:
+                self._queue.put_nowait(item)
+                return True
+            except queue.Full:
+                if self.policy == DROP_NEWEST:
+                    self.dropped += 1
+                    return False
+            try:
+                self._queue.get_nowait()
+                self.dropped += 1
+            except queue.Empty:
+                pass
+
+    def get(self, block: bool = True, timeout: float | None = None) -> Any:
+        return self._queue.get(block, timeout)
+
+    def close(self) -> None:
+        """Signal consumers that no more items will be produced."""
+        self._queue.put(_CLOSED)
+
+    def qsize(self) -> int:
+        return self._queue.qsize()
+
+
+class Stage:
+    """Runs ``handler`` over items from ``inbox`` on one or more worker threads.
+
+    Each handler call returns an iterable of results which are forwarded to
+    ``outbox``. The outbox is closed once every worker has seen the inbox close.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        handler: Callable[[Any], Iterable[Any]],
+        inbox: BoundedQueue,
+        outbox: Optional[BoundedQueue] = None,
+        workers: int = 1,
+    ) -> None:
+        self.name = name
+        self.handler = handler
+        self.inbox = inbox
+        self.outbox = outbox
+        self.workers = max(1, int(workers))
+        self.processed = 0
+        self.failed = 0
+        self._threads: List[threading.Thread] = []
+        self._running = 0
+        self._lock = threading.Lock()
+
+    def start(self) -> None:
+        self._running = self.workers
+        for index in range(self.workers):
+            thread = threading.Thread(target=self._work, name=f"{self.name}-{index}", daemon=True)
+            self._threads.append(thread)
+            thread.start()
+
+    def join(self, timeout: float | None = None) -> None:
+        for thread in self._threads:
+            thread.join(timeout)
+
+    def _work(self) -> None:
+        while True:
+            item = self.inbox.get()
+            if item is _CLOSED:
+                # Hand the marker on so sibling workers also stop.
+                self.inbox.close()
+                break
+            try:
+                results = self.handler(item) or ()
+                for result in results:
+                    if self.outbox is not None:
+                        self.outbox.put(result)
+                self.processed += 1
+            except Exception as exc:  # noqa: BLE001
+                self.failed += 1
+                logger.error("Stage %s failed: %s", self.name, exc)
+            # Let go of the item before waiting for the next one, so what it
+            # holds (e.g. a frame's ring slot) is freed now.
+            item = results = None
+        with self._lock:
+            self._running -= 1
+            last = self._running == 0
+        if last and self.outbox is not None:
+            self.outbox.close()
@@ -0,0 +1,194 @@
+import threading
+from types import SimpleNamespace
+
+import numpy as np
+
+from config_sync import ConfigSync, overlay
+from pipeline import Detection, EdgePipeline
+from settings import CameraConfig, EdgeConfig
+from stages import BoundedQueue, Stage, _CLOSED
+from tracker import Track
+
+
+class StubResponse:
+    def __init__(self, body):
+        self.body = body
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return self.body
+
+
+class StubSession:
+    def __init__(self, *snapshots):
+        self.snapshots = list(snapshots)
+        self.requested = []
+
+    def get(self, url, params=None, timeout=None):
+        self.requested.append(params["since_version"])
+        if not self.snapshots:
+            raise ConnectionError("backend down")
+        return StubResponse(self.snapshots.pop(0))
+
+
+def camera(camera_id, url, **extra):
+    return {"id": camera_id, "name": f"cam{camera_id}", "rtsp_url": url, "enabled": True, **extra}
+
+
+def test_poll_returns_deltas_and_survives_restart_offline(tmp_path):
+    cache = tmp_path / "snapshot.json"
+    session = StubSession(
+        {"version": 10, "changed": {"cameras": [camera(1, "rtsp://a"), camera(2, "rtsp://b")], "zones": []}},
+        {"version": 12, "changed": {"cameras": [camera(1, "rtsp://a"), camera(2, "rtsp://b2"), camera(3, "rtsp://c")]}},
+        {"version": 15, "changed": {"cameras": [camera(2, "rtsp://b2"), camera(3, "rtsp://c")]}},
+    )
+    sync = ConfigSync("http://backend", cache_path=cache, session=session)
+
+    first = sync.poll()
+    assert [row["id"] for row in first["cameras"].added] == [1, 2]
+    assert "zones" in first and not first["zones"]
+
+    second = sync.poll()
+    assert [row["id"] for row in second["cameras"].updated] == [2]
+    assert [row["id"] for row in second["cameras"].added] == [3]
+
+    third = sync.poll()
+    assert [row["id"] for row in third["cameras"].removed] == [1]
+    assert session.requested == [0, 10, 12]
+
+    restarted = ConfigSync("http://backend", cache_path=cache, session=StubSession())
+    restarted.bootstrap()
+    assert restarted.version == 15
+    assert [row["id"] for row in restarted.entities["cameras"]] == [2, 3]
+
+
+def test_overlay_maps_models_and_exporters():
+    base = EdgeConfig(
+        camera_source="backend",
+        detectors={"type": "yolov5", "confidence_threshold": 0.5},
+        ocr={"crnn": {"enabled": True}},
+        exporters={"rest": {"enabled": True, "endpoint": "http://old", "pool_size": 4}},
+    )
+    config = overlay(
+        base,
+        {
+            "cameras": [camera(7, "rtsp://g")],
+            "models": [
+                {"id": 1, "type": "detector", "name": "yolov8", "version": "2", "weights_path": "/m/y.onnx",
+                 "params": {"confidence_threshold": 0.6}},
+                {"id": 2, "type": "ocr", "name": "crnn", "weights_path": "/m/crnn.onnx", "params": None},
+            ],
+            "exporters": [
+                {"id": 1, "type": "rest", "name": "old", "endpoint": "http://off", "enabled": False},
+                {"id": 2, "type": "rest", "name": "main", "endpoint": "http://new", "enabled": True,
+                 "retry_config": {"timeout": 3}},
+            ],
+        },
+    )
+    assert config.camera_source == "config" and config.cameras[0]["id"] == 7
+    assert config.detectors == {
+        "type": "yolov8", "confidence_threshold": 0.6, "version": "2", "weights_path": "/m/y.onnx"
+    }
+    assert config.ocr["crnn"] == {"enabled": True, "weights_path": "/m/crnn.onnx"}
+    assert config.exporters["rest"] == {"enabled": True, "endpoint": "http://new", "pool_size": 4, "timeout": 3}
+    assert base.ocr["crnn"] == {"enabled": True}
+
+
+def test_reload_swaps_only_changed_parts(tmp_path):
+    exporters = {"rest": {"enabled": True, "endpoint": "http://a"}, "retry": {"path": str(tmp_path / "retry.db")}}
+    config = EdgeConfig(cameras=[camera(1, "rtsp://a"), camera(2, "rtsp://b")], exporters=exporters)
+    pipeline = EdgePipeline(config)
+    try:
+        unchanged, swapped = pipeline.ingests[1], pipeline.ingests[2]
+        detector, ocr = pipeline.detector, pipeline.ocr
+        rest = pipeline.exporter.exporters[0]
+
+        pipeline.reload(
+            EdgeConfig(
+                cameras=[camera(1, "rtsp://a"), camera(2, "rtsp://b2"), camera(3, "rtsp://c")],
+                exporters={**exporters, "rest": {"enabled": True, "endpoint": "http://b"}},
+            )
+        )
+
+        assert pipeline.ingests[1] is unchanged
+        assert pipeline.ingests[2].rtsp_url == "rtsp://b2" and swapped._closed.is_set()
+        assert sorted(pipeline.ingests) == sorted(pipeline.trackers) == [1, 2, 3]
+        assert pipeline.detector is detector and pipeline.ocr is ocr
+        assert pipeline.exporter.exporters[0] is not rest
+        assert pipeline.exporter.drainer.exporters["rest"].endpoint == "http://b"
+
+        pipeline.reload(EdgeConfig(cameras=[camera(3, "rtsp://c")], exporters=exporters))
+        assert sorted(pipeline.ingests) == [3] and unchanged._closed.is_set()
+    finally:
+        pipeline.close()
+
+
+def test_ocr_reload_waits_for_busy_ocr_workers(tmp_path):
+    exporters = {"retry": {"path": str(tmp_path / "retry.db")}}
+    ocr = {"aggregator": {"parallel": True}, "consensus": {"enabled": True, "min_readings": 5}}
+    config = EdgeConfig(cameras=[camera(1, "rtsp://a")], exporters=exporters, ocr=ocr)
+    pipeline = EdgePipeline(config)
+    old = pipeline.ocr
+    entered, release, closed = threading.Event(), threading.Event(), []
+    engine = old.engines[0]
+    original = engine.recognize_batch
+
+    def blocking(crops):
+        entered.set()
+        release.wait(5)
+        return original(crops)
+
+    engine.recognize_batch = blocking
+    close = old.close
+    old.close = lambda: closed.append(True) or close()
+
+    crops, events = BoundedQueue(4), BoundedQueue(4)
+    stage = Stage("ocr", pipeline._recognize, crops, events)
+    stage.start()
+    try:
+        track = Track(track_id=1, detection=Detection(bbox=(0, 0, 10, 10), score=0.9, label="plate"))
+        cam = CameraConfig(id=1, rtsp_url="rtsp://a")
+        crops.put((cam, np.zeros((1, 48, 192), np.uint8), [track], [track]))
+        assert entered.wait(5)
+
+        pipeline.reload(EdgeConfig(cameras=config.cameras, exporters=exporters, ocr={**ocr, "aggregator": {}}))
+        assert pipeline.ocr is not old and not closed
+
+        release.set()
+        crops.close()
+        stage.join(5)
+        assert stage.failed == 0
+        assert [event["plate_text"] for event in iter(lambda: events.get(timeout=1), _CLOSED)] == ["TRF123"]
+        assert closed == [True]
+    finally:
+        release.set()
+        pipeline.close()
+
+
+def test_detector_reload_waits_for_the_running_batch(tmp_path):
+    exporters = {"retry": {"path": str(tmp_path / "retry.db")}}
+    config = EdgeConfig(cameras=[camera(1, "rtsp://a")], exporters=exporters)
+    pipeline = EdgePipeline(config)
+    old = pipeline.detector
+    entered, release, closed = threading.Event(), threading.Event(), []
+    detect_batch = old.detect_batch
+    old.detect_batch = lambda images: entered.set() or release.wait(5) and detect_batch(images)
+    old.close = lambda: closed.append(True)
+
+    cam = CameraConfig(id=1, rtsp_url="rtsp://a")
+    frame = SimpleNamespace(image=np.zeros((64, 64, 3), np.uint8))
+    results = []
+    worker = threading.Thread(target=lambda: results.extend(pipeline._detect([(cam, frame)])))
+    worker.start()
+    try:
+        assert entered.wait(5)
+        pipeline.reload(EdgeConfig(cameras=config.cameras, exporters=exporters, detectors={"type": "stub"}))
+        assert pipeline.detector is not old and not closed
+        release.set()
+        worker.join(5)
+        assert len(results) == 1 and closed == [True]
+    finally:
+        release.set()
+        pipeline.close()
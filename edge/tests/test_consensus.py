@@ -0,0 +1,43 @@
+from ocr.consensus import TemporalConsensus
+from ocr.ensemble import EnsembleResult
+from pipeline import Detection
+from tracker import Track
+
+
+def _track(track_id=1):
+    return Track(track_id=track_id, detection=Detection(bbox=(0, 0, 10, 10), score=0.9, label="plate"))
+
+
+def _reading(text, confidence=0.95):
+    return EnsembleResult(text=text, confidence=confidence, engines=["crnn"])
+
+
+def test_confident_track_is_emitted_once_and_then_cached():
+    consensus = TemporalConsensus({"emit_confidence": 0.9, "min_readings": 2, "stable_after": 3})
+    track = _track()
+    assert consensus.add(1, track, _reading("ABC123")) is None
+    emitted = consensus.add(1, track, _reading("ABC123"))
+    assert emitted.text == "ABC123" and emitted.readings == 2
+    assert not consensus.needs_ocr(1, track.track_id)
+    assert consensus.add(1, track, _reading("ABC123")) is None
+    assert consensus.finish(1, track) is None
+    assert consensus.add(1, track, _reading("ABC123")) is None
+
+
+def test_disagreeing_track_is_emitted_when_it_ends():
+    consensus = TemporalConsensus({"emit_confidence": 0.9, "min_readings": 2, "stable_after": 5})
+    track = _track()
+    for text in ["ABC123", "A8C123", "ABC123"]:
+        assert consensus.add(7, track, _reading(text, 0.8)) is None
+    assert consensus.needs_ocr(7, track.track_id)
+    result = consensus.finish(7, track)
+    assert result.text == "ABC123"
+    assert result.readings == 3
+    assert result.confidence < 0.9
+    assert not consensus.needs_ocr(7, track.track_id)
+
+
+def test_tracks_are_keyed_per_camera():
+    consensus = TemporalConsensus({"emit_confidence": 0.5, "min_readings": 1})
+    assert consensus.add(1, _track(1), _reading("AAA111")) is not None
+    assert consensus.add(2, _track(1), _reading("BBB222")) is not None
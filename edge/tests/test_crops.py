@@ -0,0 +1,102 @@
+import math
+
+import numpy as np
+import pytest
+
+from ingest import Frame
+from ocr.crops import CropStore, PlateCropper, skew_angle
+from ocr.ensemble import OCREnsemble
+from pipeline import Detection, EdgePipeline
+from settings import CameraConfig, EdgeConfig
+from tracker import Track
+
+LUMA = np.array([0.114, 0.587, 0.299], dtype=np.float32)
+
+
+def tilted_plate(degrees):
+    """A light plate with a row of dark characters, rotated by ``degrees``; returns frame and box."""
+    frame = np.full((300, 400, 3), 90, dtype=np.uint8)
+    angle = math.radians(degrees)
+    ys, xs = np.mgrid[0:300, 0:400]
+    u = (xs - 200) * math.cos(angle) + (ys - 150) * math.sin(angle)
+    v = -(xs - 200) * math.sin(angle) + (ys - 150) * math.cos(angle)
+    plate = (abs(u) < 90) & (abs(v) < 20)
+    frame[plate] = 230
+    frame[plate & (abs(v) < 12) & (np.floor((u + 90) / 15) % 2 == 1)] = 20
+    rows, cols = np.nonzero(plate)
+    return frame, (cols.min(), rows.min(), cols.max(), rows.max())
+
+
+@pytest.mark.parametrize("degrees", [0, 10, -7])
+def test_skew_angle_follows_the_text_line(degrees):
+    frame, (x1, y1, x2, y2) = tilted_plate(degrees)
+    grey = frame[y1:y2, x1:x2] @ LUMA
+    assert math.degrees(skew_angle(grey, math.radians(20))) == pytest.approx(degrees)
+
+
+def test_crops_are_rectified_normalized_and_read_only():
+    frame, box = tilted_plate(10)
+    crops = PlateCropper({"height": 48, "width": 192}).crop_batch(frame, [box, box])
+    assert crops.shape == (2, 48, 192) and crops.dtype == np.uint8
+    assert not crops.flags.writeable
+    assert crops.min() == 0 and crops.max() == 255
+    # Deskewed: plate above and below the text, a full row of characters across the middle.
+    assert crops[0, 2].min() > 128 and crops[0, -3].min() > 128
+    assert (crops[0, 24] < 64).mean() > 0.3
+
+
+def test_engines_share_one_crop_batch():
+    ensemble = OCREnsemble({"aggregator": {"parallel": True}})
+    seen = []
+    for engine in ensemble.engines:
+        original = engine.recognize_batch
+        engine.recognize_batch = lambda crops, original=original: seen.append(crops) or original(crops)
+    try:
+        frame, box = tilted_plate(0)
+        crops = PlateCropper().crop_batch(frame, [box] * 3)
+        results = ensemble.recognize_batch(crops)
+    finally:
+        ensemble.close()
+    assert len(seen) == 3 and all(batch is crops for batch in seen)
+    assert all(np.shares_memory(result.crop, crops) for result in results)
+
+
+class CountingStore:
+    def __init__(self):
+        self.written = []
+
+    def write(self, crop, camera_id, track_id):
+        self.written.append((crop.shape, camera_id, track_id))
+        return f"http://edge/crops/{len(self.written)}.jpg"
+
+
+def test_crop_is_written_once_per_event(tmp_path):
+    config = EdgeConfig(
+        cameras=[{"id": 1, "rtsp_url": "rtsp://a"}],
+        ocr={"consensus": {"enabled": True, "min_readings": 3, "emit_confidence": 0.5}},
+        exporters={"retry": {"path": str(tmp_path / "retry.db")}},
+    )
+    pipeline = EdgePipeline(config)
+    pipeline.crop_store = CountingStore()
+    camera = CameraConfig(id=1, rtsp_url="rtsp://a")
+    frame, box = tilted_plate(0)
+    track = Track(track_id=4, detection=Detection(bbox=box, score=0.9, label="plate"))
+    try:
+        events = []
+        for _ in range(3):
+            item = (camera, Frame(frame, camera_id=1, seq=1, timestamp=0.0), [track], [])
+            events += pipeline._recognize(pipeline._crop(item)[0])
+        events += pipeline._recognize(pipeline._crop((camera, None, [], [track]))[0])
+    finally:
+        pipeline.close()
+    assert [event["crop_url"] for event in events] == ["http://edge/crops/1.jpg"]
+    assert pipeline.crop_store.written == [((48, 192), 1, 4)]
+
+
+def test_crop_store_writes_jpeg(tmp_path):
+    pytest.importorskip("PIL")
+    store = CropStore({"path": str(tmp_path), "url_prefix": "http://edge/crops/"})
+    url = store.write(np.zeros((48, 192), dtype=np.uint8), camera_id=3, track_id=9)
+    assert url.startswith("http://edge/crops/3/") and url.endswith(".jpg")
+    written = list(tmp_path.rglob("*.jpg"))
+    assert len(written) == 1 and written[0].read_bytes()[:2] == b"\xff\xd8"
@@ -0,0 +1,121 @@
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from detector import OnnxDetector, StubDetector, create_detector, nms
+from model_registry import ModelRegistry
+from pipeline import EdgePipeline
+from settings import EdgeConfig
+
+
+class FakeSession:
+    """Returns fixed YOLO rows (in 64x64 model input pixels) for every image."""
+
+    def __init__(self, rows, batch="batch", layout="yolov5"):
+        self.rows = np.asarray(rows, dtype=np.float32)
+        self.layout = layout
+        self.inputs = [SimpleNamespace(name="images", shape=[batch, 3, 64, 64])]
+        self.batches = []
+        self.opened = 0
+
+    def get_inputs(self):
+        return self.inputs
+
+    def run(self, outputs, feed):
+        images = feed["images"]
+        self.batches.append(len(images))
+        prediction = self.rows if self.layout == "yolov5" else self.rows.T
+        return [np.repeat(prediction[None], len(images), axis=0)]
+
+
+def fake_detector(session, config, registry=None):
+    class Detector(OnnxDetector):
+        def _open_session(self, path):
+            session.opened += 1
+            return session
+
+    return Detector(config, registry)
+
+
+@pytest.fixture
+def weights(tmp_path):
+    (tmp_path / "plate-3.onnx").write_bytes(b"")
+    return {"weights_path": "plate-{version}.onnx", "version": "3", "models_dir": str(tmp_path)}
+
+
+ROWS = [
+    [32, 32, 20, 10, 0.9, 1.0],  # kept
+    [33, 32, 20, 10, 0.8, 1.0],  # overlaps the first: suppressed
+    [10, 10, 4, 4, 0.2, 1.0],  # below the confidence threshold
+]
+
+
+def test_letterboxed_boxes_map_back_to_frame_pixels(weights):
+    session = FakeSession(ROWS)
+    detector = fake_detector(session, {"type": "yolov5", "confidence_threshold": 0.5, "warmup_runs": 2, **weights})
+    assert session.batches == [1, 1]
+
+    wide, square = np.zeros((128, 256, 3), np.uint8), np.zeros((64, 64, 3), np.uint8)
+    results = detector.detect_batch([wide, square])
+
+    assert session.batches[2:] == [2]  # dynamic batch axis: one run for both frames
+    # 256x128 is scaled by 1/4 into the top/bottom padded 64x64 input.
+    assert [d.bbox for d in results[0]] == [(88, 44, 168, 84)]
+    assert [d.bbox for d in results[1]] == [(22, 27, 42, 37)]
+    assert results[0][0].label == "plate" and results[0][0].score == pytest.approx(0.9)
+
+
+def test_yolov8_layout_and_fixed_batch(weights):
+    rows = [[32, 32, 20, 10, 0.1, 0.8]]  # no objectness, two classes
+    session = FakeSession(rows, batch=1, layout="yolov8")
+    detector = fake_detector(session, {"type": "yolov8", "labels": ["car", "plate"], "warmup_runs": 0, **weights})
+
+    results = detector.detect_batch([np.zeros((64, 64, 3), np.uint8)] * 3)
+
+    assert session.batches == [1, 1, 1]
+    assert [(d.bbox, d.label) for d in results[0]] == [((22, 27, 42, 37), "plate")]
+
+
+def test_session_is_loaded_lazily_and_shared(weights):
+    registry = ModelRegistry()
+    session = FakeSession(ROWS)
+    first = fake_detector(session, {"type": "yolov5", "warmup_runs": 0, **weights}, registry)
+    second = fake_detector(session, {"type": "yolov5", "warmup_runs": 0, **weights}, registry)
+    assert session.opened == 0
+
+    first.detect(np.zeros((64, 64, 3), np.uint8))
+    second.detect(np.zeros((64, 64, 3), np.uint8))
+    assert session.opened == 1
+
+    first.close()
+    assert len(registry.loaded()) == 1
+    second.close()
+    assert registry.loaded() == []
+
+
+def test_nms_keeps_best_of_overlapping_boxes():
+    boxes = np.array([[0, 0, 10, 10], [1, 1, 10, 10], [20, 20, 30, 30]], dtype=np.float64)
+    assert nms(boxes, np.array([0.5, 0.9, 0.7]), 0.5).tolist() == [1, 2]
+
+
+def test_registry(tmp_path):
+    assert isinstance(create_detector({}), StubDetector)
+    with pytest.raises(ValueError):
+        create_detector({"type": "ssd"})
+    with pytest.raises(FileNotFoundError):
+        create_detector({"type": "yolov5", "weights_path": str(tmp_path / "missing.onnx")})
+
+
+def test_failed_detector_reload_keeps_the_running_configuration(tmp_path):
+    exporters = {"retry": {"path": str(tmp_path / "retry.db")}}
+    config = EdgeConfig(cameras=[{"id": 1, "rtsp_url": "rtsp://a"}], exporters=exporters)
+    pipeline = EdgePipeline(config)
+    try:
+        detector = pipeline.detector
+        broken = EdgeConfig(cameras=config.cameras, exporters=exporters, detectors={"type": "yolov5"})
+        with pytest.raises(ValueError):
+            pipeline.reload(broken)
+        assert pipeline.detector is detector and pipeline.config is config
+    finally:
+        pipeline.close()
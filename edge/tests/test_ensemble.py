@@ -0,0 +1,105 @@
+import threading
+import time
+
+import numpy as np
+import pytest
+
+from ocr.ensemble import OCREnsemble, OCRResult
+
+CROPS = np.zeros((2, 48, 192), dtype=np.uint8)
+
+
+def _ensemble(readings, delays=None, **aggregator):
+    """An ensemble whose engines return ``readings[name]`` (one text/confidence per crop) or raise it."""
+    ensemble = OCREnsemble({"aggregator": aggregator})
+    calls = []
+    for engine in ensemble.engines:
+
+        def recognize_batch(crops, name=engine.name):
+            calls.append((name, threading.current_thread().name))
+            time.sleep((delays or {}).get(name, 0))
+            if isinstance(readings[name], Exception):
+                raise readings[name]
+            return [OCRResult(text, confidence) for text, confidence in readings[name]]
+
+        engine.recognize_batch = recognize_batch
+    return ensemble, calls
+
+
+def test_vote_lists_only_the_engines_that_agree():
+    ensemble, _ = _ensemble(
+        {
+            "crnn": [("ABC123", 0.8), ("XYZ1", 0.6)],
+            "transformer": [("ABC123", 0.9), ("XYZ2", 0.9)],
+            "tesseract": [("A8C123", 0.7), ("XYZ1", 0.6)],
+        }
+    )
+    try:
+        first, second = ensemble.recognize_batch(CROPS)
+    finally:
+        ensemble.close()
+    assert (first.text, first.engines) == ("ABC123", ["crnn", "transformer"])
+    assert first.confidence == pytest.approx(0.85)
+    assert (second.text, second.engines) == ("XYZ1", ["crnn", "tesseract"])
+    assert first.skipped == first.failed == []
+
+
+def test_parallel_engines_run_on_the_pool():
+    readings = {name: [("ABC123", 0.8)] * 2 for name in ("crnn", "transformer", "tesseract")}
+    ensemble, calls = _ensemble(readings, parallel=True)
+    try:
+        results = ensemble.recognize_batch(CROPS)
+    finally:
+        ensemble.close()
+    assert sorted(name for name, _ in calls) == ["crnn", "tesseract", "transformer"]
+    assert all(thread.startswith("ocr") for _, thread in calls)
+    assert sorted(results[0].engines) == ["crnn", "tesseract", "transformer"]
+
+
+def test_early_exit_on_a_confident_first_engine():
+    readings = {
+        "crnn": [("ABC123", 0.95)] * 2,
+        "transformer": [("ABC123", 0.9)] * 2,
+        "tesseract": [("A8C123", 0.7)] * 2,
+    }
+    ensemble, _ = _ensemble(
+        readings, {"transformer": 0.3, "tesseract": 0.3}, parallel=True, early_exit={"enabled": True}
+    )
+    try:
+        result = ensemble.recognize_batch(CROPS)[0]
+    finally:
+        ensemble.close()
+    assert (result.text, result.engines) == ("ABC123", ["crnn"])
+    assert sorted(result.skipped) == ["tesseract", "transformer"] and result.failed == []
+
+
+def test_early_exit_on_agreement():
+    readings = {
+        "crnn": [("ABC123", 0.6)] * 2,
+        "transformer": [("ABC123", 0.6)] * 2,
+        "tesseract": [("A8C123", 0.99)] * 2,
+    }
+    early_exit = {"enabled": True, "confidence": 0.9, "agreement": 2}
+    ensemble, calls = _ensemble(readings, early_exit=early_exit)
+    try:
+        result = ensemble.recognize_batch(CROPS)[0]
+    finally:
+        ensemble.close()
+    assert [name for name, _ in calls] == ["crnn", "transformer"]
+    assert (result.text, result.engines, result.skipped) == ("ABC123", ["crnn", "transformer"], ["tesseract"])
+
+
+@pytest.mark.parametrize("parallel", [False, True])
+def test_failed_engines_are_reported_apart_from_skipped(parallel):
+    readings = {
+        "crnn": [("ABC123", 0.8)] * 2,
+        "transformer": RuntimeError("model missing"),
+        "tesseract": [("ABC123", 0.7)] * 2,
+    }
+    ensemble, _ = _ensemble(readings, parallel=parallel)
+    try:
+        result = ensemble.recognize_batch(CROPS)[0]
+    finally:
+        ensemble.close()
+    assert result.text == "ABC123" and sorted(result.engines) == ["crnn", "tesseract"]
+    assert result.failed == ["transformer"] and result.skipped == []
@@ -0,0 +1,70 @@
+import gzip
+import json
+import threading
+
+from exporters.rest import BatchingRestExporter
+
+
+class StubResponse:
+    def __init__(self, items):
+        self._items = items
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return {"items": self._items}
+
+
+class StubSession:
+    def __init__(self, fail=False):
+        self.fail = fail
+        self.posts = []
+        self.posted = threading.Event()
+
+    def post(self, url, data=None, json=None, headers=None, timeout=None):
+        if self.fail:
+            raise ConnectionError("endpoint down")
+        batch = json if json is not None else _decode(data, headers)
+        self.posts.append((url, batch))
+        self.posted.set()
+        return StubResponse([{"status": "created"} for _ in batch] if isinstance(batch, list) else [])
+
+    def close(self):
+        pass
+
+
+def _decode(data, headers):
+    if headers and headers.get("Content-Encoding") == "gzip":
+        data = gzip.decompress(data)
+    return json.loads(data)
+
+
+def _batching(max_items=100, max_wait_ms=50, session=None):
+    exporter = BatchingRestExporter(
+        {"endpoint": "http://backend/events/ingest", "batch": {"max_items": max_items, "max_wait_ms": max_wait_ms}}
+    )
+    exporter.session = session or StubSession()
+    return exporter
+
+
+def test_batching_exporter_flushes_partial_batch_after_max_wait():
+    exporter = _batching(max_items=100, max_wait_ms=50)
+    try:
+        exporter.send({"plate_text": "ABC123"})
+        assert exporter.session.posted.wait(2.0)
+        url, batch = exporter.session.posts[0]
+        assert url == "http://backend/events/ingest/bulk"
+        assert batch == [{"plate_text": "ABC123"}]
+    finally:
+        exporter.close()
+
+
+def test_batching_exporter_flushes_full_batch_and_reports_failures():
+    failed = []
+    exporter = _batching(max_items=3, max_wait_ms=60_000, session=StubSession(fail=True))
+    exporter.on_failure = failed.extend
+    for index in range(3):
+        exporter.send({"plate_text": f"P{index}"})
+    exporter.close()
+    assert [event["plate_text"] for event in failed] == ["P0", "P1", "P2"]
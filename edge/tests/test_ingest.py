@@ -0,0 +1,103 @@
+import gc
+import shutil
+import subprocess
+import sys
+import time
+
+import numpy as np
+import pytest
+
+from ingest import FFmpegIngest, FrameRing
+from settings import CameraConfig
+from stages import BoundedQueue, Stage
+
+
+class ScriptedIngest(FFmpegIngest):
+    """Feeds raw frames from a Python child process instead of ffmpeg."""
+
+    def __init__(self, camera, options, count):
+        super().__init__(camera, options)
+        self.count = count
+
+    def _command(self):
+        size = self.width * self.height * 3
+        script = (
+            "import sys\n"
+            f"for i in range({self.count}):\n"
+            f"    sys.stdout.buffer.write(bytes([i]) * {size})\n"
+        )
+        return [sys.executable, "-c", script]
+
+
+def test_ring_reuses_a_slot_once_its_frame_is_released():
+    ring = FrameRing(2, 2, 2)
+    slot = ring.acquire()
+    frame = ring.frame(slot, camera_id=1, seq=1)
+    assert ring.acquire() is not None and ring.acquire() is None
+    del frame
+    gc.collect()
+    assert ring.acquire() == slot
+
+
+def test_stage_frees_the_slot_before_waiting_for_the_next_item():
+    ring = FrameRing(1, 2, 2)
+    inbox, outbox = BoundedQueue(2), BoundedQueue(2)
+    stage = Stage("crop", lambda item: [item[0].image.copy()], inbox, outbox)
+    stage.start()
+    try:
+        inbox.put((ring.frame(ring.acquire(), camera_id=1, seq=1),))
+        outbox.get(timeout=1)
+        deadline = time.monotonic() + 1
+        while (slot := ring.acquire()) is None and time.monotonic() < deadline:
+            gc.collect()
+            time.sleep(0.01)
+        assert slot == 0
+    finally:
+        inbox.close()
+        stage.join(1)
+
+
+def test_frames_are_views_into_the_ring_and_overruns_drop():
+    camera = CameraConfig(id=4, rtsp_url="scripted", resolution_width=4, resolution_height=2)
+    ingest = ScriptedIngest(camera, {"reconnect": False, "ring_slots": 3}, count=6)
+
+    held = list(ingest.frames())
+
+    assert [frame.seq for frame in held] == [1, 2, 3]
+    assert [int(frame.image[0, 0, 0]) for frame in held] == [0, 1, 2]
+    assert all(frame.image.base is ingest.ring.buffer for frame in held)
+    assert held[0].image.shape == (2, 4, 3) and held[0].camera_id == 4
+    assert ingest.decoded == 6 and ingest.ring.overruns == 3
+
+
+def test_stream_is_reopened_after_it_ends():
+    camera = CameraConfig(id=1, rtsp_url="scripted", resolution_width=2, resolution_height=2)
+    ingest = ScriptedIngest(camera, {"backoff_initial": 0.01, "ring_slots": 2}, count=2)
+    values = []
+    for frame in ingest.frames():
+        values.append(int(frame.image[0, 0, 0]))
+        if len(values) == 5:
+            ingest.close()
+    assert values == [0, 1, 0, 1, 0]
+
+
+def test_command_samples_and_selects_hardware_decoding():
+    camera = CameraConfig(id=1, rtsp_url="rtsp://cam/stream", sample_every=3)
+    command = FFmpegIngest(camera, {"hwaccel": "v4l2m2m", "width": 640, "height": 360})._command()
+    assert command[command.index("-hwaccel") + 1] == "v4l2m2m"
+    assert command[command.index("-rtsp_transport") + 1] == "tcp"
+    assert command[command.index("-vf") + 1] == "select=not(mod(n\\,3)),scale=640:360"
+
+
+@pytest.mark.skipif(shutil.which("ffmpeg") is None, reason="ffmpeg is not installed")
+def test_decodes_a_local_file(tmp_path):
+    clip = tmp_path / "clip.mp4"
+    subprocess.run(
+        ["ffmpeg", "-loglevel", "error", "-f", "lavfi", "-i", "testsrc=size=160x120:rate=10", "-t", "1", str(clip)],
+        check=True,
+    )
+    camera = CameraConfig(id=1, rtsp_url=str(clip), resolution_width=80, resolution_height=60, sample_every=2)
+    ingest = FFmpegIngest(camera, {"reconnect": False})
+    shapes = [frame.image.shape for frame in ingest.frames()]
+    assert shapes == [(60, 80, 3)] * 5
+    assert np.any(ingest.ring.buffer)
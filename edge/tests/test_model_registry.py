@@ -0,0 +1,70 @@
+import threading
+import time
+
+import numpy as np
+import pytest
+
+from model_registry import ModelRegistry
+from ocr.ensemble import OCREnsemble
+
+
+def test_models_load_on_first_use_and_are_shared():
+    registry = ModelRegistry()
+    loads = []
+    registry.retain("crnn")
+    registry.retain("crnn")
+
+    def load():
+        loads.append(1)
+        time.sleep(0.05)
+        return object()
+
+    models = []
+    threads = [threading.Thread(target=lambda: models.append(registry.get("crnn", load))) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(loads) == 1 and all(model is models[0] for model in models)
+    registry.release("crnn")
+    assert registry.loaded() == ["crnn"]
+    registry.release("crnn")
+    assert registry.loaded() == []
+
+
+def test_least_recently_used_models_are_unloaded_over_budget():
+    registry = ModelRegistry(budget=100)
+    for key in ("a", "b", "c"):
+        registry.retain(key)
+    registry.get("a", object, size=40)
+    registry.get("b", object, size=40)
+    registry.get("a", object, size=40)  # a is now the most recently used
+    registry.get("c", object, size=40)
+    assert registry.loaded() == ["a", "c"]
+    assert registry.stats()["evictions"] == 1
+    registry.get("b", object, size=40)
+    assert registry.loaded() == ["c", "b"] and registry.stats()["loads"] == 4
+
+
+def test_ensemble_builds_only_enabled_engines_and_loads_them_lazily():
+    registry = ModelRegistry()
+    ensemble = OCREnsemble({"crnn": {"checkpoint": "/models/crnn.ckpt"}, "tesseract": {"enabled": False}}, registry)
+    other = OCREnsemble({"crnn": {"checkpoint": "/models/crnn.ckpt"}, "tesseract": {"enabled": False}}, registry)
+    assert [engine.name for engine in ensemble.engines] == ["crnn", "transformer"]
+    assert registry.loaded() == []
+
+    ensemble.recognize_batch(np.zeros((1, 48, 192), dtype=np.uint8))
+    other.recognize_batch(np.zeros((2, 48, 192), dtype=np.uint8))
+    assert registry.stats()["loads"] == 2  # shared between the two ensembles
+
+    ensemble.close()
+    assert len(registry.loaded()) == 2
+    other.close()
+    assert registry.loaded() == []
+
+
+def test_ensemble_needs_an_enabled_engine():
+    disabled = {"enabled": False}
+    with pytest.raises(ValueError):
+        OCREnsemble({"crnn": disabled, "transformer": disabled, "tesseract": disabled}, ModelRegistry())
@@ -0,0 +1,62 @@
+import numpy as np
+
+from motion import MotionGate
+from pipeline import EdgePipeline
+from settings import EdgeConfig
+
+
+def frame(box=None, value=200):
+    image = np.zeros((120, 160, 3), dtype=np.uint8)
+    if box is not None:
+        x1, y1, x2, y2 = box
+        image[y1:y2, x1:x2] = value
+    return image
+
+
+def test_gate_passes_motion_and_holds_briefly():
+    gate = MotionGate({"scale": 2, "hold_frames": 2})
+    assert gate.check(frame())  # first frame only seeds the background
+    assert gate.check(frame((40, 40, 80, 80)))
+    assert gate.check(frame()) and gate.check(frame())  # hold
+    assert not gate.check(frame())
+    assert gate.stats() == {"passed": 4, "skipped": 1}
+
+
+def test_motion_outside_the_roi_is_ignored():
+    gate = MotionGate({"scale": 2, "hold_frames": 0})
+    gate.set_roi([np.array([[0, 0], [60, 0], [60, 60], [0, 60]], dtype=np.float64)])
+    gate.check(frame())
+    assert not gate.check(frame((100, 70, 150, 110)))
+    assert gate.check(frame((10, 10, 40, 40)))
+
+
+def test_pipeline_gates_cameras_with_their_zone_polygons(tmp_path):
+    zone = {"id": 5, "geometry": {"camera_id": 1, "points": [[0, 0], [60, 0], [60, 60], [0, 60]]}}
+    config = EdgeConfig(
+        cameras=[
+            {"id": 1, "rtsp_url": "rtsp://a"},
+            {"id": 2, "rtsp_url": "rtsp://b", "motion_gate": False},
+        ],
+        ingest={"motion": {"enabled": True}},
+        zones=[zone],
+        exporters={"retry": {"path": str(tmp_path / "retry.db")}},
+    )
+    pipeline = EdgePipeline(config)
+    try:
+        assert sorted(pipeline.gates) == [1]
+        gate = pipeline.gates[1]
+        assert len(gate._polygons) == 1
+        gate.check(frame())
+
+        moved = {**zone, "geometry": {**zone["geometry"], "points": [[0, 0], [90, 0], [90, 90]]}}
+        pipeline.reload(
+            EdgeConfig(cameras=config.cameras, ingest=config.ingest, zones=[moved], exporters=config.exporters)
+        )
+        assert pipeline.gates[1] is gate and gate._roi is None
+
+        pipeline.reload(
+            EdgeConfig(cameras=config.cameras, ingest={"motion": {"enabled": False}}, exporters=config.exporters)
+        )
+        assert pipeline.gates == {}
+    finally:
+        pipeline.close()
@@ -0,0 +1,81 @@
+from exporters.rest import BatchingRestExporter
+from exporters.retry_log import DROP_NEWEST, DROP_OLDEST, RetryDrainer, RetryLog
+
+from test_exporters import StubSession
+
+
+class StubExporter:
+    name = "stub"
+
+    def __init__(self, fail_after=None):
+        self.fail_after = fail_after
+        self.delivered = []
+
+    def deliver(self, events):
+        if self.fail_after is not None and len(self.delivered) >= self.fail_after:
+            raise ConnectionError("endpoint down")
+        self.delivered.extend(events)
+
+
+def _plates(log, exporter="stub"):
+    return [event["plate_text"] for _, event in log.pending(exporter, 100)]
+
+
+def test_retry_log_evicts_oldest_or_rejects_newest(tmp_path):
+    log = RetryLog(tmp_path / "oldest.sqlite3", max_events=3, eviction=DROP_OLDEST)
+    log.append("stub", [{"plate_text": f"P{index}"} for index in range(5)])
+    assert len(log) == 3
+    assert _plates(log) == ["P2", "P3", "P4"]
+    assert log.evicted == 2
+    log.close()
+
+    log = RetryLog(tmp_path / "newest.sqlite3", max_events=3, eviction=DROP_NEWEST)
+    log.append("stub", [{"plate_text": f"P{index}"} for index in range(5)])
+    assert _plates(log) == ["P0", "P1", "P2"]
+    log.close()
+
+
+def test_retry_log_ack_survives_reopen(tmp_path):
+    path = tmp_path / "retry.sqlite3"
+    log = RetryLog(path)
+    log.append("stub", [{"plate_text": "A"}, {"plate_text": "B"}])
+    log.ack([log.pending("stub", 1)[0][0]])
+    log.close()
+
+    reopened = RetryLog(path)
+    assert len(reopened) == 1
+    assert _plates(reopened) == ["B"]
+    reopened.close()
+
+
+def test_drainer_acks_only_delivered_events(tmp_path):
+    log = RetryLog(tmp_path / "retry.sqlite3")
+    log.append("stub", [{"plate_text": f"P{index}"} for index in range(4)])
+    exporter = StubExporter(fail_after=2)
+    drainer = RetryDrainer(log, {"stub": exporter}, rate_per_s=0)
+
+    assert drainer.drain_once() == 2
+    assert _plates(log) == ["P2", "P3"]
+    exporter.fail_after = None
+    assert drainer.drain_once() == 2
+    assert len(log) == 0
+    log.close()
+
+
+def test_drainer_keeps_events_when_batching_endpoint_is_down(tmp_path):
+    log = RetryLog(tmp_path / "retry.sqlite3")
+    log.append("rest", [{"plate_text": f"P{index}"} for index in range(3)])
+    exporter = BatchingRestExporter({"endpoint": "http://backend/events/ingest", "batch": {"max_items": 10}})
+    exporter.session = StubSession(fail=True)
+    try:
+        assert RetryDrainer(log, {"rest": exporter}, rate_per_s=0).drain_once() == 0
+        assert len(log) == 3
+        assert _plates(log, "rest") == ["P0", "P1", "P2"]
+
+        exporter.session = StubSession()
+        assert RetryDrainer(log, {"rest": exporter}, rate_per_s=0).drain_once() == 3
+        assert len(exporter.session.posts) == 1
+        assert len(log) == 0
+    finally:
+        exporter.close()
+        log.close()
@@ -0,0 +1,36 @@
+from scheduler import BatchPolicy, InferenceScheduler
+from settings import CameraConfig
+
+
+def _scheduler(*cameras, max_batch_size=6):
+    return InferenceScheduler(cameras, handler=lambda batch: batch, policy=BatchPolicy(max_batch_size, 0))
+
+
+def test_collect_round_robins_by_priority():
+    busy = CameraConfig(id=1, rtsp_url="rtsp://busy", priority=2, queue_depth=16)
+    quiet = CameraConfig(id=2, rtsp_url="rtsp://quiet", queue_depth=16)
+    scheduler = _scheduler(busy, quiet)
+    for index in range(10):
+        scheduler.submit(1, f"busy-{index}")
+    for index in range(3):
+        scheduler.submit(2, f"quiet-{index}")
+
+    batch = scheduler._collect(6)
+    assert [camera.id for camera, _ in batch] == [1, 1, 2, 1, 1, 2]
+    # The next round starts at the other lane so ties do not always favour camera 1.
+    assert [camera.id for camera, _ in scheduler._collect(3)] == [2, 1, 1]
+
+
+def test_fps_cap_and_lane_overflow_are_counted():
+    capped = CameraConfig(id=1, rtsp_url="rtsp://capped", fps=1, queue_depth=2)
+    scheduler = _scheduler(capped)
+    assert scheduler.submit(1, "a")
+    assert not scheduler.submit(1, "b")
+    assert scheduler.stats()[1]["throttled"] == 1
+
+    small = CameraConfig(id=2, rtsp_url="rtsp://small", queue_depth=2)
+    scheduler = _scheduler(small)
+    for frame in "abc":
+        scheduler.submit(2, frame)
+    assert [frame for _, frame in scheduler._collect(6)] == ["b", "c"]
+    assert scheduler.stats()[2]["dropped"] == 1
@@ -0,0 +1,20 @@
+from types import SimpleNamespace
+
+import settings
+from settings import fetch_backend_cameras
+
+
+def test_backend_cameras_follow_the_cursor(monkeypatch):
+    pages = {None: ([{"id": 1}, {"id": 2}], "c2"), "c2": ([{"id": 3}], None)}
+    requested = []
+
+    def get(url, params, timeout):
+        requested.append(dict(params))
+        body, cursor = pages[params.get("cursor")]
+        headers = {"X-Next-Cursor": cursor} if cursor else {}
+        return SimpleNamespace(json=lambda: body, headers=headers, raise_for_status=lambda: None)
+
+    monkeypatch.setattr(settings.requests, "get", get)
+    assert [camera["id"] for camera in fetch_backend_cameras("http://backend/")] == [1, 2, 3]
+    assert [params.get("cursor") for params in requested] == [None, "c2"]
+    assert all(params["enabled"] is True for params in requested)
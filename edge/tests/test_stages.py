@@ -0,0 +1,75 @@
+import queue
+import threading
+
+import pytest
+
+from stages import BLOCK, DROP_NEWEST, DROP_OLDEST, BoundedQueue, Stage, _CLOSED
+
+
+def _drain(inbox):
+    items = []
+    while True:
+        try:
+            items.append(inbox.get(block=False))
+        except queue.Empty:
+            return items
+
+
+def test_drop_oldest_evicts_the_head():
+    inbox = BoundedQueue(2, DROP_OLDEST)
+    assert all(inbox.put(item) for item in "abc")
+    assert _drain(inbox) == ["b", "c"]
+    assert inbox.dropped == 1
+
+
+def test_drop_newest_rejects_the_incoming_item():
+    inbox = BoundedQueue(2, DROP_NEWEST)
+    assert [inbox.put(item) for item in "abc"] == [True, True, False]
+    assert _drain(inbox) == ["a", "b"]
+    assert inbox.dropped == 1
+
+
+def test_block_waits_for_room():
+    inbox = BoundedQueue(1, BLOCK)
+    inbox.put("a")
+    putter = threading.Thread(target=inbox.put, args=("b",))
+    putter.start()
+    putter.join(0.1)
+    assert putter.is_alive()
+    assert inbox.get() == "a"
+    putter.join(1)
+    assert not putter.is_alive()
+    assert inbox.get(timeout=1) == "b" and inbox.dropped == 0
+
+
+def test_unknown_policy_is_rejected():
+    with pytest.raises(ValueError):
+        BoundedQueue(1, "drop_random")
+
+
+def test_close_reaches_every_worker_and_the_outbox_once():
+    inbox, outbox = BoundedQueue(16), BoundedQueue(64)
+    started = threading.Barrier(3)
+
+    def handler(item):
+        if item == "sync":
+            started.wait(1)
+        if item == "bad":
+            raise RuntimeError("boom")
+        return [item, item]
+
+    stage = Stage("double", handler, inbox, outbox, workers=3)
+    stage.start()
+    for item in ["sync", "sync", "sync", 1, "bad", 2]:
+        inbox.put(item)
+    inbox.close()
+    stage.join(2)
+
+    assert not any(thread.is_alive() for thread in stage._threads)
+    assert stage.processed == 5 and stage.failed == 1
+    results = []
+    while (item := outbox.get(timeout=1)) is not _CLOSED:
+        results.append(item)
+    assert sorted(map(str, results)) == sorted(map(str, ["sync"] * 6 + [1, 1, 2, 2]))
+    # Only the last worker to stop closes the outbox.
+    assert _drain(outbox) == []
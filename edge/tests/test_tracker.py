@@ -0,0 +1,56 @@
+import itertools
+
+import numpy as np
+
+from pipeline import Detection
+from tracker import CentroidTracker, linear_assignment
+
+
+def _brute_force(cost):
+    rows, cols = cost.shape
+    if rows <= cols:
+        return min(sum(cost[r, c] for r, c in enumerate(p)) for p in itertools.permutations(range(cols), rows))
+    return min(sum(cost[r, c] for c, r in enumerate(p)) for p in itertools.permutations(range(rows), cols))
+
+
+def test_linear_assignment_matches_brute_force():
+    rng = np.random.default_rng(7)
+    for _ in range(200):
+        shape = tuple(int(size) for size in rng.integers(1, 6, size=2))
+        cost = rng.random(shape)
+        rows, cols = linear_assignment(cost)
+        assert len(rows) == min(shape)
+        assert len(set(rows.tolist())) == len(rows) and len(set(cols.tolist())) == len(cols)
+        assert np.isclose(cost[rows, cols].sum(), _brute_force(cost))
+
+
+def test_linear_assignment_handles_empty_matrix():
+    rows, cols = linear_assignment(np.empty((0, 3)))
+    assert rows.size == 0 and cols.size == 0
+
+
+def _det(x, y, size=40):
+    return Detection(bbox=(x, y, x + size, y + size), score=0.9, label="plate")
+
+
+def test_tracker_keeps_ids_reports_moves_and_expires_lost_tracks():
+    tracker = CentroidTracker(max_disappeared=2)
+    first = tracker.update([_det(0, 0), _det(300, 300)])
+    assert [track.track_id for track in first] == [1, 2]
+
+    # Track 1 moves enough to be reported again; track 2 is static and is not.
+    moved = tracker.update([_det(10, 0), _det(300, 300)])
+    assert [track.track_id for track in moved] == [1]
+    assert tracker.tracks[1].hits == 2 and tracker.tracks[2].hits == 2
+
+    # Track 2 disappears; it is evicted after more than max_disappeared missed frames.
+    for _ in range(2):
+        tracker.update([_det(10, 0)])
+        assert tracker.expired == []
+    tracker.update([_det(10, 0)])
+    assert [track.track_id for track in tracker.expired] == [2]
+    assert set(tracker.tracks) == {1}
+
+    # A detection far from every track starts a new one.
+    new = tracker.update([_det(10, 0), _det(600, 50)])
+    assert [track.track_id for track in new] == [3]
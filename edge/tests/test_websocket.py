@@ -0,0 +1,147 @@
+import asyncio
+import json
+import socket
+import threading
+import time
+
+import pytest
+import websockets
+
+import exporters.websocket as websocket_module
+from exporters.websocket import WebSocketExporter
+
+
+class Server:
+    """A local ``websockets.serve`` on its own loop thread that records what each connection received."""
+
+    def __init__(self, drop_after=None):
+        self.drop_after = drop_after
+        self.connections = []
+        self._loop = asyncio.new_event_loop()
+        started = threading.Event()
+        self._thread = threading.Thread(target=self._run, args=(started,), daemon=True)
+        self._thread.start()
+        assert started.wait(5)
+
+    def _run(self, started):
+        async def main():
+            self._stop = asyncio.Event()
+            async with websockets.serve(self._handle, "127.0.0.1", 0) as server:
+                self.url = f"ws://127.0.0.1:{server.sockets[0].getsockname()[1]}"
+                started.set()
+                await self._stop.wait()
+
+        self._loop.run_until_complete(main())
+
+    async def _handle(self, ws):
+        received = []
+        self.connections.append(received)
+        async for message in ws:
+            received.append(json.loads(message))
+            if self.drop_after and len(self.connections) == 1 and len(received) == self.drop_after:
+                await ws.close()
+                return
+
+    def received(self):
+        return [event for connection in self.connections for event in connection]
+
+    def stop(self):
+        self._loop.call_soon_threadsafe(self._stop.set)
+        self._thread.join(5)
+
+
+def _wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.01)
+    return True
+
+
+def _exporter(endpoint, **config):
+    exporter = WebSocketExporter({"endpoint": endpoint, "backoff_initial": 0.05, **config})
+    handed_off = []
+    exporter.on_failure = handed_off.extend
+    return exporter, handed_off
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+@pytest.fixture
+def server():
+    server = Server()
+    yield server
+    server.stop()
+
+
+def test_events_are_pipelined_on_one_connection(server):
+    exporter, handed_off = _exporter(server.url)
+    try:
+        assert _wait_for(lambda: exporter.connected)
+        for index in range(50):
+            exporter.send({"seq": index})
+        assert _wait_for(lambda: len(server.received()) == 50)
+    finally:
+        exporter.close()
+    assert [event["seq"] for event in server.received()] == list(range(50))
+    assert len(server.connections) == 1 and handed_off == []
+
+
+def test_reconnects_after_the_server_drops_the_connection():
+    server = Server(drop_after=1)
+    exporter, handed_off = _exporter(server.url)
+    try:
+        exporter.send({"seq": 0})
+        assert _wait_for(lambda: len(server.connections) == 1 and server.connections[0])
+        # The first write on the dropped connection fails; that event stays queued for the next one.
+        for index in range(1, 4):
+            exporter.send({"seq": index})
+        assert _wait_for(lambda: len(server.received()) == 4)
+    finally:
+        exporter.close()
+        server.stop()
+    assert len(server.connections) == 2
+    assert [event["seq"] for event in server.connections[1]] == [1, 2, 3]
+    assert handed_off == []
+
+
+def test_undelivered_events_are_handed_to_on_failure():
+    exporter, handed_off = _exporter(f"ws://127.0.0.1:{_free_port()}")
+    for index in range(3):
+        exporter.send({"seq": index})
+    exporter.close(timeout=0.5)
+    assert [event["seq"] for event in handed_off] == [0, 1, 2]
+    assert not exporter._thread.is_alive()
+
+
+def test_close_hands_off_only_after_a_stuck_send_stopped(monkeypatch):
+    sending = threading.Event()
+
+    class StuckSocket:
+        async def send(self, message):
+            sending.set()
+            await asyncio.Event().wait()
+
+    class Connect:
+        def __init__(self, *args, **kwargs):
+            pass
+
+        async def __aenter__(self):
+            return StuckSocket()
+
+        async def __aexit__(self, *exc):
+            return False
+
+    monkeypatch.setattr(websocket_module.websockets, "connect", Connect)
+    exporter, handed_off = _exporter("ws://edge.invalid")
+    for index in range(2):
+        exporter.send({"seq": index})
+    assert sending.wait(5)
+    exporter.close(timeout=0.1)
+    assert not exporter._thread.is_alive()
+    assert [event["seq"] for event in handed_off] == [0, 1]
@@ -0,0 +1,90 @@
+import numpy as np
+
+from pipeline import Detection
+from settings import CameraConfig
+from tracker import Track
+from zones import IN, OUT, ZoneAssigner, line_crossings, points_in_polygon
+
+
+def square(x, y, size):
+    return [{"x": x, "y": y}, {"x": x + size, "y": y}, {"x": x + size, "y": y + size}, {"x": x, "y": y + size}]
+
+
+def track_at(track_id, x, y):
+    return Track(track_id=track_id, detection=Detection(bbox=(x - 5, y - 5, x + 5, y + 5), score=0.9, label="plate"))
+
+
+def move(track, x, y):
+    track.detection = Detection(bbox=(x - 5, y - 5, x + 5, y + 5), score=0.9, label="plate")
+
+
+def test_points_in_polygon_matches_scalar_ray_casting():
+    rng = np.random.default_rng(1)
+    polygon = rng.uniform(0, 100, size=(7, 2))
+    points = rng.uniform(-10, 110, size=(500, 2))
+
+    def inside(px, py):
+        result = False
+        for (x1, y1), (x2, y2) in zip(polygon, np.roll(polygon, -1, axis=0)):
+            if (y1 > py) != (y2 > py) and px < x1 + (py - y1) * (x2 - x1) / (y2 - y1):
+                result = not result
+        return result
+
+    assert points_in_polygon(points, polygon).tolist() == [inside(x, y) for x, y in points]
+
+
+def test_line_crossings_report_side_and_ignore_moves_past_the_segment():
+    line = np.array([(0.0, 0.0), (100.0, 0.0)])
+    before = np.array([(50, -10), (50, 10), (150, -10), (50, -10)], float)
+    after = np.array([(50, 10), (50, -10), (150, 10), (60, -5)], float)
+    assert line_crossings(line, before, after).tolist() == [1, -1, 0, 0]
+
+
+def test_assign_sets_zone_and_direction():
+    camera = CameraConfig(id=1, rtsp_url="rtsp://cam", zone_id=9)
+    assigner = ZoneAssigner(cell_size=32)
+    assigner.update(
+        [
+            {"id": 9, "geometry": {}},
+            {"id": 2, "geometry": {"points": square(0, 0, 100), "camera_id": 1}},
+            {"id": 3, "geometry": {"points": square(200, 0, 100), "camera_id": 1,
+                                   "line": [{"x": 250, "y": 0}, {"x": 250, "y": 100}]}},
+            {"id": 4, "geometry": {"points": square(0, 0, 100), "camera_id": 2}},
+        ],
+        [camera],
+    )
+    outside, entering, crossing = track_at(1, 150, 50), track_at(2, 150, 50), track_at(3, 220, 50)
+    assigner.assign(camera, [outside, entering, crossing])
+    assert [t.zone_id for t in (outside, entering, crossing)] == [9, 9, 3]
+    assert [t.direction for t in (outside, entering, crossing)] == [None, None, None]
+
+    move(entering, 50, 50)
+    move(crossing, 280, 50)
+    assigner.assign(camera, [outside, entering, crossing])
+    assert (entering.zone_id, entering.direction) == (2, IN)
+    # Moving right across a top-to-bottom line is crossing it right to left.
+    assert (crossing.zone_id, crossing.direction) == (3, OUT)
+
+    move(entering, 150, 50)
+    assigner.assign(camera, [entering])
+    assert (entering.zone_id, entering.direction) == (2, OUT)
+
+
+def test_update_recompiles_only_changed_zones():
+    cameras = [CameraConfig(id=1, rtsp_url="rtsp://cam")]
+    zones = [
+        {"id": 1, "geometry": {"points": square(0, 0, 100), "camera_id": 1}},
+        {"id": 2, "geometry": {"points": square(200, 0, 100), "camera_id": 1}},
+    ]
+    assigner = ZoneAssigner()
+    assigner.update(zones, cameras)
+    index = assigner.indexes[1]
+    first, second = index.zones[1], index.zones[2]
+
+    zones[1] = {"id": 2, "geometry": {"points": square(400, 0, 100), "camera_id": 1}}
+    assigner.update(zones, cameras)
+    assert assigner.indexes[1] is index and index.zones[1] is first and index.zones[2] is not second
+    assert index.locate(np.array([(450.0, 50.0), (250.0, 50.0)])).tolist() == [2, -1]
+
+    assigner.update(zones[:1], cameras)
+    assert list(index.zones) == [1] and all(1 in cell for cell in index._cells.values())
@@ -1,30 +1,183 @@
-"""Simple centroid tracker stub."""
+"""Centroid/IoU multi-object tracker with optimal assignment."""
 from __future__ import annotations
 
 import itertools
 from dataclasses import dataclass
-from typing import Dict, List
+from typing import TYPE_CHECKING, Dict, List, Optional, Sequence, Tuple
 
-from pipeline import Detection
+import numpy as np
+
+if TYPE_CHECKING:
+    from detector import Detection
+
+_INVALID = 1e6
 
 
 @dataclass
 class Track:
     track_id: int
     detection: Detection
+    hits: int = 1
+    # Set by ``zones.ZoneAssigner``.
+    zone_id: Optional[int] = None
+    direction: Optional[str] = None
+    last_zone: Optional[int] = None
+    last_point: Optional[Tuple[float, float]] = None
+
+
+def iou_matrix(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """Pairwise IoU between ``(n, 4)`` and ``(m, 4)`` boxes in x1, y1, x2, y2 form."""
+    x1 = np.maximum(a[:, None, 0], b[None, :, 0])
+    y1 = np.maximum(a[:, None, 1], b[None, :, 1])
+    x2 = np.minimum(a[:, None, 2], b[None, :, 2])
+    y2 = np.minimum(a[:, None, 3], b[None, :, 3])
+    inter = np.clip(x2 - x1, 0, None) * np.clip(y2 - y1, 0, None)
+    area_a = (a[:, 2] - a[:, 0]) * (a[:, 3] - a[:, 1])
+    area_b = (b[:, 2] - b[:, 0]) * (b[:, 3] - b[:, 1])
+    union = area_a[:, None] + area_b[None, :] - inter
+    return np.divide(inter, union, out=np.zeros_like(inter), where=union > 0)
+
+
+def centroid_distances(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    ca = (a[:, :2] + a[:, 2:]) / 2
+    cb = (b[:, :2] + b[:, 2:]) / 2
+    return np.linalg.norm(ca[:, None, :] - cb[None, :, :], axis=2)
+
+
+def linear_assignment(cost: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Minimum-cost assignment (Hungarian / Kuhn-Munkres) for a rectangular matrix.
+
+    Returns ``(rows, cols)`` index arrays like ``scipy.optimize.linear_sum_assignment``.
+    """
+    if cost.size == 0:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+    transposed = cost.shape[0] > cost.shape[1]
+    if transposed:
+        cost = cost.T
+    n, m = cost.shape
+    u = np.zeros(n + 1)
+    v = np.zeros(m + 1)
+    owner = np.zeros(m + 1, dtype=np.int64)  # owner[j]: 1-based row assigned to column j
+    way = np.zeros(m + 1, dtype=np.int64)
+    for row in range(1, n + 1):
+        owner[0] = row
+        col = 0
+        minv = np.full(m + 1, np.inf)
+        used = np.zeros(m + 1, dtype=bool)
+        while True:
+            used[col] = True
+            current = cost[owner[col] - 1] - u[owner[col]] - v[1:]
+            free = ~used[1:]
+            better = free & (current < minv[1:])
+            minv[1:][better] = current[better]
+            way[1:][better] = col
+            candidates = np.where(free, minv[1:], np.inf)
+            nxt = int(np.argmin(candidates)) + 1
+            delta = candidates[nxt - 1]
+            u[owner[used]] += delta
+            v[used] -= delta
+            minv[~used] -= delta
+            col = nxt
+            if owner[col] == 0:
+                break
+        while col:
+            prev = way[col]
+            owner[col] = owner[prev]
+            col = prev
+    cols = np.nonzero(owner[1:])[0]
+    rows = owner[1:][cols] - 1
+    if transposed:
+        rows, cols = cols, rows
+    order = np.argsort(rows)
+    return rows[order], cols[order]
 
 
 class CentroidTracker:
-    def __init__(self, max_disappeared: int = 5):
+    """Associates detections across frames and manages track lifecycle.
+
+    Tracks and detections are matched on a cost matrix of ``1 - IoU``, falling
+    back to centroid distance (up to ``max_distance`` pixels) for boxes that do
+    not overlap, using optimal assignment. Tracks unmatched for more than
+    ``max_disappeared`` frames are evicted and exposed via ``expired``.
+    Per-track state is kept in parallel NumPy arrays indexed by slot.
+
+    ``update`` only returns tracks that are new or whose box moved enough
+    (IoU with the last reported box below ``report_iou``) to be worth
+    re-processing downstream.
+    """
+
+    def __init__(
+        self,
+        max_disappeared: int = 5,
+        iou_threshold: float = 0.3,
+        max_distance: float = 80.0,
+        report_iou: float = 0.95,
+    ):
         self.next_id = itertools.count(1)
         self.tracks: Dict[int, Track] = {}
         self.max_disappeared = max_disappeared
+        self.iou_threshold = iou_threshold
+        self.max_distance = max_distance
+        self.report_iou = report_iou
+        self.expired: List[Track] = []
+        self._ids = np.empty(0, dtype=np.int64)
+        self._boxes = np.empty((0, 4), dtype=np.float32)
+        self._reported = np.empty((0, 4), dtype=np.float32)
+        self._missed = np.empty(0, dtype=np.int32)
+
+    def update(self, detections: Sequence[Detection]) -> List[Track]:
+        boxes = np.asarray([det.bbox for det in detections], dtype=np.float32).reshape(-1, 4)
+        rows, cols = self._match(boxes)
+
+        report = np.zeros(len(self._ids), dtype=bool)
+        self._missed += 1
+        if len(rows):
+            self._missed[rows] = 0
+            self._boxes[rows] = boxes[cols]
+            moved = np.diag(iou_matrix(boxes[cols], self._reported[rows])) < self.report_iou
+            report[rows[moved]] = True
+            for row, col in zip(rows, cols):
+                track = self.tracks[int(self._ids[row])]
+                track.detection = detections[col]
+                track.hits += 1
+
+        unmatched = np.setdiff1d(np.arange(len(detections)), cols, assume_unique=True)
+        if len(unmatched):
+            new_ids = np.fromiter((next(self.next_id) for _ in unmatched), dtype=np.int64, count=len(unmatched))
+            for track_id, col in zip(new_ids, unmatched):
+                self.tracks[int(track_id)] = Track(track_id=int(track_id), detection=detections[col])
+            self._ids = np.concatenate([self._ids, new_ids])
+            self._boxes = np.concatenate([self._boxes, boxes[unmatched]])
+            self._reported = np.concatenate([self._reported, np.zeros((len(unmatched), 4), np.float32)])
+            self._missed = np.concatenate([self._missed, np.zeros(len(unmatched), np.int32)])
+            report = np.concatenate([report, np.ones(len(unmatched), dtype=bool)])
+
+        self._reported[report] = self._boxes[report]
+        reported = [self.tracks[int(track_id)] for track_id in self._ids[report]]
+        self._evict()
+        return reported
+
+    def _match(self, boxes: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        if not len(self._ids) or not len(boxes):
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+        overlap = iou_matrix(self._boxes, boxes)
+        distance = centroid_distances(self._boxes, boxes)
+        cost = np.where(overlap > 0, 1.0 - overlap, 1.0 + distance / self.max_distance)
+        valid = (overlap >= self.iou_threshold) | (distance <= self.max_distance)
+        cost = np.where(valid, cost, _INVALID)
+        rows, cols = linear_assignment(cost)
+        keep = valid[rows, cols]
+        return rows[keep], cols[keep]
 
-    def update(self, detections: List[Detection]) -> List[Track]:
-        updated_tracks: List[Track] = []
-        for det in detections:
-            track_id = next(self.next_id)
-            track = Track(track_id=track_id, detection=det)
-            self.tracks[track_id] = track
-            updated_tracks.append(track)
-        return updated_tracks
+    def _evict(self) -> None:
+        self.expired = []
+        stale = self._missed > self.max_disappeared
+        if not stale.any():
+            return
+        for track_id in self._ids[stale]:
+            self.expired.append(self.tracks.pop(int(track_id)))
+        keep = ~stale
+        self._ids = self._ids[keep]
+        self._boxes = self._boxes[keep]
+        self._reported = self._reported[keep]
+        self._missed = self._missed[keep]
@@ -0,0 +1,263 @@
+"""Zone assignment: grid-indexed, vectorized point-in-polygon and line crossings."""
+from __future__ import annotations
+
+import math
+import threading
+from collections import defaultdict
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+import numpy as np
+
+from settings import CameraConfig
+from tracker import Track
+
+NO_ZONE = -1
+IN = "in"
+OUT = "out"
+
+# backend/app/zones.py keeps its own copy of ``polygon_points`` and
+# ``points_in_polygon`` for events ingested without a zone: the two images
+# share no package. Change both together; backend/tests/test_zones.py checks
+# they agree.
+
+
+def _vertices(raw) -> Optional[np.ndarray]:
+    if not raw:
+        return None
+    if isinstance(raw[0], dict):
+        raw = [(point["x"], point["y"]) for point in raw]
+    return np.asarray(raw, dtype=np.float64).reshape(-1, 2)
+
+
+def polygon_points(geometry: Optional[dict]) -> Optional[np.ndarray]:
+    """``(k, 2)`` vertices of a zone polygon, or None if it has fewer than three.
+
+    Accepts the zone designer format (``{"points": [{"x":, "y":}, ...]}``)
+    and GeoJSON-style ``{"coordinates": [[[x, y], ...]]}``. Coordinates are
+    frame pixels.
+    """
+    if not geometry:
+        return None
+    raw = geometry.get("points")
+    if raw is None and geometry.get("coordinates"):
+        raw = geometry["coordinates"][0]
+    points = _vertices(raw)
+    return points if points is not None and len(points) >= 3 else None
+
+
+def line_points(geometry: Optional[dict]) -> Optional[np.ndarray]:
+    """``(2, 2)`` endpoints of the zone's optional counting line ``A -> B``."""
+    points = _vertices((geometry or {}).get("line"))
+    return points[:2] if points is not None and len(points) >= 2 else None
+
+
+def points_in_polygon(points: np.ndarray, polygon: np.ndarray) -> np.ndarray:
+    """Even-odd ray casting of ``(n, 2)`` points against one polygon, vectorized over points and edges."""
+    x = points[:, 0:1]
+    y = points[:, 1:2]
+    x1, y1 = polygon[:, 0], polygon[:, 1]
+    x2, y2 = np.roll(x1, -1), np.roll(y1, -1)
+    straddles = (y1 > y) != (y2 > y)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        crossing_x = x1 + (y - y1) * (x2 - x1) / (y2 - y1)
+    return np.count_nonzero(straddles & (x < crossing_x), axis=1) % 2 == 1
+
+
+def _side(a: np.ndarray, b: np.ndarray, points: np.ndarray) -> np.ndarray:
+    """Cross product of ``b - a`` and ``points - a``: positive right of ``a -> b`` in image coordinates."""
+    return (b[..., 0] - a[..., 0]) * (points[..., 1] - a[..., 1]) - (b[..., 1] - a[..., 1]) * (
+        points[..., 0] - a[..., 0]
+    )
+
+
+def line_crossings(line: np.ndarray, before: np.ndarray, after: np.ndarray) -> np.ndarray:
+    """Per point: +1 if the move ``before -> after`` crossed ``line`` left to right, -1 right to left, else 0.
+
+    Sides are taken in image coordinates (y down), looking from A towards B.
+    """
+    a, b = line
+    start, end = _side(a, b, before), _side(a, b, after)
+    # The endpoints must also lie on opposite sides of the move, or it passed beside the segment.
+    crossed = (start * end < 0) & (_side(before, after, a) * _side(before, after, b) <= 0)
+    return np.where(crossed, np.where(end > 0, 1, -1), 0)
+
+
+@dataclass
+class _Zone:
+    id: int
+    polygon: Optional[np.ndarray]
+    line: Optional[np.ndarray]
+    bounds: Optional[Tuple[float, float, float, float]]
+    area: float
+
+
+def _compile(zone: dict) -> _Zone:
+    geometry = zone.get("geometry") or {}
+    polygon = polygon_points(geometry)
+    bounds, area = None, 0.0
+    if polygon is not None:
+        x, y = polygon[:, 0], polygon[:, 1]
+        bounds = (float(x.min()), float(y.min()), float(x.max()), float(y.max()))
+        area = abs(float(np.dot(x, np.roll(y, -1)) - np.dot(y, np.roll(x, -1)))) / 2
+    return _Zone(zone["id"], polygon, line_points(geometry), bounds, area)
+
+
+class ZoneIndex:
+    """Uniform-grid index of one camera's zone polygons.
+
+    Each zone is registered in every ``cell_size`` cell its bounding box
+    touches, so a lookup only runs the polygon test for zones sharing a
+    cell with at least one query point. Zones are added, replaced or removed
+    one at a time. Where zones overlap the smallest one wins.
+    """
+
+    def __init__(self, cell_size: float = 64.0) -> None:
+        self.cell_size = cell_size
+        self.zones: Dict[int, _Zone] = {}
+        self._cells: Dict[Tuple[int, int], Set[int]] = defaultdict(set)
+
+    def set_zone(self, zone: _Zone) -> None:
+        self.remove_zone(zone.id)
+        self.zones[zone.id] = zone
+        for cell in self._cells_of(zone):
+            self._cells[cell].add(zone.id)
+
+    def remove_zone(self, zone_id: int) -> None:
+        zone = self.zones.pop(zone_id, None)
+        if zone is None:
+            return
+        for cell in self._cells_of(zone):
+            members = self._cells.get(cell)
+            if members is not None:
+                members.discard(zone_id)
+                if not members:
+                    del self._cells[cell]
+
+    def _cells_of(self, zone: _Zone) -> Iterable[Tuple[int, int]]:
+        if zone.bounds is None:
+            return ()
+        x1, y1, x2, y2 = (math.floor(value / self.cell_size) for value in zone.bounds)
+        return [(cx, cy) for cx in range(x1, x2 + 1) for cy in range(y1, y2 + 1)]
+
+    def locate(self, points: np.ndarray) -> np.ndarray:
+        """Zone id containing each of ``(n, 2)`` points, ``NO_ZONE`` where none does."""
+        result = np.full(len(points), NO_ZONE, dtype=np.int64)
+        if not len(points) or not self._cells:
+            return result
+        cells = np.floor(points / self.cell_size).astype(np.int64)
+        candidates: Dict[int, List[int]] = defaultdict(list)
+        for index, cell in enumerate(map(tuple, cells)):
+            for zone_id in self._cells.get(cell, ()):
+                candidates[zone_id].append(index)
+        for zone_id in sorted(candidates, key=lambda key: self.zones[key].area, reverse=True):
+            # Larger zones first, so smaller (nested) zones overwrite them.
+            rows = np.asarray(candidates[zone_id])
+            inside = points_in_polygon(points[rows], self.zones[zone_id].polygon)
+            result[rows[inside]] = zone_id
+        return result
+
+
+class ZoneAssigner:
+    """Assigns tracked plates to zones and detects line crossings, per camera.
+
+    A zone applies to a camera when its geometry names the camera
+    (``camera_id``) or the camera's ``zone_id`` points at it. ``update``
+    recompiles only zones whose row changed and touches only the indexes of
+    the cameras they belong to.
+    """
+
+    def __init__(self, cell_size: float = 64.0) -> None:
+        self.cell_size = cell_size
+        self.indexes: Dict[int, ZoneIndex] = {}
+        self._rows: Dict[int, dict] = {}
+        self._compiled: Dict[int, _Zone] = {}
+        self._members: Dict[int, Set[int]] = {}
+        self._lock = threading.Lock()
+
+    def update(self, zones: Sequence[dict], cameras: Sequence[CameraConfig]) -> None:
+        with self._lock:
+            self._update({zone["id"]: zone for zone in zones}, cameras)
+
+    def _update(self, rows: Dict[int, dict], cameras: Sequence[CameraConfig]) -> None:
+        for zone_id in self._rows.keys() - rows.keys():
+            del self._compiled[zone_id]
+        for zone_id, row in rows.items():
+            if self._rows.get(zone_id) != row:
+                self._compiled[zone_id] = _compile(row)
+        changed = {key for key in rows.keys() | self._rows.keys() if rows.get(key) != self._rows.get(key)}
+        self._rows = rows
+
+        members = {camera.id: self._zones_for(camera) for camera in cameras}
+        for camera_id in self.indexes.keys() - members.keys():
+            del self.indexes[camera_id]
+        for camera_id, wanted in members.items():
+            index = self.indexes.setdefault(camera_id, ZoneIndex(self.cell_size))
+            had = self._members.get(camera_id, set())
+            for zone_id in had - wanted:
+                index.remove_zone(zone_id)
+            for zone_id in (wanted - had) | (wanted & changed):
+                index.set_zone(self._compiled[zone_id])
+        self._members = members
+
+    def _zones_for(self, camera: CameraConfig) -> Set[int]:
+        return {
+            zone_id
+            for zone_id, row in self._rows.items()
+            if zone_id == camera.zone_id or (row.get("geometry") or {}).get("camera_id") == camera.id
+        }
+
+    def polygons(self, camera_id: int) -> List[np.ndarray]:
+        """Polygons of the zones that apply to ``camera_id``."""
+        with self._lock:
+            index = self.indexes.get(camera_id)
+            return [zone.polygon for zone in index.zones.values() if zone.polygon is not None] if index else []
+
+    def assign(self, camera: CameraConfig, tracks: Sequence[Track]) -> None:
+        """Set ``zone_id`` and ``direction`` on the camera's reported tracks.
+
+        A track's zone is the zone containing its box centroid. Crossing a
+        zone's counting line sets ``direction`` (``in`` left to right as seen
+        from A towards B, ``out`` the other way) and the zone; without a line,
+        entering a zone counts as ``in`` and leaving it as ``out``. Zone and
+        direction stick to the track once set, so the event reports where
+        the plate was last seen; a track that was never inside a zone gets
+        the camera's own ``zone_id``.
+        """
+        if not tracks:
+            return
+        boxes = np.asarray([track.detection.bbox for track in tracks], dtype=np.float64).reshape(-1, 4)
+        points = (boxes[:, :2] + boxes[:, 2:]) / 2
+        with self._lock:
+            index = self.indexes.setdefault(camera.id, ZoneIndex(self.cell_size))
+            located = index.locate(points)
+            line_zones = [zone for zone in index.zones.values() if zone.line is not None]
+        seen = np.array([track.last_point is not None for track in tracks])
+        before = np.array([track.last_point or (0.0, 0.0) for track in tracks], dtype=np.float64)
+        previous = np.array([NO_ZONE if track.last_zone is None else track.last_zone for track in tracks])
+
+        crossed = np.full(len(tracks), NO_ZONE, dtype=np.int64)
+        sign = np.zeros(len(tracks), dtype=np.int64)
+        for zone in line_zones:
+            crossing = np.where(seen, line_crossings(zone.line, before, points), 0)
+            crossed[crossing != 0] = zone.id
+            sign[crossing != 0] = crossing[crossing != 0]
+        # Zones with a counting line report direction only when it is crossed.
+        counted = [zone.id for zone in line_zones]
+        moved = seen & (crossed == NO_ZONE) & (located != previous)
+        entered = moved & (located != NO_ZONE) & ~np.isin(located, counted)
+        left = moved & ~entered & (previous != NO_ZONE) & ~np.isin(previous, counted)
+
+        for i, track in enumerate(tracks):
+            if crossed[i] != NO_ZONE:
+                track.zone_id, track.direction = int(crossed[i]), IN if sign[i] > 0 else OUT
+            elif entered[i]:
+                track.zone_id, track.direction = int(located[i]), IN
+            elif left[i]:
+                track.zone_id, track.direction = int(previous[i]), OUT
+            elif located[i] != NO_ZONE:
+                track.zone_id = int(located[i])
+            elif track.zone_id is None:
+                track.zone_id = camera.zone_id
+            track.last_zone = None if located[i] == NO_ZONE else int(located[i])
+            track.last_point = (float(points[i, 0]), float(points[i, 1]))